@@ -1,9 +1,13 @@
 """Simple library that allows you to retrieve image information from meme sites"""
+from importlib import import_module
 from logging import NullHandler, getLogger
+from typing import TYPE_CHECKING, Any
 
-from .scraper_constructor import create_scraper
 from .src.models import Image
 
+if TYPE_CHECKING:
+    from .scraper_constructor import create_scraper
+
 
 __version__ = "0.3.0"
 __all__ = [
@@ -12,3 +16,10 @@ __all__ = [
 ]
 
 getLogger(__name__).addHandler(NullHandler())
+
+
+def __getattr__(name: str) -> Any:
+    """Imports create_scraper, together with requests, only when it is used."""
+    if name == "create_scraper":
+        return import_module(".scraper_constructor", __name__).create_scraper
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
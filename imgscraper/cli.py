@@ -0,0 +1,312 @@
+"""Command-line runner syncing many sites described in a configuration file."""
+import argparse
+import json
+import logging
+import sys
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from time import perf_counter
+from typing import IO, Any, Iterable, Iterator
+from urllib.parse import urlsplit
+
+from imgscraper.src.models import SyncResult
+from imgscraper.src.storage import JsonStore
+
+log = logging.getLogger(__name__)
+
+
+def load_config(path: str | Path) -> list[dict[str, Any]]:
+    """Reads the site configs from the JSON, TOML or YAML file. The file holds either
+    a list of the sites or a mapping with the "sites" list and the optional
+    "defaults", applied to every site. Every site holds the create_scraper arguments
+    and an optional "name".
+
+    Args:
+        path: location of the configuration file.
+
+    Returns: list of the site configs with the defaults applied."""
+    path = Path(path)
+    suffix = path.suffix.lower()
+    data: Any
+    with path.open("rb") as file:
+        if suffix == ".toml":
+            try:
+                import tomllib  # pylint: disable=import-outside-toplevel
+            except ImportError:
+                try:
+                    # pylint: disable-next=import-outside-toplevel
+                    import tomli as tomllib  # type: ignore[no-redef]
+                except ImportError as error:
+                    raise ImportError(
+                        "TOML configs on Python 3.10 require tomli. "
+                        "Install imgscraper[toml]."
+                    ) from error
+
+            data = tomllib.load(file)
+        elif suffix in (".yaml", ".yml"):
+            try:
+                import yaml  # pylint: disable=import-outside-toplevel
+            except ImportError as error:
+                raise ImportError(
+                    "YAML configs require PyYAML. Install imgscraper[yaml]."
+                ) from error
+
+            data = yaml.safe_load(file)
+        else:
+            data = json.load(file)
+
+    if isinstance(data, list):
+        data = {"sites": data}
+    if not isinstance(data, dict) or not isinstance(data.get("sites"), list):
+        raise ValueError(f"{path} should hold a list of sites.")
+    defaults = data.get("defaults", {})
+    sites = []
+    for site in data["sites"]:
+        config = {**defaults, **site}
+        missing = {"website_url", "container_class", "pagination_class"} - set(config)
+        if missing:
+            raise ValueError(f"Site {site} is missing {', '.join(sorted(missing))}.")
+        config.setdefault("name", config["website_url"])
+        sites.append(config)
+    names = [site["name"] for site in sites]
+    if len(set(names)) != len(names):
+        raise ValueError("Site names should be unique.")
+    return sites
+
+
+class WatermarkStore:
+    """Keeps the URL addresses of the newest images of every site between the runs.
+    They are passed to the next sync as last_sync_data."""
+
+    def __init__(self, path: str | Path | None = None, size: int = 20) -> None:
+        """Constructor.
+
+        Args:
+            path: JSON file in which the watermarks are kept. If None, the
+                watermarks live only in memory.
+            size: how many of the newest image URL addresses are kept per site."""
+        self._store = JsonStore(path)
+        self.size = size
+
+    def get(self, site: str) -> tuple[str, ...] | None:
+        watermark = self._store.get(site)
+        return tuple(watermark) if watermark else None
+
+    def update(self, site: str, url_addresses: Iterable[str]) -> None:
+        """Puts the URL addresses of the new images, newest first, on top of the
+        watermark of the site."""
+        watermark = list(dict.fromkeys([*url_addresses, *(self.get(site) or ())]))
+        if watermark:
+            self._store.set(site, watermark[: self.size])
+
+
+@dataclass(frozen=True)
+class SiteRun:
+    name: str
+    result: SyncResult | None
+    duration: float
+    error: str | None = None
+
+
+class HostQueues:
+    """Queues the sites of every host, so at most per_host syncs of the same host
+    run at a time. The sites are released only when their host has a free slot,
+    so no worker waits for a busy host."""
+
+    def __init__(self, sites: list[dict[str, Any]], per_host: int) -> None:
+        self.per_host = max(per_host, 1)
+        self._queues: dict[str, deque[dict[str, Any]]] = {}
+        self._running: Counter[str] = Counter()
+        for site in sites:
+            self._queues.setdefault(self._host(site), deque()).append(site)
+
+    @staticmethod
+    def _host(site: dict[str, Any]) -> str:
+        return urlsplit(site["website_url"]).netloc.lower()
+
+    def ready(self) -> list[dict[str, Any]]:
+        """Returns the sites which can be synced now, taking the hosts in turn."""
+        sites: list[dict[str, Any]] = []
+        while True:
+            released = [
+                queue.popleft()
+                for host, queue in self._queues.items()
+                if queue and self._running[host] < self.per_host
+            ]
+            if not released:
+                return sites
+            self._running.update(self._host(site) for site in released)
+            sites.extend(released)
+
+    def done(self, site: dict[str, Any]) -> None:
+        """Frees the slot of the host of the synced site."""
+        self._running[self._host(site)] -= 1
+
+
+def _sync_site(config: dict[str, Any], watermarks: WatermarkStore) -> SiteRun:
+    # pylint: disable-next=import-outside-toplevel
+    from imgscraper.scraper_constructor import create_scraper
+
+    options = dict(config)
+    name = options.pop("name")
+    start = perf_counter()
+    try:
+        result = create_scraper(**options).start_sync(
+            watermarks.get(name)  # type: ignore[arg-type]
+        )
+    except Exception as error:  # pylint: disable=broad-exception-caught
+        log.exception("Sync of %s failed.", name)
+        return SiteRun(name, None, perf_counter() - start, repr(error))
+    return SiteRun(name, result, perf_counter() - start)
+
+
+def run_sites(
+    sites: list[dict[str, Any]],
+    watermarks: WatermarkStore,
+    workers: int = 4,
+    per_host: int = 1,
+) -> Iterator[SiteRun]:
+    """Syncs the sites concurrently, starting from their watermarks. The watermarks
+    are not updated, so the caller can do it once the images are stored.
+
+    Args:
+        sites: the site configs returned by load_config.
+        watermarks: the WatermarkStore object.
+        workers: how many sites are synced at the same time.
+        per_host: how many sites of the same host are synced at the same time.
+
+    Returns: iterator of SiteRun objects, in order of completion."""
+    hosts = HostQueues(sites, per_host)
+    with ThreadPoolExecutor(
+        max_workers=max(workers, 1), thread_name_prefix="imgscraper-cli"
+    ) as executor:
+        running = {
+            executor.submit(_sync_site, site, watermarks): site
+            for site in hosts.ready()
+        }
+        while running:
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                hosts.done(running.pop(future))
+            running.update(
+                {
+                    executor.submit(_sync_site, site, watermarks): site
+                    for site in hosts.ready()
+                }
+            )
+            for future in finished:
+                yield future.result()
+
+
+def write_images(run: SiteRun, output: IO[str]) -> None:
+    """Writes the images of the site run as NDJSON, one image per line."""
+    if run.result is None:
+        return
+    output.write(
+        "".join(
+            json.dumps({"site": run.name, **image.as_dict()}, ensure_ascii=False) + "\n"
+            for image in run.result.images
+        )
+    )
+    output.flush()
+
+
+def format_stats(runs: list[SiteRun], elapsed: float) -> str:
+    """Returns the summary of the run: the throughput and the latency of every
+    site."""
+    pages = sum(run.result.pages_scanned for run in runs if run.result)
+    images = sum(len(run.result.images) for run in runs if run.result)
+    elapsed = max(elapsed, 1e-9)
+    lines = [
+        f"Sites: {len(runs)}, failed: {sum(run.error is not None for run in runs)}",
+        f"Pages: {pages} ({pages / elapsed:.2f} pages/s)",
+        f"Images: {images} ({images / elapsed:.2f} images/s)",
+        f"Elapsed: {elapsed:.3f}s",
+    ]
+    for run in sorted(runs, key=lambda run: run.duration, reverse=True):
+        details = (
+            f"{run.result.pages_scanned} pages, {len(run.result.images)} images"
+            if run.result
+            else f"failed: {run.error}"
+        )
+        lines.append(f"  {run.name}: {run.duration:.3f}s, {details}")
+    return "\n".join(lines)
+
+
+def parse_arguments(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="imgscraper",
+        description="Scans the sites from the configuration file for new images.",
+    )
+    parser.add_argument("config", help="JSON, TOML or YAML file with the sites.")
+    parser.add_argument(
+        "-w", "--workers", type=int, default=4, help="Sites synced at the same time."
+    )
+    parser.add_argument(
+        "--per-host",
+        type=int,
+        default=1,
+        help="Sites of the same host synced at the same time.",
+    )
+    parser.add_argument(
+        "-s",
+        "--state",
+        default=".imgscraper-state.json",
+        help="JSON file with the watermarks of the sites.",
+    )
+    parser.add_argument(
+        "--watermark-size",
+        type=int,
+        default=20,
+        help="How many of the newest images of every site are remembered.",
+    )
+    parser.add_argument(
+        "-o", "--output", default="-", help="NDJSON file of the images (- for stdout)."
+    )
+    parser.add_argument(
+        "--stats", action="store_true", help="Print the summary to stderr."
+    )
+    parser.add_argument("--log-level", default="WARNING", help="Logging level.")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Entry point of the imgscraper command.
+
+    Returns: 0 if all sites were synced, 1 otherwise."""
+    arguments = parse_arguments(argv)
+    logging.basicConfig(level=arguments.log_level.upper(), stream=sys.stderr)
+    sites = load_config(arguments.config)
+    watermarks = WatermarkStore(arguments.state, arguments.watermark_size)
+
+    output = (
+        sys.stdout
+        if arguments.output == "-"
+        # pylint: disable-next=consider-using-with
+        else open(arguments.output, "a", encoding="utf-8")
+    )
+    runs = []
+    start = perf_counter()
+    try:
+        for run in run_sites(
+            sites, watermarks, workers=arguments.workers, per_host=arguments.per_host
+        ):
+            write_images(run, output)
+            if run.result is not None:
+                watermarks.update(
+                    run.name, (image.url_address for image in run.result.images)
+                )
+            runs.append(run)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    if arguments.stats:
+        print(format_stats(runs, perf_counter() - start), file=sys.stderr)
+    return 1 if any(run.error is not None for run in runs) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
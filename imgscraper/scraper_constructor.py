@@ -1,14 +1,90 @@
+from importlib import import_module
+from importlib.metadata import entry_points
+from inspect import signature
 from logging import getLogger
+from pathlib import Path
+from threading import Lock
+from typing import Any
+from weakref import WeakKeyDictionary, WeakValueDictionary
 
-from requests import Session
-
+from imgscraper.src.adaptive_depth import DepthPredictor
+from imgscraper.src.circuit_breaker import BREAKERS
 from imgscraper.src.core import ImageScraper
-from imgscraper.src.scrapers.bs4_scraper import Bs4Scraper
+from imgscraper.src.dns_cache import DNS_CACHE
+from imgscraper.src.models import ExtractionPlan
+from imgscraper.src.pagination import PaginationTemplateStore
+from imgscraper.src.scrapers.scraper import Scraper
+from imgscraper.src.seen_index import SeenUrlIndex
 
 log = getLogger(__name__)
-SCRAPERS = {
-    "bs4": Bs4Scraper,
+ENTRY_POINTS_GROUP = "imgscraper.scrapers"
+SCRAPERS: dict[str, str | type[Scraper]] = {
+    "bs4": "imgscraper.src.scrapers.bs4_scraper:Bs4Scraper",
+    "stream": "imgscraper.src.scrapers.stream_scraper:StreamScraper",
+    "feed": "imgscraper.src.scrapers.feed_scraper:FeedScraper",
+    "json": "imgscraper.src.scrapers.json_scraper:EmbeddedJsonScraper",
+    "auto": "imgscraper.src.scrapers.auto_scraper:AutoScraper",
+}
+TRANSPORTS = {
+    "requests": "imgscraper.src.transport:RequestsTransport",
+    "http2": "imgscraper.src.transport:Http2Transport",
 }
+# The transports created for every session, by name. The scrapers created with the
+# same session reuse them, so they share the connections and the downloaded pages.
+# Neither the sessions nor the transports are kept alive by the registry.
+_SESSION_TRANSPORTS: "WeakKeyDictionary[Any, WeakValueDictionary[str, Any]]" = (
+    WeakKeyDictionary()
+)
+_SESSION_TRANSPORTS_LOCK = Lock()
+
+
+def load_scraper(name: str) -> type[Scraper]:
+    """Returns the scraper class registered under the given name. The backends are
+    imported on first use. SCRAPERS may hold the class itself or a "module:Class"
+    string. Names missing in SCRAPERS are looked up in the "imgscraper.scrapers"
+    entry points group.
+
+    Args:
+        name: name of the tool.
+
+    Returns: the Scraper subclass."""
+    if name not in SCRAPERS:
+        for entry_point in entry_points(group=ENTRY_POINTS_GROUP):
+            if entry_point.name == name:
+                SCRAPERS[name] = entry_point.value
+                break
+        else:
+            raise ValueError("This tool is not supported.")
+
+    scraper = SCRAPERS[name]
+    if isinstance(scraper, str):
+        module_name, _, class_name = scraper.partition(":")
+        scraper = getattr(import_module(module_name), class_name)
+        SCRAPERS[name] = scraper
+    if not (isinstance(scraper, type) and issubclass(scraper, Scraper)):
+        raise ValueError(f"{name} is not a Scraper subclass.")
+    return scraper
+
+
+def _session_transport(name: str, session: Any) -> Any:
+    """Returns the transport of the given name created for the session. It is
+    created on first use and reused as long as any scraper holds it.
+
+    Args:
+        name: name of the transport in TRANSPORTS.
+        session: requests.Session object used by the transport.
+
+    Returns: the Transport object."""
+    if name not in TRANSPORTS:
+        raise ValueError("This transport is not supported.")
+    with _SESSION_TRANSPORTS_LOCK:
+        transports = _SESSION_TRANSPORTS.setdefault(session, WeakValueDictionary())
+        transport = transports.get(name)
+        if transport is None:
+            module_name, _, class_name = TRANSPORTS[name].partition(":")
+            transport = getattr(import_module(module_name), class_name)(session)
+            transports[name] = transport
+        return transport
 
 
 def create_scraper(
@@ -23,14 +99,93 @@ def create_scraper(
         pagination_class: a class of div or section element containing pagination
             URLs.
 
+    Kwargs:
+        pages_to_scan: how many pages should be scraped. Use "auto" to choose the
+            depth before every sync, based on the sync history of the site.
+        max_pages_to_scan: the depth ceiling used in the "auto" mode.
+        sync_history_path: JSON file in which the "auto" mode keeps the history.
+        depth_predictor: DepthPredictor object used in the "auto" mode. Allows
+            sharing one history between many scrapers.
+        parallel_pages: if True, the pagination URL template is learned from the
+            first page, and the following pages are fetched concurrently.
+        pagination_templates_path: JSON file in which the learned templates are kept.
+        pagination_store: PaginationTemplateStore object. Allows sharing the learned
+            templates between many scrapers.
+        max_workers: how many pages can be fetched at the same time.
+        container_selector: CSS selector of the elements containing images. Replaces
+            container_class.
+        pagination_selector: CSS selector of the element containing pagination URLs.
+            Replaces pagination_class.
+        image_attributes: attributes of the img element holding the image URL, in
+            order of preference, e.g. ("data-src", "src").
+        title_attribute: attribute of the img element holding the title.
+        scraper: name of the tool to be used. Use "auto" to choose the fastest
+            backend extracting the correct images for every site.
+        scraper_options: keyword arguments of the scraper constructor, e.g. the
+            field path spec of the "json" scraper or the store_path of the "auto"
+            scraper.
+        session: requests.Session object used to download the pages.
+        transport: "requests" (HTTP/1.1, default), "http2" or a Transport object.
+            The named transports are shared by the scrapers with the same session.
+        dns_cache: if True, socket.getaddrinfo of the process is replaced with the
+            DNS cache shared by all scrapers, whose entries expire after a fixed
+            time (30 seconds). A DnsCache object can be passed instead.
+        circuit_breaker: if True, the requests go through the per-host circuit
+            breakers shared by the process. A CircuitBreakerRegistry object can be
+            passed instead.
+        record_warc: if provided, every downloaded page is written to this WARC file.
+        replay_warc: WARC file (or list of files) serving the pages instead of the
+            network. Replaces transport.
+        replay_latency: delay in seconds of every replayed response.
+        seen_index_path: file of the seen URL index shared by many scrapers. The
+            images found in the index are dropped from the sync result.
+        seen_index_readonly: if True, the index is not updated after the sync (e.g.
+            in the worker processes).
+        seen_index: SeenUrlIndex object. Replaces seen_index_path.
+        synchronization_data_limit: how many of the newest images are kept in
+            synchronization_data. Unlimited by default.
+        bounded_memory: if True, the DOM of every page is decomposed right after the
+            extraction (if the scraper supports it), and the scraped URL addresses
+            are kept as fingerprints.
+        memory_limit: the RSS in bytes, above which the images are flushed to the
+            sink of start_sync and dropped from the sync result.
+
     Returns: the ImageScraper object."""
     pages_to_scan = kwargs.get("pages_to_scan", 1)
-    if not isinstance(pages_to_scan, int):
+    depth_predictor = None
+    if pages_to_scan == "auto":
+        depth_predictor = kwargs.get("depth_predictor")
+        if not isinstance(depth_predictor, DepthPredictor):
+            depth_predictor = DepthPredictor(
+                max_pages_to_scan=kwargs.get("max_pages_to_scan", 10),
+                history_path=kwargs.get("sync_history_path"),
+            )
+        pages_to_scan = depth_predictor.max_pages_to_scan
+    elif not isinstance(pages_to_scan, int):
         raise ValueError("The page_to_scan value should be INT type.")
 
-    scraper = kwargs.get("scraper", "bs4")
-    if scraper not in SCRAPERS:
-        raise ValueError("This tool is not supported.")
+    scraper = load_scraper(kwargs.get("scraper", "bs4"))
+    scraper_options = dict(kwargs.get("scraper_options", {}))
+    bounded_memory = kwargs.get("bounded_memory", False)
+    if bounded_memory and "decompose_pages" in signature(scraper).parameters:
+        scraper_options.setdefault("decompose_pages", True)
+
+    extraction_plan = ExtractionPlan(
+        container_selector=kwargs.get("container_selector", "." + container_class),
+        pagination_selector=kwargs.get("pagination_selector", "." + pagination_class),
+        image_attributes=tuple(kwargs.get("image_attributes", ("src",))),
+        title_attribute=kwargs.get("title_attribute", "alt"),
+    )
+
+    pagination_store = kwargs.get("pagination_store")
+    if kwargs.get("parallel_pages", False) and not isinstance(
+        pagination_store, PaginationTemplateStore
+    ):
+        pagination_store = PaginationTemplateStore(
+            kwargs.get("pagination_templates_path")
+        )
+
+    from requests import Session  # pylint: disable=import-outside-toplevel
 
     session = kwargs.get("session", None)
     if not isinstance(session, Session):
@@ -38,11 +193,59 @@ def create_scraper(
         session = Session()
         session.headers = {"User-Agent": "scrapper"}
 
+    transport = kwargs.get("transport", "requests")
+    if isinstance(transport, str):
+        transport = _session_transport(transport, session)
+
+    dns_cache = kwargs.get("dns_cache", False)
+    if dns_cache:
+        (DNS_CACHE if dns_cache is True else dns_cache).install()
+
+    circuit_breaker = kwargs.get("circuit_breaker", False)
+    if circuit_breaker:
+        # pylint: disable-next=import-outside-toplevel
+        from imgscraper.src.transport import CircuitBreakerTransport
+
+        transport = CircuitBreakerTransport(
+            transport, BREAKERS if circuit_breaker is True else circuit_breaker
+        )
+
+    if kwargs.get("replay_warc"):
+        # pylint: disable-next=import-outside-toplevel
+        from imgscraper.src.warc import ReplayTransport
+
+        paths = kwargs["replay_warc"]
+        transport = ReplayTransport(
+            *([paths] if isinstance(paths, (str, Path)) else paths),
+            latency=kwargs.get("replay_latency", 0),
+        )
+    if kwargs.get("record_warc"):
+        # pylint: disable-next=import-outside-toplevel
+        from imgscraper.src.warc import RecordingTransport
+
+        transport = RecordingTransport(transport, kwargs["record_warc"])
+
+    seen_index = kwargs.get("seen_index")
+    if not isinstance(seen_index, SeenUrlIndex) and kwargs.get("seen_index_path"):
+        seen_index = SeenUrlIndex(
+            kwargs["seen_index_path"],
+            readonly=kwargs.get("seen_index_readonly", False),
+        )
+
     return ImageScraper(
         website_url=website_url,
         container_class=container_class,
         pagination_class=pagination_class,
         pages_to_scan=pages_to_scan,
-        scraper=SCRAPERS[scraper](),
+        scraper=scraper(**scraper_options),
         session=session,
+        depth_predictor=depth_predictor,
+        pagination_store=pagination_store,
+        max_workers=kwargs.get("max_workers", 4),
+        extraction_plan=extraction_plan,
+        transport=transport,
+        seen_index=seen_index,
+        synchronization_data_limit=kwargs.get("synchronization_data_limit"),
+        bounded_memory=bounded_memory,
+        memory_limit=kwargs.get("memory_limit"),
     )
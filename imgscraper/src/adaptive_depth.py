@@ -0,0 +1,123 @@
+from logging import getLogger
+from math import ceil
+from pathlib import Path
+from threading import Lock
+
+from imgscraper.src.models import DepthDecision
+from imgscraper.src.storage import JsonStore
+
+log = getLogger(__name__)
+
+
+class DepthPredictor:
+    """Chooses how many pages should be scanned, based on the previous syncs of the
+    site.
+
+    For every run it remembers on which page the last_sync_data watermark was hit,
+    how many new images were found and how many images a full page contains. The next
+    run scans just enough pages to reach the watermark again, with a safety margin.
+    If the watermark was not reached, the depth is doubled. The depth never exceeds
+    max_pages_to_scan."""
+
+    def __init__(
+        self,
+        max_pages_to_scan: int = 10,
+        history_size: int = 20,
+        margin: int = 1,
+        history_path: str | Path | None = None,
+    ) -> None:
+        """Constructor.
+
+        Args:
+            max_pages_to_scan: hard ceiling of the crawl depth.
+            history_size: how many runs are remembered per site.
+            margin: how many pages are added on top of the predicted depth.
+            history_path: JSON file in which the history is persisted. If None, the
+                history lives only in memory."""
+        if max_pages_to_scan < 1:
+            raise ValueError("The max_pages_to_scan value should be greater than 0.")
+        self.max_pages_to_scan = max_pages_to_scan
+        self.history_size = history_size
+        self.margin = margin
+        self._store = JsonStore(history_path)
+        self._lock = Lock()
+
+    def history(self, site: str) -> list[dict[str, int | float | None]]:
+        return list(self._store.get(site, []))
+
+    def predict(self, site: str) -> DepthDecision:
+        """Returns the number of pages that should be scanned during the next sync.
+
+        Args:
+            site: the domain of the scraped website.
+
+        Returns: DepthDecision object containing the depth and the reason."""
+        history = self.history(site)
+        if not history:
+            return self._decision(self.max_pages_to_scan, "no sync history")
+
+        last_run = history[-1]
+        if last_run["watermark_page"] is None:
+            return self._decision(
+                int(last_run["pages_scanned"]) * 2,  # type: ignore[arg-type]
+                "watermark not reached during the last sync",
+            )
+
+        densities = [
+            run["images_per_page"] for run in history if run["images_per_page"]
+        ]
+        if densities:
+            images_per_page = sum(densities) / len(densities)  # type: ignore
+            new_images = max(int(run["new_images"]) for run in history)  # type: ignore
+            predicted = max(ceil((new_images + 1) / images_per_page), 1)
+            reason = (
+                f"up to {new_images} new images per sync, "
+                f"{images_per_page:.1f} images per page"
+            )
+        else:
+            predicted = max(
+                int(run["watermark_page"])  # type: ignore[arg-type]
+                for run in history
+                if run["watermark_page"] is not None
+            )
+            reason = f"watermark hit on page {predicted} at most"
+
+        return self._decision(predicted + self.margin, reason)
+
+    def record(
+        self,
+        site: str,
+        pages_scanned: int,
+        watermark_page: int | None,
+        images_per_page: list[int],
+    ) -> None:
+        """Saves the outcome of the sync.
+
+        Args:
+            site: the domain of the scraped website.
+            pages_scanned: how many pages have been scanned.
+            watermark_page: number of the page on which the last_sync_data watermark
+                was hit, or None if it was not.
+            images_per_page: number of new images found on every scanned page."""
+        full_pages = images_per_page[:-1] if watermark_page else images_per_page
+        full_pages = [count for count in full_pages if count > 0]
+        with self._lock:
+            history = self.history(site)
+            history.append(
+                {
+                    "pages_scanned": pages_scanned,
+                    "watermark_page": watermark_page,
+                    "new_images": sum(images_per_page),
+                    "images_per_page": (
+                        sum(full_pages) / len(full_pages) if full_pages else None
+                    ),
+                }
+            )
+            self._store.set(site, history[-self.history_size :])
+
+    def _decision(self, pages_to_scan: int, reason: str) -> DepthDecision:
+        pages_to_scan = min(max(pages_to_scan, 1), self.max_pages_to_scan)
+        log.debug("Predicted depth: %s (%s)", pages_to_scan, reason)
+        return DepthDecision(
+            pages_to_scan=pages_to_scan, reason=reason, ceiling=self.max_pages_to_scan
+        )
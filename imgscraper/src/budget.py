@@ -0,0 +1,87 @@
+from threading import Lock
+from time import monotonic
+from typing import Any
+
+from imgscraper.src.models import SyncBudget
+
+
+class BudgetExhausted(Exception):
+    """Raised when the sync runs out of time, requests or bytes."""
+
+    def __init__(self, message: str, url_address: str | None = None) -> None:
+        """Constructor.
+
+        Args:
+            message: description of the exceeded limit.
+            url_address: URL address of the page, which could not be downloaded."""
+        super().__init__(message)
+        self.url_address = url_address
+
+
+class BudgetTracker:
+    """Tracks the time, the requests and the bytes spent by a single sync."""
+
+    def __init__(self, budget: SyncBudget) -> None:
+        """Constructor.
+
+        Args:
+            budget: the limits of the sync."""
+        self.budget = budget
+        self.started = monotonic()
+        self.requests = 0
+        self.bytes = 0
+        self._lock = Lock()
+
+    def remaining_time(self) -> float | None:
+        if self.budget.timeout is None:
+            return None
+        return self.budget.timeout - (monotonic() - self.started)
+
+    def check(self) -> None:
+        """Raises BudgetExhausted, if any of the limits has been reached."""
+        self.check_transfer()
+        if (
+            self.budget.max_requests is not None
+            and self.requests >= self.budget.max_requests
+        ):
+            raise BudgetExhausted(
+                f"Request budget of {self.budget.max_requests} exceeded."
+            )
+
+    def check_transfer(self) -> None:
+        """Raises BudgetExhausted, if the time or the bytes have run out. Unlike
+        check(), the request which is being downloaded is allowed to finish."""
+        remaining_time = self.remaining_time()
+        if remaining_time is not None and remaining_time <= 0:
+            raise BudgetExhausted(f"Time budget of {self.budget.timeout}s exceeded.")
+        if self.budget.max_bytes is not None and self.bytes >= self.budget.max_bytes:
+            raise BudgetExhausted(f"Byte budget of {self.budget.max_bytes} exceeded.")
+
+    def start_request(self) -> None:
+        """Checks the budget and counts the request."""
+        with self._lock:
+            self.check()
+            self.requests += 1
+
+    def add_bytes(self, size: int) -> None:
+        with self._lock:
+            self.bytes += size
+
+    def request_timeout(self, timeout: Any = None) -> Any:
+        """Returns the request timeout limited by the remaining time.
+
+        Args:
+            timeout: the timeout requested by the caller. Tuples of the connect and
+                read timeouts are supported."""
+        remaining_time = self.remaining_time()
+        if remaining_time is None:
+            return timeout
+        remaining_time = max(remaining_time, 0.001)
+        if timeout is None:
+            return remaining_time
+        if isinstance(timeout, tuple):
+            return tuple(
+                remaining_time if value is None else min(value, remaining_time)
+                for value in timeout
+            )
+        return min(timeout, remaining_time)
@@ -0,0 +1,194 @@
+from collections import deque
+from logging import getLogger
+from threading import Lock
+from time import monotonic
+from typing import Callable
+from urllib.parse import urlsplit
+
+from imgscraper.src.models import HostHealth
+
+log = getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending the request to the host, which keeps failing."""
+
+    def __init__(self, host: str, retry_after: float) -> None:
+        """Constructor.
+
+        Args:
+            host: the host of the open circuit.
+            retry_after: seconds left until the next probe request is allowed."""
+        super().__init__(
+            f"Circuit of {host} is open. Next attempt in {retry_after:.1f}s."
+        )
+        self.host = host
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Health of a single host. The circuit opens after repeated failures or when
+    the error rate of the recent requests is too high. While it is open, the
+    requests fail immediately. After the recovery timeout a single probe request is
+    let through (half-open state): its success closes the circuit, its failure
+    opens it again."""
+
+    def __init__(
+        self,
+        host: str,
+        failure_threshold: int = 5,
+        error_rate_threshold: float = 0.5,
+        window: int = 20,
+        recovery_timeout: float = 30,
+        slow_call_threshold: float | None = None,
+        clock: Callable[[], float] = monotonic,
+    ) -> None:
+        """Constructor.
+
+        Args:
+            host: the host of the circuit.
+            failure_threshold: how many consecutive failures open the circuit.
+            error_rate_threshold: the share of failed requests in the window, which
+                opens the circuit.
+            window: how many recent requests are used to compute the error rate. The
+                error rate is not checked until the window is full.
+            recovery_timeout: seconds after which the open circuit lets the probe
+                request through.
+            slow_call_threshold: if provided, requests slower than that many seconds
+                are counted as failures.
+            clock: source of the time in seconds."""
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.recovery_timeout = recovery_timeout
+        self.slow_call_threshold = slow_call_threshold
+        self._clock = clock
+        self._lock = Lock()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._outcomes: deque[bool] = deque(maxlen=window)
+        self._requests = 0
+        self._failures = 0
+        self._consecutive_failures = 0
+        self._average_latency = 0.0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def before_call(self) -> None:
+        """Raises CircuitOpenError, if the request should not be sent."""
+        with self._lock:
+            if self._state == CLOSED:
+                return
+            retry_after = self._opened_at + self.recovery_timeout - self._clock()
+            if self._state == OPEN and retry_after <= 0:
+                log.info("Probing %s.", self.host)
+                self._state = HALF_OPEN
+                return
+            raise CircuitOpenError(self.host, max(retry_after, 0))
+
+    def record(self, success: bool, latency: float) -> None:
+        """Registers the outcome of the request.
+
+        Args:
+            success: False, if the request raised an error or the server failed.
+            latency: the duration of the request in seconds."""
+        if self.slow_call_threshold is not None and latency > self.slow_call_threshold:
+            success = False
+        with self._lock:
+            self._requests += 1
+            self._average_latency += (latency - self._average_latency) / min(
+                self._requests, 20
+            )
+            self._outcomes.append(success)
+            if success:
+                self._consecutive_failures = 0
+                if self._state == HALF_OPEN:
+                    log.info("Circuit of %s closed.", self.host)
+                    self._state = CLOSED
+                    self._outcomes.clear()
+                return
+
+            self._failures += 1
+            self._consecutive_failures += 1
+            if self._state == HALF_OPEN or self._should_open():
+                log.warning("Circuit of %s opened.", self.host)
+                self._state = OPEN
+                self._opened_at = self._clock()
+
+    def _should_open(self) -> bool:
+        if self._state != CLOSED:
+            return False
+        if self._consecutive_failures >= self.failure_threshold:
+            return True
+        return (
+            len(self._outcomes) == self._outcomes.maxlen
+            and self._error_rate() >= self.error_rate_threshold
+        )
+
+    def _error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    def health(self) -> HostHealth:
+        with self._lock:
+            retry_after = 0.0
+            if self._state == OPEN:
+                retry_after = max(
+                    self._opened_at + self.recovery_timeout - self._clock(), 0
+                )
+            return HostHealth(
+                host=self.host,
+                state=self._state,
+                requests=self._requests,
+                failures=self._failures,
+                consecutive_failures=self._consecutive_failures,
+                error_rate=self._error_rate(),
+                average_latency=self._average_latency,
+                retry_after=retry_after,
+            )
+
+
+class CircuitBreakerRegistry:
+    """Circuit breakers of all hosts. The module-level BREAKERS registry is shared by
+    all scrapers of the process."""
+
+    def __init__(self, **options: float | int | None) -> None:
+        """Constructor.
+
+        Args:
+            options: CircuitBreaker arguments used for every host."""
+        self.options = options
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._lock = Lock()
+
+    def get(self, url_address: str) -> CircuitBreaker:
+        """Returns the circuit breaker of the URL host, creating it if necessary."""
+        host = urlsplit(url_address).netloc or url_address
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = CircuitBreaker(host, **self.options)  # type: ignore[arg-type]
+                self._breakers[host] = breaker
+            return breaker
+
+    def health(self) -> dict[str, HostHealth]:
+        """Returns the health of every host, e.g. for the monitoring."""
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {breaker.host: breaker.health() for breaker in breakers}
+
+    def reset(self) -> None:
+        """Forgets the state of all hosts."""
+        with self._lock:
+            self._breakers.clear()
+
+
+BREAKERS = CircuitBreakerRegistry()
@@ -1,15 +1,45 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from itertools import count
 from logging import getLogger
+from pathlib import Path
+from threading import Lock
+from typing import TYPE_CHECKING, Iterator
 
-from requests import Session
-
-from imgscraper.src.models import Image, ImagesSource
+from imgscraper.src.adaptive_depth import DepthPredictor
+from imgscraper.src.budget import BudgetExhausted, BudgetTracker
+from imgscraper.src.circuit_breaker import CircuitOpenError
+from imgscraper.src.memory import rss_bytes
+from imgscraper.src.models import (
+    ExtractionPlan,
+    Image,
+    ImagesSource,
+    PrewarmResult,
+    SyncBudget,
+    SyncResult,
+)
+from imgscraper.src.pagination import PaginationTemplate, PaginationTemplateStore
+from imgscraper.src.profiling import ProfileMode, SyncProfiler
 from imgscraper.src.scrapers.scraper import Scraper
+from imgscraper.src.seen_index import SeenUrlIndex, UrlFingerprints
+
+if TYPE_CHECKING:
+    from requests import Session
+
+    from imgscraper.src.freshness import FreshnessProbe
+    from imgscraper.src.sinks import Sink, SinkWriter
+    from imgscraper.src.transport import Transport
 
 log = getLogger(__name__)
 
 
 class ImageScraper:
-    """Image information retrieval tool."""
+    """Image information retrieval tool.
+
+    image_source holds the configuration of the website and is never changed by the
+    sync. Every start_sync call crawls its own copy of it, so one instance can run
+    many syncs, also concurrently from many threads. The result of every sync is
+    returned as a SyncResult object."""
 
     def __init__(
         self,
@@ -18,7 +48,16 @@ class ImageScraper:
         pagination_class: str,
         pages_to_scan: int,
         scraper: Scraper,
-        session: Session,
+        session: "Session",
+        depth_predictor: DepthPredictor | None = None,
+        pagination_store: PaginationTemplateStore | None = None,
+        max_workers: int = 4,
+        extraction_plan: ExtractionPlan | None = None,
+        transport: "Transport | None" = None,
+        seen_index: SeenUrlIndex | None = None,
+        synchronization_data_limit: int | None = None,
+        bounded_memory: bool = False,
+        memory_limit: int | None = None,
     ) -> None:
         """Constructor.
 
@@ -28,48 +67,432 @@ class ImageScraper:
             pagination_class: a class of div or section element containing pagination
                 URLs.
             pages_to_scan: how many pages should be scraped.
-            scraper: tool to be used."""
+            scraper: tool to be used.
+            depth_predictor: if provided, pages_to_scan is chosen before every sync
+                based on the previous syncs of the site.
+            pagination_store: if provided, the pagination URL template is learned from
+                the first page, and the following pages are fetched concurrently.
+            max_workers: how many pages can be fetched at the same time.
+            extraction_plan: selectors and attributes used to find the images. By
+                default, it is built from container_class and pagination_class.
+            transport: the Transport object used to download the pages. By default,
+                the requests transport using the session.
+            seen_index: if provided, the images seen by the previous syncs (of any
+                site) are dropped from the result, and the new images are added to
+                the index after the sync.
+            synchronization_data_limit: if provided, synchronization_data keeps only
+                that many of the newest images, so the long-running scrapers do not
+                grow without bound.
+            bounded_memory: if True, the scraped URL addresses of the sync are kept
+                as 64-bit fingerprints. The DOM teardown is enabled on the scraper.
+            memory_limit: the RSS in bytes, above which the images handed to the sink
+                are written at once and dropped from the sync result. Used only
+                when start_sync is called with a sink."""
         self.image_source = ImagesSource(
             current_url_address=website_url,
             container_class=container_class,
             pagination_class=pagination_class,
             pages_to_scan=pages_to_scan,
             session=session,
+            extraction_plan=extraction_plan,
+            transport=transport,
         )
         self.scraper = scraper
+        self.depth_predictor = depth_predictor
+        self.pagination_store = pagination_store
+        self.max_workers = max_workers
+        self.seen_index = seen_index
+        self.synchronization_data_limit = synchronization_data_limit
+        self.bounded_memory = bounded_memory
+        self.memory_limit = memory_limit
         self._synchronization_data: list[Image] = []
+        self._synchronized_images: set[Image] = set()
+        self._synchronization_lock = Lock()
+        self._runs = count(1)
+        self._freshness_probe: "FreshnessProbe | None" = None
 
-    def start_sync(self, last_sync_data: tuple[str] | None = None) -> None:
+    def start_sync(
+        self,
+        last_sync_data: tuple[str, ...] | None = None,
+        profile: ProfileMode | None = None,
+        profile_dir: str | Path | None = None,
+        budget: SyncBudget | None = None,
+        resume_url: str | None = None,
+        sink: "Sink | None" = None,
+        resume_scanned: bool = False,
+    ) -> SyncResult:
         """Initiates the synchronization process, collecting the data of the images
         searched according to the provided guidelines.
 
         Args:
-            last_sync_data: URLs of recently downloaded images (img_src)."""
-        images_data: list[Image] = []
-        scraped_urls = {
-            self.image_source.current_url_address,
-        }
+            last_sync_data: URLs of recently downloaded images (img_src).
+            profile: "cprofile" or "sampling" to profile the sync. The collapsed
+                stacks are saved in profile_dir and the hotspots are added to the
+                result.
+            profile_dir: directory of the profiles. Temporary directory by default.
+            budget: limits of the time, the requests and the bytes of the sync. When
+                any of them is reached, the images scraped so far are returned, with
+                budget_exhausted set and resume_url of the first page not scanned.
+                If the budget ran out while looking for the next page, resume_url is
+                the last scanned page and resume_scanned is set.
+            resume_url: URL address of the page to start from, instead of the website
+                URL. Used to continue the sync interrupted by the budget.
+            sink: if provided, the images of every page are written to the sink in
+                batches while the crawl goes on. The sink is not closed. If the
+                memory_limit is exceeded, the images are flushed to the sink, and the
+                result holds only the images scraped after the last flush.
+            resume_scanned: if True, the resume_url page has been scanned already,
+                and it is downloaded only to find the next page.
 
-        while self.image_source.pages_to_scan > 0:
-            images, duplication_flag = self.scraper.get_images_data(
-                self.image_source, last_sync_data
+        Returns: SyncResult object containing the scraped images and the details of
+            the crawl."""
+        thread_name_prefix = f"imgscraper-{id(self)}-{next(self._runs)}"
+        if profile is None:
+            return self._sync(
+                last_sync_data,
+                thread_name_prefix,
+                budget,
+                resume_url,
+                sink,
+                resume_scanned,
             )
-            images_data.extend(images)
 
-            if duplication_flag:
-                self.image_source.pages_to_scan = 0
-            else:
-                self.image_source.pages_to_scan -= 1
+        profiler = SyncProfiler(
+            mode=profile,
+            site=self.image_source.domain,
+            output_dir=profile_dir,
+            thread_name_prefix=thread_name_prefix,
+        )
+        with profiler:
+            result = self._sync(
+                last_sync_data,
+                thread_name_prefix,
+                budget,
+                resume_url,
+                sink,
+                resume_scanned,
+            )
+        result.profile = profiler.report()
+        return result
 
-            if self.image_source.pages_to_scan > 0:
-                next_page_data = self.scraper.find_next_page(
-                    img_source=self.image_source,
-                    scraped_urls=scraped_urls,
+    def prewarm(self) -> PrewarmResult | None:
+        """Resolves the host of the website and opens the keep-alive connection, so
+        the first page fetch of the next sync skips the setup latency. Should be
+        called shortly before the sync is due, as the idle connections are closed by
+        the servers after a while.
+
+        Returns: PrewarmResult object with the setup timings or None, if the
+            transport does not support pre-warming."""
+        return self.image_source.transport.prewarm(  # type: ignore[union-attr]
+            self.image_source.current_url_address
+        )
+
+    def has_new_content(
+        self, last_sync_data: tuple[str, ...] | None = None, containers: int = 1
+    ) -> bool:
+        """Checks whether the website has images newer than last_sync_data, without
+        the full sync. Only the first containers of the first page are read, and the
+        pages found unchanged before are requested conditionally (If-None-Match,
+        If-Modified-Since). If the selectors cannot be streamed, the first page is
+        scanned by the scraper, still without the pagination.
+
+        Args:
+            last_sync_data: URLs of recently downloaded images (img_src).
+            containers: how many containers of the page are checked.
+
+        Returns: True if start_sync should be called."""
+        if self._freshness_probe is None:
+            # pylint: disable-next=import-outside-toplevel
+            from imgscraper.src.freshness import FreshnessProbe
+
+            with self._synchronization_lock:
+                if self._freshness_probe is None:
+                    self._freshness_probe = FreshnessProbe()
+        return self._freshness_probe.has_new_content(
+            self.image_source, last_sync_data, self.scraper, containers
+        )
+
+    def _sync(
+        self,
+        last_sync_data: tuple[str, ...] | None = None,
+        thread_name_prefix: str = "imgscraper",
+        budget: SyncBudget | None = None,
+        resume_url: str | None = None,
+        sink: "Sink | None" = None,
+        resume_scanned: bool = False,
+    ) -> SyncResult:
+        image_source = replace(self.image_source)
+        if resume_url is not None:
+            image_source.current_url_address = resume_url
+        tracker = None
+        if budget is not None:
+            # pylint: disable-next=import-outside-toplevel
+            from imgscraper.src.transport import BudgetedTransport
+
+            tracker = BudgetTracker(budget)
+            image_source.transport = BudgetedTransport(
+                image_source.transport, tracker  # type: ignore[arg-type]
+            )
+        depth_decision = None
+        if self.depth_predictor is not None:
+            depth_decision = self.depth_predictor.predict(image_source.domain)
+            image_source.pages_to_scan = depth_decision.pages_to_scan
+
+        images_data: list[Image] = []
+        images_per_page: list[int] = []
+        duplication_found = False
+        scraped_urls = {image_source.current_url_address}
+        if self.bounded_memory:
+            scraped_urls = UrlFingerprints(scraped_urls)  # type: ignore[assignment]
+        template = None
+        if self.pagination_store is not None and resume_url is None:
+            template = self.pagination_store.get(image_source.domain)
+
+        writer = None
+        if sink is not None:
+            # pylint: disable-next=import-outside-toplevel
+            from imgscraper.src.sinks import SinkWriter
+
+            writer = SinkWriter(sink, thread_name=f"{thread_name_prefix}-sink")
+
+        exhausted_url = None
+        # Set while the next page of the already scanned page is looked for.
+        finding_next_page = False
+        images_flushed = 0
+        try:
+            if resume_url is not None and resume_scanned:
+                finding_next_page = True
+                (
+                    image_source.current_url_address,
+                    scraped_urls,
+                ) = self.scraper.find_next_page(image_source, scraped_urls)
+                finding_next_page = False
+            while image_source.pages_to_scan > 0:
+                if tracker is not None:
+                    tracker.check()
+                images, duplication_flag = self.scraper.get_images_data(
+                    image_source, last_sync_data
+                )
+                duplication_found = self._register_page(
+                    image_source,
+                    images,
+                    duplication_flag,
+                    images_data,
+                    images_per_page,
+                    writer,
                 )
-                self.image_source.current_url_address, scraped_urls = next_page_data
+                images_flushed += self._release_memory(writer, images_data)
+                first_page = len(images_per_page) == 1
 
+                if first_page and template and image_source.pages_to_scan > 0:
+                    for url_address, images, duplication_flag in self._fan_out(
+                        image_source,
+                        template,
+                        images,
+                        last_sync_data,
+                        thread_name_prefix,
+                    ):
+                        image_source.current_url_address = url_address
+                        scraped_urls.add(url_address)
+                        duplication_found = self._register_page(
+                            image_source,
+                            images,
+                            duplication_flag,
+                            images_data,
+                            images_per_page,
+                            writer,
+                        )
+                        images_flushed += self._release_memory(writer, images_data)
+
+                if image_source.pages_to_scan > 0:
+                    finding_next_page = True
+                    next_page_data = self.scraper.find_next_page(
+                        img_source=image_source,
+                        scraped_urls=scraped_urls,
+                    )
+                    finding_next_page = False
+                    image_source.current_url_address, scraped_urls = next_page_data
+                    if first_page and self.pagination_store is not None:
+                        template = self.pagination_store.learn(
+                            image_source.domain,
+                            image_source.current_url_address,
+                        )
+        except BudgetExhausted as error:
+            # Some scrapers download the scanned page again to find the next one.
+            # Then the scanned page is the resume point, marked as scanned.
+            if finding_next_page:
+                exhausted_url = image_source.current_url_address
+            else:
+                exhausted_url = error.url_address or image_source.current_url_address
+            log.warning("%s Sync interrupted at %s.", error, exhausted_url)
+        finally:
+            if writer is not None:
+                writer.close()
+
+        watermark_page = len(images_per_page) if duplication_found else None
         log.info("Synchronization completed. Scraped urls: %s", scraped_urls)
+        if (
+            self.depth_predictor is not None
+            and last_sync_data
+            and exhausted_url is None
+        ):
+            self.depth_predictor.record(
+                site=image_source.domain,
+                pages_scanned=len(images_per_page),
+                watermark_page=watermark_page,
+                images_per_page=images_per_page,
+            )
+
+        if self.seen_index is not None and images_data and writer is None:
+            images_data = self._drop_seen_images(images_data)
+
+        result = SyncResult(
+            images=list(images_data),
+            pages_scanned=len(images_per_page),
+            watermark_page=watermark_page,
+            depth_decision=depth_decision,
+            budget_exhausted=exhausted_url is not None,
+            resume_url=exhausted_url,
+            resume_scanned=finding_next_page,
+            images_flushed=images_flushed,
+        )
         self.synchronization_data = images_data
+        return result
+
+    def _drop_seen_images(self, images: list[Image]) -> list[Image]:
+        """Removes the images present in the seen URL index with a single batch query
+        and, unless the index is read-only, adds the remaining ones to it.
+
+        Returns: list of the images not seen before."""
+        seen = self.seen_index.contains_many(  # type: ignore[union-attr]
+            image.url_address for image in images
+        )
+        new_images = [image for image, is_seen in zip(images, seen) if not is_seen]
+        log.debug(
+            "%s images found in the seen URL index.", len(images) - len(new_images)
+        )
+        if not self.seen_index.readonly:  # type: ignore[union-attr]
+            self.seen_index.add_many(  # type: ignore[union-attr]
+                image.url_address for image in new_images
+            )
+        return new_images
+
+    def _register_page(
+        self,
+        image_source: ImagesSource,
+        images: list[Image],
+        duplication_flag: bool,
+        images_data: list[Image],
+        images_per_page: list[int],
+        writer: "SinkWriter | None" = None,
+    ) -> bool:
+        """Adds the images of the scanned page to the sync data and updates the number
+        of pages left to scan. If the sink writer is provided, the images are passed
+        to it, filtered by the seen URL index page by page.
+
+        Returns: the duplication flag."""
+        images_per_page.append(len(images))
+        if writer is not None:
+            if self.seen_index is not None and images:
+                images = self._drop_seen_images(images)
+            writer.put(images)
+        images_data.extend(images)
+        if duplication_flag:
+            image_source.pages_to_scan = 0
+        else:
+            image_source.pages_to_scan -= 1
+        return duplication_flag
+
+    def _release_memory(
+        self, writer: "SinkWriter | None", images_data: list[Image]
+    ) -> int:
+        """If the RSS exceeds memory_limit, writes the images handed to the sink and
+        drops them from the sync data.
+
+        Returns: number of the dropped images."""
+        if writer is None or self.memory_limit is None or not images_data:
+            return 0
+        rss = rss_bytes()
+        if rss <= self.memory_limit:
+            return 0
+        log.info("RSS of %s bytes over the memory limit. Flushing the sink.", rss)
+        writer.flush()
+        flushed = len(images_data)
+        images_data.clear()
+        return flushed
+
+    def _fan_out(
+        self,
+        image_source: ImagesSource,
+        template: PaginationTemplate,
+        first_page_images: list[Image],
+        last_sync_data: tuple[str, ...] | None = None,
+        thread_name_prefix: str = "imgscraper",
+    ) -> Iterator[tuple[str, list[Image], bool]]:
+        """Fetches the pages following the first one concurrently, using the learned
+        pagination template. Stops at the first page containing last_sync_data.
+        A page past the end of the site (an error, a page without images or a copy of
+        the previous page) stops the fan-out, and the crawl continues by walking the
+        DOM. Only a copy of the first page proves that the template ignores the page
+        number, so only then the template is forgotten. If the budget runs out or the
+        circuit of the host opens, the pages before it are returned and the error is
+        raised.
+
+        Args:
+            image_source: the crawl state of the current sync.
+            template: the pagination template of the website.
+            first_page_images: images found on the first page.
+            last_sync_data: URLs of recently downloaded images (img_src).
+            thread_name_prefix: name prefix of the fetching threads.
+
+        Returns: tuples containing the URL address, the images and the duplication
+            flag of every valid page, in order."""
+        url_addresses = [
+            template.url_address(page_number)
+            for page_number in range(2, image_source.pages_to_scan + 2)
+        ]
+        with ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(url_addresses)),
+            thread_name_prefix=thread_name_prefix,
+        ) as executor:
+            futures = [
+                executor.submit(
+                    self.scraper.get_images_data,
+                    replace(image_source, current_url_address=url_address),
+                    last_sync_data,
+                )
+                for url_address in url_addresses
+            ]
+            previous_images = first_page_images
+            for url_address, future in zip(url_addresses, futures):
+                try:
+                    images, duplication_flag = future.result()
+                except (BudgetExhausted, CircuitOpenError) as error:
+                    for pending_future in futures:
+                        pending_future.cancel()
+                    if isinstance(error, BudgetExhausted):
+                        error.url_address = error.url_address or url_address
+                    raise
+                except Exception:  # pylint: disable=broad-exception-caught
+                    log.exception("Unable to scrape %s.", url_address)
+                    images, duplication_flag = [], False
+
+                wrong_template = bool(images) and images == first_page_images
+                past_the_end = (not images and not duplication_flag) or (
+                    images == previous_images
+                )
+                if wrong_template and self.pagination_store is not None:
+                    self.pagination_store.forget(image_source.domain)
+                if wrong_template or past_the_end or duplication_flag:
+                    for pending_future in futures:
+                        pending_future.cancel()
+                if wrong_template or past_the_end:
+                    break
+
+                yield url_address, images, duplication_flag
+                if duplication_flag:
+                    break
+                previous_images = images
 
     @property
     def synchronization_data(self) -> list[Image]:
@@ -83,15 +506,22 @@ class ImageScraper:
             )
 
         images.reverse()
-        for image in images:
-            if image in self._synchronization_data:
-                continue
+        with self._synchronization_lock:
+            for image in images:
+                if not isinstance(image, Image):
+                    raise AttributeError(
+                        f"Only Image objects can appear in the sync data.\n"
+                        f"Invalid element: {image}.\n"
+                        f"Invalid element type: {type(image)}."
+                    )
+                if image not in self._synchronized_images:
+                    self._synchronization_data.append(image)
+                    self._synchronized_images.add(image)
 
-            if isinstance(image, Image):
-                self._synchronization_data.append(image)
-            else:
-                raise AttributeError(
-                    f"Only Image objects can appear in the sync data.\n"
-                    f"Invalid element: {image}.\n"
-                    f"Invalid element type: {type(image)}."
+            limit = self.synchronization_data_limit
+            if limit is not None and len(self._synchronization_data) > limit:
+                oldest = len(self._synchronization_data) - limit
+                self._synchronized_images.difference_update(
+                    self._synchronization_data[:oldest]
                 )
+                del self._synchronization_data[:oldest]
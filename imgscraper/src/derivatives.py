@@ -0,0 +1,278 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from hashlib import sha1
+from importlib.util import find_spec
+from io import BytesIO
+from logging import getLogger
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable, Iterable, Iterator
+
+from requests import Session
+
+from imgscraper.src.models import DerivativeResult, DerivativeSpec, Image
+from imgscraper.src.sinks import Sink
+
+log = getLogger(__name__)
+
+DEFAULT_SPECS = (DerivativeSpec("thumbnail"),)
+_SESSION: Session | None = None
+
+
+def _init_worker(max_pixels: int, headers: dict[str, str]) -> None:
+    """Makes Pillow refuse the decompression bombs and opens the Session of the
+    worker."""
+    # pylint: disable-next=import-outside-toplevel
+    from PIL import Image as PilImage
+
+    global _SESSION  # pylint: disable=global-statement
+    PilImage.MAX_IMAGE_PIXELS = max_pixels
+    _SESSION = Session()
+    _SESSION.headers.update(headers)
+
+
+def _generate(
+    url_address: str,
+    targets: list[tuple[DerivativeSpec, str]],
+    max_pixels: int,
+    max_bytes: int,
+    timeout: float,
+) -> tuple[float, float, float]:
+    """Downloads the image and writes its derivatives. Runs in the worker process.
+
+    Args:
+        url_address: URL address of the image.
+        targets: the missing derivatives and their paths.
+        max_pixels: the largest accepted image (width * height).
+        max_bytes: the largest accepted image file.
+        timeout: the request timeout in seconds.
+
+    Returns: the download, decode and encode times in seconds."""
+    # pylint: disable-next=import-outside-toplevel
+    from PIL import Image as PilImage
+
+    start = perf_counter()
+    data = bytearray()
+    session = _SESSION or Session()
+    with session.get(url_address, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            data += chunk
+            if len(data) > max_bytes:
+                raise ValueError(f"{url_address} is larger than {max_bytes} bytes.")
+    download_time = perf_counter() - start
+
+    start = perf_counter()
+    with PilImage.open(BytesIO(data)) as picture:
+        # Pillow only warns about the images up to twice MAX_IMAGE_PIXELS.
+        width, height = picture.size
+        if width * height > max_pixels:
+            raise PilImage.DecompressionBombError(
+                f"{url_address} has {width * height} pixels, "
+                f"more than {max_pixels}."
+            )
+        sizes = [spec.size for spec, _ in targets if spec.size is not None]
+        if len(sizes) == len(targets):
+            # JPEG images are decoded at the smallest scale covering all the sizes.
+            picture.draft(
+                picture.mode,
+                (max(width for width, _ in sizes), max(height for _, height in sizes)),
+            )
+        picture.load()
+        decode_time = perf_counter() - start
+
+        start = perf_counter()
+        for spec, path in targets:
+            derivative = picture.copy()
+            if spec.size is not None:
+                derivative.thumbnail(spec.size)
+            if spec.format.upper() == "JPEG" and derivative.mode not in ("RGB", "L"):
+                derivative = derivative.convert("RGB")
+            tmp_path = Path(path + ".tmp")
+            tmp_path.parent.mkdir(parents=True, exist_ok=True)
+            derivative.save(tmp_path, format=spec.format, quality=spec.quality)
+            tmp_path.replace(path)
+    return download_time, decode_time, perf_counter() - start
+
+
+class DerivativePool:
+    """Generates the derivatives (thumbnails, re-encodes) of the scraped images on a
+    process pool. Requires the optional Pillow dependency.
+
+    The derivatives are kept in output_dir/<spec name>/, and the images whose
+    derivatives are already there are not downloaded again. The memory of the
+    workers is bounded by the decoded image size limit, by decoding the JPEG images
+    at reduced scale, and by replacing the workers after max_tasks_per_child
+    images."""
+
+    def __init__(
+        self,
+        output_dir: str | Path,
+        specs: Iterable[DerivativeSpec] = DEFAULT_SPECS,
+        processes: int | None = None,
+        max_pixels: int = 50_000_000,
+        max_bytes: int = 50 * 1024 * 1024,
+        timeout: float = 30,
+        max_tasks_per_child: int = 100,
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        """Constructor.
+
+        Args:
+            output_dir: the directory of the derivative cache.
+            specs: the generated derivatives.
+            processes: number of the worker processes. By default, the CPU count.
+            max_pixels: the largest accepted image (width * height).
+            max_bytes: the largest accepted image file.
+            timeout: the request timeout in seconds.
+            max_tasks_per_child: after how many images the worker is replaced.
+            headers: headers of the image requests, e.g. User-Agent."""
+        if find_spec("PIL") is None:
+            raise ImportError(
+                "DerivativePool requires Pillow. Install imgscraper[thumbnails]."
+            )
+        self.output_dir = Path(output_dir)
+        self.specs = tuple(specs)
+        self.processes = processes or os.cpu_count() or 1
+        self.max_pixels = max_pixels
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.max_tasks_per_child = max_tasks_per_child
+        self.headers = headers or {}
+        self._executor: ProcessPoolExecutor | None = None
+
+    def paths(self, image: Image) -> dict[str, Path]:
+        """Returns the paths of the derivatives of the image by spec name."""
+        digest = sha1(image.url_address.encode(), usedforsecurity=False).hexdigest()
+        return {
+            spec.name: self.output_dir / spec.name / (digest + spec.extension)
+            for spec in self.specs
+        }
+
+    def process(self, images: Iterable[Image]) -> Iterator[DerivativeResult]:
+        """Generates the missing derivatives of the images. At most two images per
+        worker are in flight, so the images are consumed lazily.
+
+        Args:
+            images: the Image objects.
+
+        Returns: iterator of DerivativeResult objects, in order of completion."""
+        pending: dict[
+            Future[tuple[float, float, float]], tuple[Image, dict[str, Path]]
+        ] = {}
+        for image in images:
+            paths = self.paths(image)
+            targets = [
+                (spec, str(paths[spec.name]))
+                for spec in self.specs
+                if not paths[spec.name].exists()
+            ]
+            if not targets:
+                yield self._result(image, paths, cached=True)
+                continue
+
+            if len(pending) >= 2 * self.processes:
+                yield from self._completed(pending, return_when=FIRST_COMPLETED)
+            future = self._pool().submit(
+                _generate,
+                image.url_address,
+                targets,
+                self.max_pixels,
+                self.max_bytes,
+                self.timeout,
+            )
+            pending[future] = (image, paths)
+        yield from self._completed(pending)
+
+    def _completed(
+        self,
+        pending: dict[
+            Future[tuple[float, float, float]], tuple[Image, dict[str, Path]]
+        ],
+        **kwargs: Any,
+    ) -> Iterator[DerivativeResult]:
+        done, _ = wait(pending, **kwargs)
+        for future in done:
+            image, paths = pending.pop(future)
+            try:
+                download_time, decode_time, encode_time = future.result()
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                log.warning("Derivatives of %s failed: %r", image.url_address, error)
+                yield self._result(image, paths, error=repr(error))
+                continue
+            yield self._result(
+                image,
+                paths,
+                download_time=download_time,
+                decode_time=decode_time,
+                encode_time=encode_time,
+            )
+
+    @staticmethod
+    def _result(
+        image: Image, paths: dict[str, Path], **kwargs: Any
+    ) -> DerivativeResult:
+        return DerivativeResult(
+            image=image,
+            paths={name: str(path) for name, path in paths.items()},
+            **kwargs,
+        )
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                initializer=_init_worker,
+                initargs=(self.max_pixels, self.headers),
+                max_tasks_per_child=self.max_tasks_per_child,
+            )
+        return self._executor
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self) -> "DerivativePool":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+
+class DerivativeSink(Sink):
+    """Sink generating the derivatives of the scraped images while the crawl goes
+    on. The results are passed to the callback, e.g. to log the timings."""
+
+    def __init__(
+        self,
+        pool: DerivativePool,
+        callback: Callable[[DerivativeResult], None] | None = None,
+        **kwargs,
+    ) -> None:
+        """Constructor.
+
+        Args:
+            pool: the DerivativePool object.
+            callback: the function called with every DerivativeResult.
+            kwargs: the Sink options."""
+        super().__init__(**kwargs)
+        self.pool = pool
+        self.callback = callback
+        self.generated = 0
+        self.cached = 0
+        self.failed = 0
+
+    def write_batch(self, images: list[Image]) -> None:
+        for result in self.pool.process(images):
+            if result.error is not None:
+                self.failed += 1
+            elif result.cached:
+                self.cached += 1
+            else:
+                self.generated += 1
+            if self.callback is not None:
+                self.callback(result)
+
+    def close(self) -> None:
+        self.pool.close()
@@ -0,0 +1,125 @@
+import socket
+from ipaddress import ip_address
+from logging import getLogger
+from threading import Lock
+from time import monotonic, perf_counter
+from typing import Any
+
+from imgscraper.src.models import DnsStats
+
+log = getLogger(__name__)
+
+AddrInfo = list[tuple[Any, ...]]
+
+
+def _is_ip_address(host: str) -> bool:
+    try:
+        ip_address(host.strip("[]"))
+    except ValueError:
+        return False
+    return True
+
+
+class DnsCache:
+    """In-process cache of the resolved host addresses. getaddrinfo does not expose
+    the TTLs of the DNS records, so the entries expire after the fixed ttl, which is
+    short by default to follow the hosts changing their addresses. Every miss costs
+    a single lookup. The IP addresses and localhost are not cached.
+
+    install() replaces socket.getaddrinfo, so every connection of the process (also
+    the ones opened by requests and httpx) uses the cache."""
+
+    def __init__(
+        self,
+        ttl: float = 30,
+        max_entries: int = 4096,
+    ) -> None:
+        """Constructor.
+
+        Args:
+            ttl: fixed lifetime of the entries in seconds, regardless of the TTLs of
+                the DNS records.
+            max_entries: the limit of the cached lookups. The oldest entries are
+                removed first."""
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: dict[tuple[Any, ...], tuple[float, AddrInfo]] = {}
+        self._lock = Lock()
+        self._getaddrinfo = socket.getaddrinfo
+        self._installed = False
+        self._hits = 0
+        self._misses = 0
+        self._lookup_time = 0.0
+
+    def getaddrinfo(
+        self,
+        host: Any,
+        port: Any,
+        family: int = 0,
+        type: int = 0,  # pylint: disable=redefined-builtin
+        proto: int = 0,
+        flags: int = 0,
+    ) -> AddrInfo:
+        """socket.getaddrinfo with the cache."""
+        if not isinstance(host, str) or host == "localhost" or _is_ip_address(host):
+            return self._getaddrinfo(host, port, family, type, proto, flags)
+
+        key = (host.lower(), port, family, type, proto, flags)
+        now = monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._hits += 1
+                return entry[1]
+
+        start = perf_counter()
+        addresses = self._getaddrinfo(host, port, family, type, proto, flags)
+        lookup_time = perf_counter() - start
+        with self._lock:
+            self._misses += 1
+            self._lookup_time += lookup_time
+            self._entries.pop(key, None)
+            self._entries[key] = (monotonic() + self.ttl, addresses)
+            while len(self._entries) > self.max_entries:
+                del self._entries[next(iter(self._entries))]
+        log.debug("%s resolved in %.3fs.", host, lookup_time)
+        return addresses
+
+    def stats(self) -> DnsStats:
+        """Returns the counters of the cache. The saved time is estimated as the
+        number of hits times the average lookup time."""
+        with self._lock:
+            average = self._lookup_time / self._misses if self._misses else 0.0
+            return DnsStats(
+                hits=self._hits,
+                misses=self._misses,
+                lookup_time=self._lookup_time,
+                saved_time=self._hits * average,
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def install(self) -> "DnsCache":
+        """Replaces socket.getaddrinfo with the cached lookup."""
+        if not self._installed:
+            self._getaddrinfo = socket.getaddrinfo
+            socket.getaddrinfo = self.getaddrinfo  # type: ignore[assignment]
+            self._installed = True
+        return self
+
+    def uninstall(self) -> None:
+        """Restores the original socket.getaddrinfo."""
+        if self._installed:
+            socket.getaddrinfo = self._getaddrinfo  # type: ignore[assignment]
+            self._installed = False
+
+    def __enter__(self) -> "DnsCache":
+        return self.install()
+
+    def __exit__(self, *args: object) -> None:
+        self.uninstall()
+
+
+DNS_CACHE = DnsCache()
@@ -0,0 +1,121 @@
+import codecs
+import re
+from logging import getLogger
+from threading import Lock
+from typing import TYPE_CHECKING, Mapping
+
+if TYPE_CHECKING:
+    from requests import Response
+
+log = getLogger(__name__)
+
+DEFAULT_ENCODING = "utf-8"
+SNIFF_SIZE = 4096
+_META_CHARSET = re.compile(
+    rb"""<meta[^>]+?charset\s*=\s*["']?\s*([a-zA-Z0-9_:.+-]+)""", re.IGNORECASE
+)
+
+
+def normalize_encoding(name: str | None) -> str | None:
+    """Returns the canonical Python codec name or None, if the codec is unknown."""
+    if not name:
+        return None
+    try:
+        return codecs.lookup(name.strip("\"' ")).name
+    except LookupError:
+        return None
+
+
+def declared_charset(headers: Mapping[str, str]) -> str | None:
+    """Returns the charset declared in the Content-Type header."""
+    for parameter in headers.get("Content-Type", "").split(";")[1:]:
+        name, _, value = parameter.strip().partition("=")
+        if name.lower() == "charset":
+            return normalize_encoding(value)
+    return None
+
+
+def meta_charset(head: bytes) -> str | None:
+    """Returns the charset declared in the <meta> element at the start of the
+    document (<meta charset> or <meta http-equiv="Content-Type">)."""
+    match = _META_CHARSET.search(head[:SNIFF_SIZE])
+    return normalize_encoding(match[1].decode("ascii")) if match else None
+
+
+class SiteEncodings:
+    """Remembers the encoding of every website, so the pages can be decoded without
+    the charset detection.
+
+    The encoding is taken from the Content-Type header, then from the <meta> element
+    at the start of the document, then from the one learned on the previous fetch of
+    the site. If nothing is known, the page is decoded as UTF-8; the charset detection
+    of requests runs only if that fails, and its result is remembered."""
+
+    def __init__(self) -> None:
+        self._encodings: dict[str, str] = {}
+        self._lock = Lock()
+
+    def get(self, site: str) -> str | None:
+        with self._lock:
+            return self._encodings.get(site)
+
+    def learn(self, site: str, encoding: str) -> None:
+        with self._lock:
+            if self._encodings.get(site) != encoding:
+                log.debug("Encoding of %s: %s.", site, encoding)
+                self._encodings[site] = encoding
+
+    def known(
+        self, site: str, headers: Mapping[str, str], head: bytes = b""
+    ) -> str | None:
+        """Returns the encoding declared in the headers or in the first bytes of the
+        body, or the one learned for the site before, without the charset detection.
+
+        Args:
+            site: the domain of the website.
+            headers: the response headers.
+            head: the first bytes of the body.
+
+        Returns: the codec name or None, if the encoding is not known."""
+        encoding = declared_charset(headers) or meta_charset(head) or self.get(site)
+        if encoding:
+            self.learn(site, encoding)
+        return encoding
+
+    def for_head(self, site: str, headers: Mapping[str, str], head: bytes = b"") -> str:
+        """Chooses the encoding of the page based on the headers and the first bytes
+        of the body. Used for the streamed responses.
+
+        Args:
+            site: the domain of the website.
+            headers: the response headers.
+            head: the first bytes of the body."""
+        return self.known(site, headers, head) or DEFAULT_ENCODING
+
+    def decode(self, site: str, response: "Response") -> str:
+        """Decodes the body of the response with the encoding of the site. If it is
+        not known, the body is decoded as UTF-8, and the charset detection runs only
+        if that fails.
+
+        Args:
+            site: the domain of the website.
+            response: the Response object."""
+        content = response.content
+        encoding = (
+            declared_charset(response.headers)
+            or meta_charset(content)
+            or self.get(site)
+        )
+        if encoding is None:
+            try:
+                markup = content.decode(DEFAULT_ENCODING)
+            except UnicodeDecodeError:
+                encoding = response.apparent_encoding or DEFAULT_ENCODING
+            else:
+                self.learn(site, DEFAULT_ENCODING)
+                return markup
+        self.learn(site, encoding)
+        return content.decode(encoding, errors="replace")
+
+
+SITE_ENCODINGS = SiteEncodings()
@@ -0,0 +1,106 @@
+from collections import OrderedDict
+from dataclasses import replace
+from logging import getLogger
+from threading import Lock
+
+from imgscraper.src.models import ExtractionPlan, ImagesSource
+from imgscraper.src.scrapers.auto_scraper import AutoScraper
+from imgscraper.src.scrapers.bs4_scraper import Bs4Scraper
+from imgscraper.src.scrapers.scraper import Scraper
+from imgscraper.src.scrapers.stream_scraper import StreamScraper
+
+log = getLogger(__name__)
+
+VALIDATOR_HEADERS = {"ETag": "If-None-Match", "Last-Modified": "If-Modified-Since"}
+# The scrapers reading the images from the HTML containers, like the streaming parser.
+CONTAINER_SCRAPERS = (Bs4Scraper, StreamScraper, AutoScraper)
+
+
+class FreshnessProbe:
+    """Answers cheaply whether the site has images newer than the last sync.
+
+    Only the first page is requested, and it is read only until the first containers
+    close. The validators (ETag, Last-Modified) of the pages found unchanged are
+    kept with the checked images, so the next probe sends a conditional request,
+    and the 304 Not Modified answer skips the body altogether. The validators are
+    forgotten as soon as the page has new images."""
+
+    def __init__(self, max_entries: int = 1024) -> None:
+        """Constructor.
+
+        Args:
+            max_entries: the limit of the kept validators. The oldest ones are
+                removed first."""
+        self.max_entries = max_entries
+        self._stream_scraper = StreamScraper()
+        self._validators: OrderedDict[
+            str, tuple[dict[str, str], tuple[str, ...]]
+        ] = OrderedDict()
+        self._lock = Lock()
+
+    def has_new_content(
+        self,
+        img_source: ImagesSource,
+        last_sync_data: tuple[str, ...] | None,
+        scraper: Scraper,
+        containers: int = 1,
+    ) -> bool:
+        """Checks the first containers of the page for the images missing in
+        last_sync_data.
+
+        Args:
+            img_source: the ImagesSource object. Contains website data.
+            last_sync_data: URLs of recently downloaded images (img_src).
+            scraper: the scraper of the site. The whole first page is scanned by it,
+                if it does not read the HTML containers or the selectors cannot be
+                streamed.
+            containers: how many containers are checked. More containers tolerate
+                pinned posts, but last_sync_data must hold that many of the newest
+                images.
+
+        Returns: True if the full sync is needed."""
+        if not last_sync_data:
+            return True
+        plan: ExtractionPlan = img_source.extraction_plan  # type: ignore[assignment]
+        if type(scraper) not in CONTAINER_SCRAPERS or not StreamScraper.supports(plan):
+            images, duplicates = scraper.get_images_data(
+                replace(img_source), last_sync_data
+            )
+            return bool(images) or not duplicates
+
+        url_address = img_source.current_url_address
+        with self._lock:
+            headers, checked_urls = self._validators.get(url_address, ({}, ()))
+        response, images = self._stream_scraper.peek_images(
+            img_source, containers, headers
+        )
+        if response.status_code == 304:
+            log.debug("%s not modified.", url_address)
+            return any(url not in last_sync_data for url in checked_urls)
+        if response.status_code != 200:
+            log.info(
+                "Unexpected status code %s of %s. Sync needed.",
+                response.status_code,
+                url_address,
+            )
+            return True
+
+        new_content = not images or any(
+            image.url_address not in last_sync_data for image in images
+        )
+        validators = {
+            request_header: response.headers[header]
+            for header, request_header in VALIDATOR_HEADERS.items()
+            if header in response.headers
+        }
+        with self._lock:
+            self._validators.pop(url_address, None)
+            if validators and not new_content:
+                self._validators[url_address] = (
+                    validators,
+                    tuple(image.url_address for image in images),
+                )
+                while len(self._validators) > self.max_entries:
+                    self._validators.popitem(last=False)
+        log.debug("%s checked. New content: %s.", url_address, new_content)
+        return new_content
@@ -0,0 +1,66 @@
+import os
+import sys
+from typing import Any
+
+
+def rss_bytes() -> int:
+    """Returns the resident set size of the process. Falls back to the working set
+    on Windows, and to the peak RSS on the other systems without /proc."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        pass
+    if sys.platform == "win32":
+        return _windows_working_set()[0]
+    return peak_rss_bytes()
+
+
+def peak_rss_bytes() -> int:
+    """Returns the peak resident set size of the process. On Linux, it is read from
+    VmHWM, since ru_maxrss survives exec and includes the peak of the parent of the
+    spawned processes."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if sys.platform == "win32":
+        return _windows_working_set()[1]
+    # The resource module does not exist on Windows.
+    import resource  # pylint: disable=import-outside-toplevel
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is given in bytes on macOS and in kilobytes elsewhere.
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def _windows_working_set() -> tuple[int, int]:
+    """Returns the working set of the process and its peak (Windows only)."""
+    # pylint: disable-next=import-outside-toplevel
+    import ctypes
+    from ctypes import wintypes  # pylint: disable=import-outside-toplevel
+
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    counters = ProcessMemoryCounters()
+    counters.cb = ctypes.sizeof(counters)
+    windll: Any = getattr(ctypes, "windll")
+    windll.psapi.GetProcessMemoryInfo(
+        windll.kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb
+    )
+    return counters.WorkingSetSize, counters.PeakWorkingSetSize
@@ -1,19 +1,57 @@
-from dataclasses import asdict, dataclass
+from dataclasses import asdict, dataclass, field
 from datetime import datetime
+from typing import TYPE_CHECKING
 
-from requests import Session
+if TYPE_CHECKING:
+    from requests import Session
+
+    from imgscraper.src.transport import Transport
+
+
+@dataclass(frozen=True)
+class ExtractionPlan:
+    container_selector: str = ""
+    pagination_selector: str = ""
+    image_selector: str = "img"
+    link_selector: str = "a"
+    image_attributes: tuple[str, ...] = ("src",)
+    title_attribute: str = "alt"
+
+
+@dataclass(frozen=True)
+class JsonFieldSpec:
+    items_path: str
+    image_path: str
+    title_path: str = ""
+    source_path: str = ""
+    next_page_path: str = ""
+    script_id: str = ""
 
 
 @dataclass
 class ImagesSource:
-    session: Session
+    session: "Session"
     current_url_address: str
     container_class: str
     pagination_class: str
     pages_to_scan: int
+    domain: str = ""
+    extraction_plan: ExtractionPlan | None = None
+    transport: "Transport | None" = field(default=None, compare=False)
 
     def __post_init__(self):
-        self.domain = self.current_url_address
+        if not self.domain:
+            self.domain = self.current_url_address
+        if self.transport is None:
+            # pylint: disable-next=import-outside-toplevel
+            from imgscraper.src.transport import RequestsTransport
+
+            self.transport = RequestsTransport(self.session)
+        if self.extraction_plan is None:
+            self.extraction_plan = ExtractionPlan(
+                container_selector="." + self.container_class,
+                pagination_selector="." + self.pagination_class,
+            )
 
 
 @dataclass(frozen=True)
@@ -32,3 +70,111 @@ class Image:
 
     def as_dict(self) -> dict[str, str | datetime]:
         return asdict(self)
+
+
+@dataclass(frozen=True)
+class DepthDecision:
+    pages_to_scan: int
+    reason: str
+    ceiling: int
+
+
+@dataclass(frozen=True)
+class SyncBudget:
+    timeout: float | None = None
+    max_requests: int | None = None
+    max_bytes: int | None = None
+
+
+@dataclass(frozen=True)
+class HostHealth:
+    host: str
+    state: str
+    requests: int
+    failures: int
+    consecutive_failures: int
+    error_rate: float
+    average_latency: float
+    retry_after: float = 0
+
+
+@dataclass(frozen=True)
+class DnsStats:
+    hits: int
+    misses: int
+    lookup_time: float
+    saved_time: float
+
+
+@dataclass(frozen=True)
+class PrewarmResult:
+    host: str
+    dns_time: float
+    connect_time: float
+    reused: bool = False
+    dns_cached: bool = False
+
+    @property
+    def saved_time(self) -> float:
+        """Setup time taken off the first request of the sync. The lookup is saved
+        only if the DNS cache is installed."""
+        if self.reused:
+            return 0.0
+        return self.connect_time + (self.dns_time if self.dns_cached else 0.0)
+
+
+@dataclass(frozen=True)
+class DerivativeSpec:
+    name: str
+    size: tuple[int, int] | None = (320, 320)
+    format: str = "JPEG"
+    quality: int = 85
+
+    @property
+    def extension(self) -> str:
+        return {"JPEG": ".jpg", "WEBP": ".webp"}.get(
+            self.format.upper(), "." + self.format.lower()
+        )
+
+
+@dataclass(frozen=True)
+class DerivativeResult:
+    image: Image
+    paths: dict[str, str]
+    cached: bool = False
+    download_time: float = 0
+    decode_time: float = 0
+    encode_time: float = 0
+    error: str | None = None
+
+    @property
+    def total_time(self) -> float:
+        return self.download_time + self.decode_time + self.encode_time
+
+
+@dataclass(frozen=True)
+class Hotspot:
+    function: str
+    weight: int
+    share: float
+
+
+@dataclass(frozen=True)
+class ProfileReport:
+    mode: str
+    unit: str
+    collapsed_stacks_path: str
+    hotspots: list[Hotspot]
+
+
+@dataclass
+class SyncResult:
+    images: list[Image]
+    pages_scanned: int
+    watermark_page: int | None = None
+    depth_decision: DepthDecision | None = None
+    profile: ProfileReport | None = None
+    budget_exhausted: bool = False
+    resume_url: str | None = None
+    resume_scanned: bool = False
+    images_flushed: int = 0
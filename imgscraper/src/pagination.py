@@ -0,0 +1,71 @@
+import re
+from dataclasses import dataclass
+from logging import getLogger
+from pathlib import Path
+
+from imgscraper.src.storage import JsonStore
+
+log = getLogger(__name__)
+
+PAGE_PLACEHOLDER = "{page}"
+_TRAILING_NUMBER = re.compile(r"^(?P<prefix>[^?#]*?/)(?P<number>\d+)(?P<suffix>/?)$")
+
+
+@dataclass(frozen=True)
+class PaginationTemplate:
+    template: str
+
+    @classmethod
+    def infer(
+        cls, url_address: str, page_number: int = 2
+    ) -> "PaginationTemplate | None":
+        """Creates a template based on the URL address of a known page.
+        Supports the /page/2 pattern. The query strings are dropped by the pagination
+        helpers of the scrapers, so the ?page=2 pattern is never seen.
+
+        Args:
+            url_address: the URL address of the page.
+            page_number: the number of the page located under url_address.
+
+        Returns: PaginationTemplate object or None, if the pattern is not supported."""
+        match = _TRAILING_NUMBER.match(url_address)
+        if match and int(match["number"]) == page_number:
+            return cls(match["prefix"] + PAGE_PLACEHOLDER + match["suffix"])
+        return None
+
+    def url_address(self, page_number: int) -> str:
+        return self.template.replace(PAGE_PLACEHOLDER, str(page_number))
+
+
+class PaginationTemplateStore:
+    """Keeps the pagination templates learned for the scraped websites."""
+
+    def __init__(self, path: str | Path | None = None) -> None:
+        """Constructor.
+
+        Args:
+            path: JSON file in which the templates are persisted. If None, the
+                templates live only in memory."""
+        self._store = JsonStore(path)
+
+    def get(self, site: str) -> PaginationTemplate | None:
+        template = self._store.get(site)
+        return PaginationTemplate(template) if template else None
+
+    def learn(self, site: str, next_url_address: str) -> PaginationTemplate | None:
+        """Infers the template from the URL address of the second page and saves it.
+
+        Args:
+            site: the domain of the scraped website.
+            next_url_address: the URL address of the second page.
+
+        Returns: the learned PaginationTemplate or None."""
+        template = PaginationTemplate.infer(next_url_address)
+        if template is not None and template != self.get(site):
+            log.info("Learned pagination template for %s: %s", site, template.template)
+            self._store.set(site, template.template)
+        return template
+
+    def forget(self, site: str) -> None:
+        log.info("Pagination template for %s is no longer valid.", site)
+        self._store.delete(site)
@@ -0,0 +1,158 @@
+import cProfile
+import pstats
+import re
+import sys
+import threading
+from collections import Counter
+from logging import getLogger
+from pathlib import Path
+from tempfile import gettempdir
+from time import time_ns
+from types import CodeType, FrameType, TracebackType
+from typing import Literal
+
+from imgscraper.src.models import Hotspot, ProfileReport
+
+log = getLogger(__name__)
+
+PROFILE_MODES = ("cprofile", "sampling")
+ProfileMode = Literal["cprofile", "sampling"]
+
+
+def _label(filename: str, line_number: int, function_name: str) -> str:
+    """Returns the frame name used in the collapsed stacks.
+    Semicolons and spaces are reserved by the format."""
+    label = f"{function_name} ({Path(filename).name}:{line_number})"
+    return label.replace(";", ":").replace(" ", "_")
+
+
+def _code_label(code: CodeType) -> str:
+    return _label(code.co_filename, code.co_firstlineno, code.co_name)
+
+
+class SyncProfiler:
+    """Profiles a single sync. Used as a context manager around the crawl.
+
+    The "cprofile" mode uses the deterministic profiler on the calling thread. The
+    "sampling" mode periodically records the stacks of the calling thread and of the
+    threads whose name starts with thread_name_prefix (e.g. the page fetching pool).
+
+    Both modes write the collapsed stacks ("frame;frame;frame weight" lines), which
+    can be turned into a flamegraph by flamegraph.pl, speedscope or inferno."""
+
+    def __init__(
+        self,
+        mode: ProfileMode,
+        site: str,
+        output_dir: str | Path | None = None,
+        top: int = 20,
+        interval: float = 0.005,
+        thread_name_prefix: str | None = None,
+    ) -> None:
+        """Constructor.
+
+        Args:
+            mode: "cprofile" or "sampling".
+            site: the domain of the profiled website, used in the file name.
+            output_dir: directory of the collapsed stacks file. Temporary directory by
+                default.
+            top: number of hotspots in the report.
+            interval: sampling interval in seconds.
+            thread_name_prefix: name prefix of additional threads to sample."""
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unsupported profile mode: {mode}.")
+        self.mode = mode
+        self.site = site
+        self.output_dir = Path(output_dir or Path(gettempdir()) / "imgscraper")
+        self.top = top
+        self.interval = interval
+        self.thread_name_prefix = thread_name_prefix
+        self._profile: cProfile.Profile | None = None
+        self._sampler: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._thread_id = threading.get_ident()
+        self._samples: Counter[str] = Counter()
+
+    def __enter__(self) -> "SyncProfiler":
+        self._thread_id = threading.get_ident()
+        if self.mode == "cprofile":
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            self._sampler = threading.Thread(
+                target=self._sample, name="imgscraper-sampler", daemon=True
+            )
+            self._sampler.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        if self._profile is not None:
+            self._profile.disable()
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()  # pylint: disable=protected-access
+            for thread in threading.enumerate():
+                if thread.ident is None or thread.ident not in frames:
+                    continue
+                if thread.ident != self._thread_id and not (
+                    self.thread_name_prefix
+                    and thread.name.startswith(self.thread_name_prefix)
+                ):
+                    continue
+                self._samples[self._collapse(frames[thread.ident])] += 1
+
+    @staticmethod
+    def _collapse(frame: FrameType | None) -> str:
+        stack = []
+        while frame is not None:
+            stack.append(_code_label(frame.f_code))
+            frame = frame.f_back
+        return ";".join(reversed(stack))
+
+    def _cprofile_stacks(self) -> Counter[str]:
+        """Turns the cProfile caller-callee pairs into two-frame stacks weighted by
+        the time (us) spent in the callee."""
+        stacks: Counter[str] = Counter()
+        stats = pstats.Stats(self._profile).stats  # type: ignore[attr-defined]
+        for function, (_, _, total_time, _, callers) in stats.items():
+            name = _label(*function)
+            if not callers:
+                stacks[name] += int(total_time * 1_000_000)
+            for caller, caller_stats in callers.items():
+                stacks[f"{_label(*caller)};{name}"] += int(caller_stats[2] * 1_000_000)
+        return +stacks
+
+    def report(self) -> ProfileReport:
+        """Writes the collapsed stacks file and returns the hotspot summary."""
+        stacks = self._samples if self.mode == "sampling" else self._cprofile_stacks()
+        leaves: Counter[str] = Counter()
+        for stack, weight in stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += weight
+        total = sum(leaves.values()) or 1
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        site_name = re.sub(r"[^a-zA-Z0-9]+", "_", self.site).strip("_")
+        path = self.output_dir / f"{site_name}-{time_ns()}-{self.mode}.collapsed"
+        with path.open("w", encoding="utf-8") as file:
+            for stack, weight in stacks.most_common():
+                file.write(f"{stack} {weight}\n")
+        log.info("Profile of %s saved in %s.", self.site, path)
+
+        return ProfileReport(
+            mode=self.mode,
+            unit="samples" if self.mode == "sampling" else "us",
+            collapsed_stacks_path=str(path),
+            hotspots=[
+                Hotspot(function=function, weight=weight, share=weight / total)
+                for function, weight in leaves.most_common(self.top)
+            ],
+        )
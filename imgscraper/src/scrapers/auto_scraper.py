@@ -0,0 +1,225 @@
+from dataclasses import astuple, dataclass, field, replace
+from importlib.util import find_spec
+from logging import getLogger
+from pathlib import Path
+from threading import Lock
+from time import perf_counter, time
+from typing import Any, Mapping
+
+from requests import Response
+
+from imgscraper.src.models import Image, ImagesSource
+from imgscraper.src.scrapers.bs4_scraper import Bs4Scraper
+from imgscraper.src.scrapers.scraper import Scraper
+from imgscraper.src.scrapers.stream_scraper import StreamScraper
+from imgscraper.src.storage import JsonStore
+from imgscraper.src.transport import Transport
+
+log = getLogger(__name__)
+
+
+def default_candidates() -> dict[str, Scraper]:
+    """Returns the backends compared by the AutoScraper. The first one is the
+    reference, whose results are treated as correct. The lxml backend is included
+    only if lxml is installed."""
+    candidates: dict[str, Scraper] = {"bs4": Bs4Scraper(), "stream": StreamScraper()}
+    if find_spec("lxml") is not None:
+        candidates["lxml"] = Bs4Scraper(parser="lxml")
+    return candidates
+
+
+@dataclass(frozen=True)
+class BackendChoice:
+    backend: str
+    evaluated_at: float
+    timings: dict[str, float] = field(default_factory=dict, compare=False)
+
+
+class BackendChoiceStore:
+    """Keeps the backends chosen for the scraped websites."""
+
+    def __init__(self, path: str | Path | None = None) -> None:
+        """Constructor.
+
+        Args:
+            path: JSON file in which the choices are persisted. If None, the choices
+                live only in memory."""
+        self._store = JsonStore(path)
+
+    def get(self, site: str) -> BackendChoice | None:
+        choice = self._store.get(site)
+        return BackendChoice(**choice) if choice else None
+
+    def save(self, site: str, choice: BackendChoice) -> None:
+        log.info("Backend chosen for %s: %s.", site, choice.backend)
+        self._store.set(
+            site,
+            {
+                "backend": choice.backend,
+                "evaluated_at": choice.evaluated_at,
+                "timings": choice.timings,
+            },
+        )
+
+
+class _PageTransport(Transport):
+    """Serves the already downloaded page, so every evaluated backend parses the same
+    response without touching the network."""
+
+    def __init__(self, response: Response) -> None:
+        self.response = response
+
+    def get(self, url_address: str, stream: bool = False, **kwargs: Any) -> Response:
+        return self.response
+
+    def fetch(self, url_address: str, **kwargs: Any) -> Response:
+        return self.response
+
+
+class AutoScraper(Scraper):
+    """Chooses the fastest backend for every website.
+
+    On the first pages of a site, the page is downloaded once and parsed by all the
+    candidate backends. The backends extracting different images than the reference
+    one are rejected, and the fastest of the remaining ones is persisted and used
+    until the choice expires. Then the evaluation is repeated."""
+
+    def __init__(
+        self,
+        candidates: Mapping[str, Scraper] | None = None,
+        store_path: str | Path | None = None,
+        store: BackendChoiceStore | None = None,
+        evaluation_pages: int = 3,
+        reevaluate_after: float = 24 * 60 * 60,
+    ) -> None:
+        """Constructor.
+
+        Args:
+            candidates: the compared backends by name. The first one is the
+                reference. By default, bs4, stream and lxml (if installed).
+            store_path: JSON file in which the chosen backends are kept.
+            store: BackendChoiceStore object. Allows sharing the choices between many
+                scrapers. Replaces store_path.
+            evaluation_pages: on how many pages the backends are compared.
+            reevaluate_after: after how many seconds the choice expires."""
+        self.candidates: Mapping[str, Scraper] = candidates or default_candidates()
+        self.reference = next(iter(self.candidates))
+        self.store = store if store is not None else BackendChoiceStore(store_path)
+        self.evaluation_pages = evaluation_pages
+        self.reevaluate_after = reevaluate_after
+        self._timings: dict[str, dict[str, float]] = {}
+        self._evaluated_pages: dict[str, int] = {}
+        self._lock = Lock()
+
+    def backend(self, site: str) -> str | None:
+        """Returns the name of the backend chosen for the site or None, if the site
+        is being evaluated."""
+        choice = self.store.get(site)
+        if (
+            choice is None
+            or choice.backend not in self.candidates
+            or time() - choice.evaluated_at >= self.reevaluate_after
+        ):
+            return None
+        return choice.backend
+
+    def get_images_data(
+        self, img_source: ImagesSource, last_sync_data: tuple[str, ...] | None = None
+    ) -> tuple[list[Image], bool]:
+        """Method that starts the synchronization process.
+        If, during synchronization, encounters an image located in last_sync_data,
+        it stops synchronization and returns True as the second argument.
+        If the synchronization is complete, the second argument will be False.
+
+        Args:
+            img_source: the ImagesSource object. Contains website data.
+            last_sync_data: URLs of recently downloaded images (img_src).
+
+        Returns: a tuple in which there is a set with Image objects and bool."""
+        backend = self.backend(img_source.domain)
+        if backend is not None:
+            return self.candidates[backend].get_images_data(img_source, last_sync_data)
+        return self._evaluate(img_source, last_sync_data)
+
+    def _evaluate(
+        self, img_source: ImagesSource, last_sync_data: tuple[str, ...] | None = None
+    ) -> tuple[list[Image], bool]:
+        """Parses the page with all the candidates and records their timings. The
+        order of the candidates is rotated on every page, so the cold-start costs
+        (caches, lazy imports) are not always paid by the same backend.
+
+        Returns: the result of the reference backend."""
+        response = img_source.transport.fetch(  # type: ignore[union-attr]
+            img_source.current_url_address
+        )
+        page_source = replace(img_source, transport=_PageTransport(response))
+        results: dict[str, tuple[list[Image], bool]] = {}
+        timings: dict[str, float] = {}
+        names = list(self.candidates)
+        with self._lock:
+            offset = self._evaluated_pages.get(img_source.domain, 0) % len(names)
+        for name in names[offset:] + names[:offset]:
+            scraper = self.candidates[name]
+            start = perf_counter()
+            try:
+                results[name] = scraper.get_images_data(page_source, last_sync_data)
+            except Exception:  # pylint: disable=broad-exception-caught
+                if name == self.reference:
+                    raise
+                log.exception("%s backend failed.", name)
+                continue
+            timings[name] = perf_counter() - start
+
+        expected = self._comparable(results[self.reference])
+        with self._lock:
+            site_timings = self._timings.setdefault(
+                img_source.domain, dict.fromkeys(self.candidates, 0.0)
+            )
+            for name in list(site_timings):
+                if name not in results or self._comparable(results[name]) != expected:
+                    log.warning(
+                        "%s backend extracted different images from %s. Rejected.",
+                        name,
+                        img_source.current_url_address,
+                    )
+                    del site_timings[name]
+                else:
+                    site_timings[name] += timings[name]
+
+            pages = self._evaluated_pages.get(img_source.domain, 0) + 1
+            self._evaluated_pages[img_source.domain] = pages
+            if pages >= self.evaluation_pages:
+                self.store.save(
+                    img_source.domain,
+                    BackendChoice(
+                        backend=min(site_timings, key=site_timings.__getitem__),
+                        evaluated_at=time(),
+                        timings=site_timings,
+                    ),
+                )
+                del self._timings[img_source.domain]
+                del self._evaluated_pages[img_source.domain]
+        return results[self.reference]
+
+    @staticmethod
+    def _comparable(
+        result: tuple[list[Image], bool]
+    ) -> tuple[set[tuple[str, str, str]], bool]:
+        return {astuple(image) for image in result[0]}, result[1]
+
+    def find_next_page(
+        self,
+        img_source: ImagesSource,
+        scraped_urls: set[str],
+    ) -> tuple[str, set[str]]:
+        """Search the HTML DOM for the next page URL address with the chosen backend
+        or the reference one, if the site is being evaluated.
+
+        Args:
+            img_source: the ImagesSource object. Contains website data.
+            scraped_urls: to avoid duplicates, it is required to provide previously
+                scanned URLs.
+
+        Returns: tuple containing the next URL address, and set of scraped URLs."""
+        backend = self.backend(img_source.domain) or self.reference
+        return self.candidates[backend].find_next_page(img_source, scraped_urls)
@@ -1,20 +1,138 @@
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
 from logging import getLogger
+from threading import Lock
+from typing import Any, Callable
 
-from bepatient import wait_for_value_in_request
-from bs4 import BeautifulSoup, ResultSet, Tag
-from requests import Session
+import soupsieve
+from bs4 import BeautifulSoup, Tag
+from requests import Response
 
-from imgscraper.src.models import Image, ImagesSource
+from imgscraper.src.encoding import SITE_ENCODINGS
+from imgscraper.src.models import ExtractionPlan, Image, ImagesSource
 from imgscraper.src.scrapers.scraper import Scraper
+from imgscraper.src.singleflight import SHARED_PAGES
+from imgscraper.src.transport import Transport
 
 log = getLogger(__name__)
+_TAG_SELECTOR = re.compile(r"^[a-zA-Z][a-zA-Z0-9-]*$")
+_CLASS_SELECTOR = re.compile(r"^\.(-?[_a-zA-Z][_a-zA-Z0-9-]*)$")
+
+
+@dataclass(frozen=True)
+class CompiledExtractionPlan:
+    """ExtractionPlan with selectors turned into ready to use functions."""
+
+    select_containers: Callable[[Tag], list[Tag]]
+    select_pagination: Callable[[Tag], Tag | None]
+    select_images: Callable[[Tag], list[Tag]]
+    select_link: Callable[[Tag], Tag | None]
+    image_attributes: tuple[str, ...]
+    title_attribute: str
+
+    def image_url(self, image: Tag) -> str:
+        """Returns the first non-empty attribute of the image from image_attributes.
+
+        Raises:
+            KeyError: if the image has none of the attributes."""
+        for attribute in self.image_attributes:
+            value = image.get(attribute)
+            if value:
+                return str(value)
+        raise KeyError(self.image_attributes)
+
+
+def _compile_selector(
+    selector: str,
+) -> tuple[Callable[[Tag], list[Tag]], Callable[[Tag], Tag | None]]:
+    """Returns select and select_one functions for the CSS selector. Bare tag names
+    and single class names are served by the faster find_all and find methods."""
+    if not selector:
+        return (lambda tag: []), (lambda tag: None)
+    if _TAG_SELECTOR.match(selector):
+        return (
+            lambda tag: tag.find_all(selector),
+            lambda tag: tag.find(selector),
+        )
+    class_match = _CLASS_SELECTOR.match(selector)
+    if class_match:
+        class_name = class_match[1]
+        return (
+            lambda tag: tag.find_all(class_=class_name),
+            lambda tag: tag.find(class_=class_name),
+        )
+    pattern = soupsieve.compile(selector)
+    return pattern.select, pattern.select_one
+
+
+@lru_cache(maxsize=256)
+def compile_plan(plan: ExtractionPlan) -> CompiledExtractionPlan:
+    """Compiles the ExtractionPlan. The result is cached, so every plan is compiled
+    only once.
+
+    Args:
+        plan: the ExtractionPlan object.
+
+    Returns: CompiledExtractionPlan object."""
+    select_containers = _compile_selector(plan.container_selector)[0]
+    select_pagination = _compile_selector(plan.pagination_selector)[1]
+    select_images = _compile_selector(plan.image_selector)[0]
+    select_link = _compile_selector(plan.link_selector)[1]
+    return CompiledExtractionPlan(
+        select_containers=select_containers,
+        select_pagination=select_pagination,
+        select_images=select_images,
+        select_link=select_link,
+        image_attributes=plan.image_attributes,
+        title_attribute=plan.title_attribute,
+    )
+
+
+DEFAULT_PLAN = compile_plan(ExtractionPlan())
 
 
 class Bs4Scraper(Scraper):
-    """Scans websites for images and returns data about them."""
+    """Scans websites for images and returns data about them.
+
+    The concurrent downloads of the same page with the same session, also by
+    different scrapers (e.g. with different containers), are coalesced into one
+    fetch and one parsed DOM. With page_cache_ttl, the DOM is kept for the given
+    time.
+
+    With decompose_pages, every page gets its own DOM, which is decomposed as soon as
+    the images and the pagination links are extracted, so the reference cycles of
+    the tree do not wait for the garbage collector. The pagination links are kept
+    for find_next_page, which saves a second download of the page."""
+
+    max_cached_paginations = 64
+
+    def __init__(
+        self,
+        page_cache_ttl: float = 0,
+        parser: str = "html.parser",
+        decompose_pages: bool = False,
+    ) -> None:
+        """Constructor.
+
+        Args:
+            page_cache_ttl: for how many seconds the page downloaded by any scraper
+                of the process with the same session can be reused instead of
+                downloading it again. If 0, only the downloads in flight are
+                shared.
+            parser: the BeautifulSoup tree builder, e.g. "html.parser" or "lxml"
+                (requires the optional lxml dependency).
+            decompose_pages: if True, the DOM of every page is torn down right after
+                the extraction (bounded-memory mode). page_cache_ttl is ignored."""
+        self.page_cache_ttl = page_cache_ttl
+        self.parser = parser
+        self.decompose_pages = decompose_pages
+        self._pagination_links: OrderedDict[str, list[str]] = OrderedDict()
+        self._pagination_lock = Lock()
 
     def get_images_data(
-        self, img_source: ImagesSource, last_sync_data: tuple[str] | None = None
+        self, img_source: ImagesSource, last_sync_data: tuple[str, ...] | None = None
     ) -> tuple[list[Image], bool]:
         """Method that starts the synchronization process.
         If, during synchronization, encounters an image located in last_sync_data,
@@ -26,34 +144,132 @@ class Bs4Scraper(Scraper):
             last_sync_data: URLs of recently downloaded images (img_src).
 
         Returns: a tuple in which there is a set with Image objects and bool."""
+        plan = compile_plan(img_source.extraction_plan)
+        if self.decompose_pages:
+            return self._extract_and_decompose(img_source, plan, last_sync_data)
+
         html_dom = self._get_html_dom(
-            session=img_source.session, url_address=img_source.current_url_address
+            transport=img_source.transport,  # type: ignore[arg-type]
+            url_address=img_source.current_url_address,
+            site=img_source.domain,
+            max_age=self.page_cache_ttl,
+            parser=self.parser,
         )
         return self._prepare_image_objects(
             domain=img_source.domain,
-            image_holders=html_dom.select("." + img_source.container_class),
+            image_holders=plan.select_containers(html_dom),
             last_sync_data=last_sync_data,
+            plan=plan,
         )
 
-    @staticmethod
-    def _get_html_dom(session: Session, url_address: str) -> BeautifulSoup:
+    def _extract_and_decompose(
+        self,
+        img_source: ImagesSource,
+        plan: CompiledExtractionPlan,
+        last_sync_data: tuple[str, ...] | None = None,
+    ) -> tuple[list[Image], bool]:
+        """Extracts the images and the pagination links from a private DOM of the
+        page, and decomposes it. The DOMs shared with the other scrapers are not
+        used, as they can still be in use.
+
+        Returns: a tuple in which there is a set with Image objects and bool."""
+        url_address = img_source.current_url_address
+        html_dom = self._parse_html(
+            img_source.transport.fetch(url_address),  # type: ignore[union-attr]
+            img_source.domain,
+            self.parser,
+        )
+        try:
+            result = self._prepare_image_objects(
+                domain=img_source.domain,
+                image_holders=plan.select_containers(html_dom),
+                last_sync_data=last_sync_data,
+                plan=plan,
+            )
+            pagination_div = plan.select_pagination(html_dom)
+            if pagination_div is not None:
+                self._remember_pagination(
+                    url_address,
+                    [link.get("href", "#") for link in pagination_div.find_all("a")],
+                )
+        finally:
+            html_dom.decompose()
+        return result
+
+    def _remember_pagination(self, url_address: str, hrefs: list[str]) -> None:
+        """Keeps the pagination links of the page for find_next_page. The scraper is
+        shared by the concurrent syncs and the fan-out threads, so the links are
+        guarded by a lock, and the least recently remembered ones are dropped
+        first."""
+        with self._pagination_lock:
+            self._pagination_links[url_address] = hrefs
+            self._pagination_links.move_to_end(url_address)
+            while len(self._pagination_links) > self.max_cached_paginations:
+                self._pagination_links.popitem(last=False)
+
+    def _recall_pagination(self, url_address: str) -> list[str] | None:
+        """Returns and forgets the pagination links kept for the page, if any."""
+        with self._pagination_lock:
+            return self._pagination_links.pop(url_address, None)
+
+    @classmethod
+    def _get_html_dom(
+        cls,
+        transport: Transport,
+        url_address: str,
+        site: str = "",
+        max_age: float = 0,
+        parser: str = "html.parser",
+    ) -> BeautifulSoup:
         """Convert string containing URL address into Response object,
-        and then convert it into BeautifulSoup object.
+        and then convert it into BeautifulSoup object. The concurrent calls for the
+        same URL address and Transport.share_key (e.g. the session) share one
+        download and one DOM, which must not be modified.
 
         Args:
+            transport: the Transport object used to download the page.
             url_address: string containing URL of scraped website.
+            site: the domain of the website, used to remember its encoding.
+            max_age: how old (in seconds) the DOM downloaded before can be.
+            parser: the BeautifulSoup tree builder.
 
         Returns: BeautifulSoup object containing HTML DOM."""
-        text_response = wait_for_value_in_request(
-            request=session.get(url=url_address), session=session
-        ).text
-        return BeautifulSoup(text_response, "html.parser")
+        return SHARED_PAGES.do(
+            (parser, url_address, transport.share_key()),
+            lambda: cls._parse_html(
+                transport.fetch(url_address), site or url_address, parser
+            ),
+            max_age=max_age,
+        )
+
+    @staticmethod
+    def _parse_html(
+        response: Response, site: str, parser: str = "html.parser"
+    ) -> BeautifulSoup:
+        """Converts the body of the response into BeautifulSoup object. The bytes are
+        passed to BeautifulSoup with the declared or the remembered encoding of the
+        site, so no decoded copy of the page is kept next to the body. The body is
+        decoded up front only if the encoding is not known yet, which runs the
+        charset detection at most once per site.
+
+        Args:
+            response: the Response object.
+            site: the domain of the website.
+            parser: the BeautifulSoup tree builder.
+
+        Returns: BeautifulSoup object containing HTML DOM."""
+        content = response.content
+        encoding = SITE_ENCODINGS.known(site, response.headers, content)
+        if encoding is None:
+            return BeautifulSoup(SITE_ENCODINGS.decode(site, response), parser)
+        return BeautifulSoup(content, parser, from_encoding=encoding)
 
     def _prepare_image_objects(
         self,
         domain: str,
-        image_holders: ResultSet,
-        last_sync_data: tuple[str] | None = None,
+        image_holders: list[Tag],
+        last_sync_data: tuple[str, ...] | None = None,
+        plan: CompiledExtractionPlan = DEFAULT_PLAN,
     ) -> tuple[list[Image], bool]:
         """Iterates over ResultSet of image holders and add images into a set.
         If it hits a previously scanned image, stops the iterations and returns True
@@ -61,8 +277,9 @@ class Bs4Scraper(Scraper):
 
         Args:
             domain: domain of the scraped website.
-            image_holders: ResultSet object containing the images' data.
+            image_holders: Tag objects containing the images' data.
             last_sync_data: URLs of recently downloaded images (img_src).
+            plan: the compiled extraction plan of the website.
 
         Returns: a tuple in which there is a set with Image objects and bool."""
         images: list[Image] = []
@@ -72,7 +289,7 @@ class Bs4Scraper(Scraper):
             if duplicates:
                 break
 
-            images_data = self._find_images_data(div, domain)
+            images_data = self._find_images_data(div, domain, plan)
             if not images_data:
                 continue
 
@@ -89,7 +306,7 @@ class Bs4Scraper(Scraper):
         return images, duplicates
 
     def _find_images_data(
-        self, div: Tag, domain: str
+        self, div: Tag, domain: str, plan: CompiledExtractionPlan = DEFAULT_PLAN
     ) -> list[tuple[str, str, str]] | None:
         """Searches the Tag object for image-related data: source link, image source,
         and image description (alt).
@@ -97,35 +314,58 @@ class Bs4Scraper(Scraper):
         Args:
             div: Tag object containing a div with image.
             domain: domain of the scraped website.
+            plan: the compiled extraction plan of the website.
 
         Returns: Image object based on the supplied div or None (if the required data
             cannot be found or the image source does not have the extension)."""
-        div_data = div.find_all("img")
+        div_data = plan.select_images(div)
         if len(div_data) > 1:
             log.debug("Multiple images found in tag")
         images = []
+        link = plan.select_link(div) if div_data else None
 
         for image in div_data:
             try:
-                image_source = self.add_domain_into_url_address(
-                    domain, div.find("a")["href"]
-                )
-                img_src = self.add_domain_into_url_address(domain, image["src"])
-
-                if img_src[-4] == "." or img_src[-5] == ".":
-                    images.append((image_source, img_src, image["alt"]))
+                image_data = self._image_data(domain, link, image, plan)
+                if image_data:
+                    images.append(image_data)
 
             except (TypeError, KeyError):
                 log.exception("Encountered an issue. The image is being skipped.")
 
         return images[::-1] if len(images) > 0 else None
 
+    def _image_data(
+        self,
+        domain: str,
+        link: Any,
+        image: Any,
+        plan: CompiledExtractionPlan = DEFAULT_PLAN,
+    ) -> tuple[str, str, str] | None:
+        """Builds the image data from the link and the img element (a Tag or a dict of
+        attributes).
+
+        Returns: tuple containing the source link, the image source and the title, or
+            None if the image source does not have the extension.
+
+        Raises:
+            TypeError: if there is no link.
+            KeyError: if a required attribute is missing."""
+        image_source = self.add_domain_into_url_address(domain, link["href"])
+        img_src = self.add_domain_into_url_address(domain, plan.image_url(image))
+
+        if img_src[-4] == "." or img_src[-5] == ".":
+            return image_source, img_src, image[plan.title_attribute]
+        return None
+
     def find_next_page(
         self,
         img_source: ImagesSource,
         scraped_urls: set[str],
     ) -> tuple[str, set[str]]:
-        """Search the HTML DOM for the next page URL address.
+        """Search the HTML DOM for the next page URL address. The pagination links
+        captured while the page was scraped are used if available, otherwise the page
+        is downloaded again.
 
         Args:
             img_source: the ImagesSource object. Contains website data.
@@ -134,20 +374,42 @@ class Bs4Scraper(Scraper):
 
         Returns: tuple containing the next URL address, and set of scraped URLs."""
         scraped_urls.add(img_source.current_url_address)
+        hrefs = self._recall_pagination(img_source.current_url_address)
+        if hrefs:
+            return self._select_next_page(img_source.domain, hrefs, scraped_urls)
+
         html_dom = self._get_html_dom(
-            session=img_source.session, url_address=img_source.current_url_address
+            transport=img_source.transport,  # type: ignore[arg-type]
+            url_address=img_source.current_url_address,
+            site=img_source.domain,
+            max_age=self.page_cache_ttl,
+            parser=self.parser,
+        )
+        pagination_div = compile_plan(img_source.extraction_plan).select_pagination(
+            html_dom
         )
-        pagination_div = html_dom.select_one("." + img_source.pagination_class)
 
-        next_url = self.add_domain_into_url_address(
-            img_source.domain,
-            pagination_div.find("a")["href"],
+        return self._select_next_page(
+            domain=img_source.domain,
+            hrefs=[link.get("href", "#") for link in pagination_div.find_all("a")],
+            scraped_urls=scraped_urls,
         )
+
+    def _select_next_page(
+        self, domain: str, hrefs: list[str], scraped_urls: set[str]
+    ) -> tuple[str, set[str]]:
+        """Searches the pagination links for the next page URL address.
+
+        Args:
+            domain: domain of the scraped website.
+            hrefs: href attributes of the pagination links.
+            scraped_urls: previously scanned URLs.
+
+        Returns: tuple containing the next URL address, and set of scraped URLs."""
+        next_url = self.add_domain_into_url_address(domain, hrefs[0])
         next_url_index = 0
 
-        while not self._is_this_really_the_next_page(
-            img_source.domain, next_url, scraped_urls
-        ):
+        while not self._is_this_really_the_next_page(domain, next_url, scraped_urls):
             scraped_urls.add(next_url)
             next_url_index += 1
             if next_url_index > 5:
@@ -157,8 +419,7 @@ class Bs4Scraper(Scraper):
                 )
                 raise IndexError(message)
             next_url = self.add_domain_into_url_address(
-                domain=img_source.domain,
-                item_url=pagination_div.find_all("a")[next_url_index]["href"],
+                domain=domain, item_url=hrefs[next_url_index]
             )
 
         return next_url, scraped_urls
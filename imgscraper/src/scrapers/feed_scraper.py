@@ -0,0 +1,241 @@
+import codecs
+import re
+from html.parser import HTMLParser
+from logging import getLogger
+from threading import Lock
+from urllib.parse import urljoin
+from xml.etree.ElementTree import Element, ParseError, XMLPullParser
+
+from imgscraper.src.encoding import SITE_ENCODINGS
+from imgscraper.src.models import Image, ImagesSource
+from imgscraper.src.scrapers.bs4_scraper import Bs4Scraper
+from imgscraper.src.scrapers.scraper import Scraper
+from imgscraper.src.transport import Transport
+
+log = getLogger(__name__)
+
+FEED_TYPES = ("application/rss+xml", "application/atom+xml")
+_IMG_SRC = re.compile(r"""<img[^>]+?src\s*=\s*["']([^"']+)["']""", re.IGNORECASE)
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+class FeedLinkParser(HTMLParser):
+    """Finds the <link rel="alternate"> feed URL in the head of the HTML document."""
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.feed_url: str | None = None
+        self.head_complete = False
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if tag == "body":
+            self.head_complete = True
+        if tag != "link" or self.feed_url is not None:
+            return
+        attributes = {name: value or "" for name, value in attrs}
+        if (
+            "alternate" in attributes.get("rel", "").lower().split()
+            and attributes.get("type", "").lower() in FEED_TYPES
+            and attributes.get("href")
+        ):
+            self.feed_url = attributes["href"]
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "head":
+            self.head_complete = True
+
+
+class FeedScraper(Scraper):
+    """Reads the images from the RSS or Atom feed of the website.
+
+    The feed is discovered from the <link rel="alternate"> element of the home page,
+    reading the document only up to the end of the head. The discovered URL is
+    remembered per website. The feed is parsed while it is being downloaded, and the
+    download stops when the image from last_sync_data is found.
+
+    The feed holds only the recent images of the whole website. If the image from
+    last_sync_data is in the feed, the feed is reported as the last page of the
+    sync. Otherwise (the first sync, a watermark older than the feed, a feed that
+    cannot be downloaded or parsed), the website is crawled by the fallback scraper
+    (Bs4Scraper by default), as are the websites without a feed."""
+
+    chunk_size = 16 * 1024
+
+    def __init__(self, fallback: Scraper | None = None) -> None:
+        """Constructor.
+
+        Args:
+            fallback: the scraper used for websites without a feed."""
+        self.fallback = fallback or Bs4Scraper()
+        self._feeds: dict[str, str | None] = {}
+        self._lock = Lock()
+
+    def get_images_data(
+        self, img_source: ImagesSource, last_sync_data: tuple[str, ...] | None = None
+    ) -> tuple[list[Image], bool]:
+        """Method that starts the synchronization process.
+        Returns the images from the feed, up to the image located in last_sync_data,
+        and True. If the image is not in the feed, or the website has no feed, the
+        page is scanned by the fallback scraper.
+
+        Args:
+            img_source: the ImagesSource object. Contains website data.
+            last_sync_data: URLs of recently downloaded images (img_src).
+
+        Returns: a tuple in which there is a set with Image objects and bool."""
+        feed_url = None
+        if last_sync_data and img_source.current_url_address == img_source.domain:
+            feed_url = self.discover_feed(img_source)
+        if feed_url is not None:
+            images = self._read_feed(
+                transport=img_source.transport,  # type: ignore[arg-type]
+                feed_url=feed_url,
+                domain=img_source.domain,
+                last_sync_data=last_sync_data,
+            )
+            if images is not None:
+                return images, True
+            log.info("%s not in the feed. Crawling the website.", feed_url)
+        return self.fallback.get_images_data(img_source, last_sync_data)
+
+    def discover_feed(self, img_source: ImagesSource) -> str | None:
+        """Returns the feed URL of the website or None, if there is no feed.
+
+        Args:
+            img_source: the ImagesSource object. Contains website data."""
+        with self._lock:
+            if img_source.domain in self._feeds:
+                return self._feeds[img_source.domain]
+
+        parser = FeedLinkParser()
+        response = img_source.transport.get(  # type: ignore[union-attr]
+            img_source.domain, stream=True
+        )
+        try:
+            if response.status_code == 200:
+                decoder = None
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
+                    if decoder is None:
+                        encoding = SITE_ENCODINGS.for_head(
+                            img_source.domain, response.headers, chunk
+                        )
+                        decoder = codecs.getincrementaldecoder(encoding)(
+                            errors="replace"
+                        )
+                    parser.feed(decoder.decode(chunk))
+                    if parser.feed_url or parser.head_complete:
+                        break
+        finally:
+            response.close()
+
+        feed_url = (
+            urljoin(img_source.domain, parser.feed_url) if parser.feed_url else None
+        )
+        log.info("Feed of %s: %s", img_source.domain, feed_url)
+        with self._lock:
+            self._feeds[img_source.domain] = feed_url
+        return feed_url
+
+    def _read_feed(
+        self,
+        transport: Transport,
+        feed_url: str,
+        domain: str,
+        last_sync_data: tuple[str, ...] | None = None,
+    ) -> list[Image] | None:
+        """Streams the feed and maps its entries into Image objects.
+
+        Returns: list of Image objects, up to the image located in last_sync_data, or
+            None if the image was not found, or the feed cannot be read."""
+        images: list[Image] = []
+        parser: XMLPullParser[Element] = XMLPullParser(events=("end",))
+        response = transport.get(feed_url, stream=True)
+        if response.status_code != 200:
+            log.warning(
+                "Feed %s returned status code %s.", feed_url, response.status_code
+            )
+            response.close()
+            return None
+
+        try:
+            for chunk in response.iter_content(chunk_size=self.chunk_size):
+                parser.feed(chunk)
+                for event in parser.read_events():
+                    element = event[-1]
+                    if not isinstance(element, Element) or _local_name(
+                        element.tag
+                    ) not in ("item", "entry"):
+                        continue
+                    image = self._entry_to_image(element, domain)
+                    element.clear()
+                    if image is None:
+                        continue
+                    if last_sync_data and image.url_address in last_sync_data:
+                        log.debug("Previously provided image found. Closing the feed.")
+                        return images
+                    images.append(image)
+        except ParseError:
+            log.exception("Unable to parse the feed %s.", feed_url)
+        finally:
+            response.close()
+        return None
+
+    @staticmethod
+    def _entry_to_image(entry: Element, domain: str) -> Image | None:
+        """Maps the RSS item or the Atom entry into an Image object.
+
+        Returns: Image object or None, if the entry has no image with extension."""
+        title = ""
+        source = ""
+        image_urls: list[str] = []
+        markup = ""
+
+        for child in entry:
+            name = _local_name(child.tag)
+            if name == "title":
+                title = (child.text or "").strip()
+            elif name == "link":
+                rel = child.get("rel", "alternate")
+                if rel == "enclosure" and child.get("href"):
+                    image_urls.append(child.get("href", ""))
+                elif rel == "alternate" and not source:
+                    source = (child.get("href") or child.text or "").strip()
+            elif name in ("enclosure", "content", "thumbnail") and child.get("url"):
+                if name != "enclosure" or child.get("type", "image/").startswith(
+                    "image/"
+                ):
+                    image_urls.append(child.get("url", ""))
+            elif name in ("description", "content", "summary", "encoded"):
+                markup = markup or (child.text or "")
+
+        image_urls.extend(_IMG_SRC.findall(markup))
+        for image_url in image_urls:
+            url_address = Bs4Scraper.add_domain_into_url_address(domain, image_url)
+            if url_address[-4] == "." or url_address[-5] == ".":
+                return Image(
+                    source=Bs4Scraper.add_domain_into_url_address(domain, source)
+                    if source
+                    else domain,
+                    url_address=url_address,
+                    title=title,
+                )
+        return None
+
+    def find_next_page(
+        self,
+        img_source: ImagesSource,
+        scraped_urls: set[str],
+    ) -> tuple[str, set[str]]:
+        """Search the HTML DOM for the next page URL address. Used only for websites
+        without a feed.
+
+        Args:
+            img_source: the ImagesSource object. Contains website data.
+            scraped_urls: to avoid duplicates, it is required to provide previously
+                scanned URLs.
+
+        Returns: tuple containing the next URL address, and set of scraped URLs."""
+        return self.fallback.find_next_page(img_source, scraped_urls)
@@ -0,0 +1,220 @@
+from logging import getLogger
+from typing import Any, Iterator
+from urllib.parse import urljoin
+
+from imgscraper.src.models import Image, ImagesSource, JsonFieldSpec
+from imgscraper.src.scrapers.bs4_scraper import Bs4Scraper, compile_plan
+
+try:
+    from orjson import loads
+except ImportError:  # pragma: no cover
+    from json import loads  # type: ignore[assignment]
+
+log = getLogger(__name__)
+
+JSON_SCRIPT_MARKERS = (b"__next_data__", b"application/json", b"application/ld+json")
+
+
+def find_json_blocks(body: bytes, script_id: str = "") -> Iterator[bytes]:
+    """Yields the content of the <script> elements holding JSON, without building the
+    DOM. If script_id is given, only the script with this id is returned.
+
+    Args:
+        body: the raw HTML document.
+        script_id: the id attribute of the wanted script."""
+    wanted_id = script_id.lower().encode()
+    position = 0
+    while True:
+        start = body.find(b"<script", position)
+        tag_end = body.find(b">", start) if start >= 0 else -1
+        end = body.find(b"</script", tag_end) if tag_end >= 0 else -1
+        if end < 0:
+            return
+        position = end + 8
+
+        tag = body[start:tag_end].lower()
+        if wanted_id:
+            if not any(
+                b"id=" + quote + wanted_id + quote in tag for quote in (b'"', b"'")
+            ):
+                continue
+        elif not any(marker in tag for marker in JSON_SCRIPT_MARKERS):
+            continue
+        yield body[tag_end + 1 : end]
+
+
+def resolve_path(data: Any, path: str) -> list[Any]:
+    """Returns the values found under the dotted path, e.g. "props.pageProps.memes".
+    Numbers select the list elements, and "*" selects all elements of a list or all
+    values of a dict.
+
+    Args:
+        data: the decoded JSON document.
+        path: the dotted path. An empty path returns the data itself."""
+    values = [data]
+    for key in filter(None, path.split(".")):
+        found = []
+        for value in values:
+            if key == "*":
+                if isinstance(value, list):
+                    found.extend(value)
+                elif isinstance(value, dict):
+                    found.extend(value.values())
+            elif isinstance(value, dict):
+                if key in value:
+                    found.append(value[key])
+            elif isinstance(value, list) and key.lstrip("-").isdigit():
+                if -len(value) <= int(key) < len(value):
+                    found.append(value[int(key)])
+        values = found
+    return values
+
+
+class EmbeddedJsonScraper(Bs4Scraper):
+    """Reads the images from the JSON embedded in the page (__NEXT_DATA__,
+    application/json or JSON-LD scripts).
+
+    The scripts are found with a byte-level scan of the document and decoded with
+    orjson (if installed), so a page costs a single JSON decode instead of building
+    the DOM. The items and their fields are selected with the JsonFieldSpec paths.
+    If no script holds the items, the already downloaded page is parsed by the
+    Bs4Scraper. The next page addresses found in the JSON are kept in the pagination
+    cache of the Bs4Scraper, which is safe to share between the threads."""
+
+    def __init__(
+        self, spec: JsonFieldSpec | dict[str, str], page_cache_ttl: float = 0
+    ) -> None:
+        """Constructor.
+
+        Args:
+            spec: JsonFieldSpec object or its fields as a dict, e.g.
+                {"items_path": "props.pageProps.memes", "image_path": "image.url",
+                "title_path": "title", "source_path": "permalink"}.
+            page_cache_ttl: for how many seconds the DOM downloaded by any scraper of
+                the process can be reused by the HTML fallback."""
+        super().__init__(page_cache_ttl)
+        self.spec = spec if isinstance(spec, JsonFieldSpec) else JsonFieldSpec(**spec)
+
+    def get_images_data(
+        self, img_source: ImagesSource, last_sync_data: tuple[str, ...] | None = None
+    ) -> tuple[list[Image], bool]:
+        """Method that starts the synchronization process.
+        If, during synchronization, encounters an image located in last_sync_data,
+        it stops synchronization and returns True as the second argument.
+        If the synchronization is complete, the second argument will be False.
+
+        Args:
+            img_source: the ImagesSource object. Contains website data.
+            last_sync_data: URLs of recently downloaded images (img_src).
+
+        Returns: a tuple in which there is a set with Image objects and bool."""
+        url_address = img_source.current_url_address
+        response = img_source.transport.fetch(url_address)  # type: ignore[union-attr]
+
+        for block in find_json_blocks(response.content, self.spec.script_id):
+            try:
+                data = loads(block)
+            except ValueError:
+                log.debug("Invalid JSON found in the script. Skipping it.")
+                continue
+
+            items = resolve_path(data, self.spec.items_path)
+            if len(items) == 1 and isinstance(items[0], list):
+                items = items[0]
+            if not items:
+                continue
+
+            if self.spec.next_page_path:
+                self._cache_next_page(url_address, data)
+            return self._prepare_json_images(
+                img_source.domain, url_address, items, last_sync_data
+            )
+
+        log.debug("No embedded JSON with the items found. Parsing the HTML document.")
+        plan = compile_plan(img_source.extraction_plan)
+        return self._prepare_image_objects(
+            domain=img_source.domain,
+            image_holders=plan.select_containers(
+                self._parse_html(response, img_source.domain, self.parser)
+            ),
+            last_sync_data=last_sync_data,
+            plan=plan,
+        )
+
+    def _prepare_json_images(
+        self,
+        domain: str,
+        url_address: str,
+        items: list[Any],
+        last_sync_data: tuple[str, ...] | None = None,
+    ) -> tuple[list[Image], bool]:
+        """Maps the JSON items into Image objects. If it hits a previously scanned
+        image, stops the iterations and returns True as the second argument.
+
+        Returns: a tuple in which there is a set with Image objects and bool."""
+        images: list[Image] = []
+        for item in items:
+            img_src = self._field(item, self.spec.image_path)
+            if not img_src:
+                continue
+            img_src = self.add_domain_into_url_address(domain, img_src)
+            if not (img_src[-4] == "." or img_src[-5] == "."):
+                continue
+            if last_sync_data and img_src in last_sync_data:
+                log.debug("Previously provided image found. Interrupting sync...")
+                return images, True
+
+            source = self._field(item, self.spec.source_path)
+            images.append(
+                Image(
+                    source=self.add_domain_into_url_address(domain, source)
+                    if source
+                    else url_address,
+                    url_address=img_src,
+                    title=self._field(item, self.spec.title_path),
+                )
+            )
+        return images, False
+
+    @staticmethod
+    def _field(item: Any, path: str) -> str:
+        """Returns the first string value under the path or an empty string."""
+        if not path:
+            return ""
+        for value in resolve_path(item, path):
+            if isinstance(value, str):
+                return value
+        return ""
+
+    def _cache_next_page(self, url_address: str, data: Any) -> None:
+        next_page = self._field(data, self.spec.next_page_path)
+        if next_page:
+            self._remember_pagination(url_address, [next_page])
+
+    def find_next_page(
+        self,
+        img_source: ImagesSource,
+        scraped_urls: set[str],
+    ) -> tuple[str, set[str]]:
+        """Returns the next page URL address found in the embedded JSON. If it is not
+        available, searches the HTML DOM. The JSON address is resolved against the
+        current page and kept whole, so the cursor query strings survive.
+
+        Args:
+            img_source: the ImagesSource object. Contains website data.
+            scraped_urls: to avoid duplicates, it is required to provide previously
+                scanned URLs.
+
+        Returns: tuple containing the next URL address, and set of scraped URLs."""
+        next_pages = self._recall_pagination(img_source.current_url_address)
+        if not next_pages:
+            return super().find_next_page(img_source, scraped_urls)
+
+        scraped_urls.add(img_source.current_url_address)
+        next_url = urljoin(img_source.current_url_address, next_pages[0])
+        if next_url in scraped_urls:
+            raise IndexError(
+                "Couldn't find the URL of the next subpage.\n"
+                f"Scraped URLs: {scraped_urls}\nCurrent URL: {next_url}"
+            )
+        return next_url, scraped_urls
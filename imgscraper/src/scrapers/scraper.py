@@ -8,7 +8,7 @@ class Scraper(ABC):
 
     @abstractmethod
     def get_images_data(
-        self, img_source: ImagesSource, last_sync_data: tuple[str] | None = None
+        self, img_source: ImagesSource, last_sync_data: tuple[str, ...] | None = None
     ) -> tuple[list[Image], bool]:
         """The method that starts the synchronization process.
         If, during synchronization, encounters an image located in last_sync_data,
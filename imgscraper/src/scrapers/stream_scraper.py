@@ -0,0 +1,344 @@
+import codecs
+from html.parser import HTMLParser
+from logging import getLogger
+
+from requests import Response
+
+from imgscraper.src.encoding import SITE_ENCODINGS
+from imgscraper.src.models import ExtractionPlan, Image, ImagesSource
+from imgscraper.src.scrapers.bs4_scraper import (
+    _CLASS_SELECTOR,
+    _TAG_SELECTOR,
+    Bs4Scraper,
+    CompiledExtractionPlan,
+    compile_plan,
+)
+
+log = getLogger(__name__)
+
+VOID_ELEMENTS = frozenset(
+    (
+        "area",
+        "base",
+        "br",
+        "col",
+        "embed",
+        "hr",
+        "img",
+        "input",
+        "link",
+        "meta",
+        "param",
+        "source",
+        "track",
+        "wbr",
+    )
+)
+
+
+def simple_class(selector: str) -> str | None:
+    """Returns the class name if the selector is a single class selector."""
+    match = _CLASS_SELECTOR.match(selector)
+    return match[1] if match else None
+
+
+class ContainerStreamParser(HTMLParser):
+    """Incremental HTML parser emitting the image containers as soon as they close.
+
+    Every container is returned as a tuple of the first link attributes (or None) and
+    the list of the img attributes. The links of the pagination element are
+    collected as well. Only the nested elements with the same tag name are counted
+    to find the end of the container, so the elements with optional end tags (p,
+    li) inside it do not matter."""
+
+    def __init__(
+        self,
+        container_class: str,
+        pagination_class: str | None = None,
+        image_tag: str = "img",
+        link_tag: str = "a",
+    ) -> None:
+        super().__init__(convert_charrefs=True)
+        self.container_class = container_class
+        self.pagination_class = pagination_class
+        self.image_tag = image_tag
+        self.link_tag = link_tag
+        self.pagination_links: list[str] = []
+        self.pagination_complete = False
+        self._containers: list[tuple[dict[str, str] | None, list[dict[str, str]]]] = []
+        self._container_tag: str | None = None
+        self._container_depth = 0
+        self._pagination_tag: str | None = None
+        self._pagination_depth = 0
+        self._link: dict[str, str] | None = None
+        self._images: list[dict[str, str]] = []
+
+    def pop_containers(
+        self,
+    ) -> list[tuple[dict[str, str] | None, list[dict[str, str]]]]:
+        """Returns the containers closed since the last call."""
+        containers, self._containers = self._containers, []
+        return containers
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        attributes = {name: value or "" for name, value in attrs}
+        classes = attributes.get("class", "").split()
+
+        if self._container_tag is not None:
+            if tag == self.image_tag:
+                self._images.append(attributes)
+            elif tag == self.link_tag and self._link is None:
+                self._link = attributes
+            if tag == self._container_tag:
+                self._container_depth += 1
+        elif self.container_class in classes:
+            self._container_tag, self._container_depth = tag, 1
+            self._link = attributes if tag == self.link_tag else None
+            self._images = [attributes] if tag == self.image_tag else []
+
+        if self._pagination_tag is not None:
+            if tag == "a":
+                self.pagination_links.append(attributes.get("href", "#"))
+            if tag == self._pagination_tag:
+                self._pagination_depth += 1
+        elif self.pagination_class and self.pagination_class in classes:
+            self._pagination_tag, self._pagination_depth = tag, 1
+
+        if tag in VOID_ELEMENTS:
+            self.handle_endtag(tag)
+
+    def handle_startendtag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == self._container_tag:
+            self._container_depth -= 1
+            if self._container_depth <= 0:
+                self._close_container()
+        if tag == self._pagination_tag:
+            self._pagination_depth -= 1
+            if self._pagination_depth <= 0:
+                self._close_pagination()
+
+    def close(self) -> None:
+        super().close()
+        if self._container_tag is not None:
+            self._close_container()
+        if self._pagination_tag is not None:
+            self._close_pagination()
+
+    def _close_container(self) -> None:
+        self._containers.append((self._link, self._images))
+        self._container_tag, self._link, self._images = None, None, []
+
+    def _close_pagination(self) -> None:
+        self._pagination_tag = None
+        self.pagination_complete = True
+
+
+class StreamScraper(Bs4Scraper):
+    """Scans websites for images while the page is being downloaded.
+
+    The response is read in chunks and fed into an incremental parser. The containers
+    are processed as soon as they close, so the download stops when the image from
+    last_sync_data is found. The pagination links are captured on the way and reused
+    by find_next_page, which saves a second download of the page.
+
+    Only class based container selectors are supported. For other selectors, the
+    scraper falls back to the Bs4Scraper."""
+
+    chunk_size = 16 * 1024
+
+    def __init__(
+        self, page_cache_ttl: float = 0, decompose_pages: bool = False
+    ) -> None:
+        """Constructor.
+
+        Args:
+            page_cache_ttl: for how many seconds the DOM downloaded by any scraper of
+                the process can be reused by the non-streaming fallback.
+            decompose_pages: if True, the DOM of the non-streaming fallback is torn
+                down right after the extraction."""
+        super().__init__(page_cache_ttl, decompose_pages=decompose_pages)
+
+    def get_images_data(
+        self, img_source: ImagesSource, last_sync_data: tuple[str, ...] | None = None
+    ) -> tuple[list[Image], bool]:
+        """Method that starts the synchronization process.
+        If, during synchronization, encounters an image located in last_sync_data,
+        it stops reading the page and returns True as the second argument.
+        If the synchronization is complete, the second argument will be False.
+
+        Args:
+            img_source: the ImagesSource object. Contains website data.
+            last_sync_data: URLs of recently downloaded images (img_src).
+
+        Returns: a tuple in which there is a set with Image objects and bool."""
+        plan: ExtractionPlan = img_source.extraction_plan  # type: ignore[assignment]
+        if not self.supports(plan):
+            log.debug("Unsupported selectors. Parsing the whole document.")
+            return super().get_images_data(img_source, last_sync_data)
+
+        url_address = img_source.current_url_address
+        response = img_source.transport.get(  # type: ignore[union-attr]
+            url_address, stream=True
+        )
+        if response.status_code != 200:
+            response.close()
+            return super().get_images_data(img_source, last_sync_data)
+
+        parser = self._parser(plan)
+        compiled_plan = compile_plan(plan)
+        images: list[Image] = []
+        duplicates = False
+        decoder = None
+
+        try:
+            for chunk in response.iter_content(chunk_size=self.chunk_size):
+                if decoder is None:
+                    decoder = self._decoder(img_source.domain, response, chunk)
+                parser.feed(decoder.decode(chunk))
+                duplicates = self._add_images(
+                    images, parser, img_source.domain, compiled_plan, last_sync_data
+                )
+                if duplicates:
+                    log.debug("Previously provided image found. Closing the stream.")
+                    break
+            else:
+                if decoder is not None:
+                    parser.feed(decoder.decode(b"", final=True))
+                parser.close()
+                duplicates = self._add_images(
+                    images, parser, img_source.domain, compiled_plan, last_sync_data
+                )
+        finally:
+            response.close()
+
+        if parser.pagination_complete:
+            self._remember_pagination(url_address, parser.pagination_links)
+        return images, duplicates
+
+    def peek_images(
+        self,
+        img_source: ImagesSource,
+        containers: int = 1,
+        headers: dict[str, str] | None = None,
+    ) -> tuple[Response, list[Image]]:
+        """Reads the page only until the first containers close, and drops the rest
+        of the download. The selectors must be supported by the scraper.
+
+        Args:
+            img_source: the ImagesSource object. Contains website data.
+            containers: how many containers are read.
+            headers: additional request headers, e.g. the conditional ones.
+
+        Returns: tuple containing the closed Response object and the images of the
+            first containers, in page order. No images are read if the status code
+            is not 200."""
+        plan: ExtractionPlan = img_source.extraction_plan  # type: ignore[assignment]
+        response = img_source.transport.get(  # type: ignore[union-attr]
+            img_source.current_url_address, stream=True, headers=headers or {}
+        )
+        images: list[Image] = []
+        if response.status_code != 200:
+            response.close()
+            return response, images
+
+        parser = self._parser(plan)
+        compiled_plan = compile_plan(plan)
+        decoder = None
+        try:
+            for chunk in response.iter_content(chunk_size=self.chunk_size):
+                if decoder is None:
+                    decoder = self._decoder(img_source.domain, response, chunk)
+                parser.feed(decoder.decode(chunk))
+                for link, container_images in parser.pop_containers():
+                    images.extend(
+                        Image(source=source, url_address=url_address, title=title)
+                        for source, url_address, title in self._container_images(
+                            img_source.domain, link, container_images, compiled_plan
+                        )
+                    )
+                    containers -= 1
+                    if containers <= 0:
+                        return response, images
+        finally:
+            response.close()
+        return response, images
+
+    @staticmethod
+    def supports(plan: ExtractionPlan) -> bool:
+        """Returns True if the selectors of the plan can be streamed: a single class
+        container selector and the tag image and link selectors."""
+        return (
+            simple_class(plan.container_selector) is not None
+            and _TAG_SELECTOR.match(plan.image_selector) is not None
+            and _TAG_SELECTOR.match(plan.link_selector) is not None
+        )
+
+    @staticmethod
+    def _parser(plan: ExtractionPlan) -> ContainerStreamParser:
+        return ContainerStreamParser(
+            container_class=simple_class(  # type: ignore[arg-type]
+                plan.container_selector
+            ),
+            pagination_class=simple_class(plan.pagination_selector),
+            image_tag=plan.image_selector,
+            link_tag=plan.link_selector,
+        )
+
+    @staticmethod
+    def _decoder(
+        site: str, response: Response, head: bytes
+    ) -> codecs.IncrementalDecoder:
+        """Returns the incremental decoder of the streamed page. The encoding is
+        chosen from the headers and the first chunk, without the charset detection."""
+        encoding = SITE_ENCODINGS.for_head(site, response.headers, head)
+        return codecs.getincrementaldecoder(encoding)(errors="replace")
+
+    def _add_images(
+        self,
+        images: list[Image],
+        parser: ContainerStreamParser,
+        domain: str,
+        plan: CompiledExtractionPlan,
+        last_sync_data: tuple[str, ...] | None,
+    ) -> bool:
+        """Converts the closed containers into Image objects.
+
+        Returns: True if an image from last_sync_data was found."""
+        for link, container_images in parser.pop_containers():
+            images_data = self._container_images(domain, link, container_images, plan)
+            for image_data in reversed(images_data):
+                if last_sync_data and image_data[1] in last_sync_data:
+                    return True
+                images.append(
+                    Image(
+                        source=image_data[0],
+                        url_address=image_data[1],
+                        title=image_data[2],
+                    )
+                )
+        return False
+
+    def _container_images(
+        self,
+        domain: str,
+        link: dict[str, str] | None,
+        container_images: list[dict[str, str]],
+        plan: CompiledExtractionPlan,
+    ) -> list[tuple[str, str, str]]:
+        """Returns the data of the images of the closed container. The broken images
+        are skipped."""
+        images_data = []
+        for image in container_images:
+            try:
+                image_data = self._image_data(domain, link, image, plan)
+            except (TypeError, KeyError):
+                log.exception("Encountered an issue. The image is being skipped.")
+                continue
+            if image_data:
+                images_data.append(image_data)
+        return images_data
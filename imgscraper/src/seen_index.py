@@ -0,0 +1,223 @@
+import mmap
+import os
+import struct
+from hashlib import blake2b
+from logging import getLogger
+from pathlib import Path
+from threading import Lock
+from types import TracebackType
+from typing import Iterable
+
+log = getLogger(__name__)
+
+MAGIC = b"IMGSEEN1"
+HEADER = struct.Struct("<8sQQ")
+SLOT_SIZE = 8
+MAX_LOAD = 0.7
+
+
+def fingerprint(url_address: str) -> int:
+    """Returns the 64-bit fingerprint of the URL address. Zero marks the empty slots,
+    so it is never returned."""
+    digest = blake2b(url_address.encode(), digest_size=SLOT_SIZE).digest()
+    return int.from_bytes(digest, "little") or 1
+
+
+class UrlFingerprints(set[int]):
+    """Set of the URL addresses kept as 64-bit fingerprints instead of the strings.
+    Supports adding the URL addresses and checking the membership."""
+
+    def __init__(self, url_addresses: Iterable[str] = ()) -> None:
+        super().__init__(fingerprint(url_address) for url_address in url_addresses)
+
+    def add(self, url_address: str) -> None:  # type: ignore[override]
+        super().add(fingerprint(url_address))
+
+    def update(self, *url_addresses: Iterable[str]) -> None:  # type: ignore[override]
+        for addresses in url_addresses:
+            super().update(fingerprint(url_address) for url_address in addresses)
+
+    def discard(self, url_address: str) -> None:  # type: ignore[override]
+        super().discard(fingerprint(url_address))
+
+    def __contains__(self, url_address: object) -> bool:
+        return isinstance(url_address, str) and super().__contains__(
+            fingerprint(url_address)
+        )
+
+    def __repr__(self) -> str:
+        return f"<{len(self)} URL fingerprints>"
+
+
+class SeenUrlIndex:
+    """Persistent set of the image URL addresses seen by the previous syncs.
+
+    The index is an open-addressing hash table of 64-bit URL fingerprints with linear
+    probing, stored in a memory-mapped file, so only the touched pages are loaded and
+    the pages are shared by all processes opening the file. The index is append-only.
+    When it gets too full, it is rebuilt with twice the capacity in a new file, which
+    atomically replaces the old one; the read-only instances notice the replacement
+    and map the new file.
+
+    There should be a single writer per file. The workers open the index read-only.
+    On Windows, a mapped file cannot be replaced, so the read-only instances must be
+    closed while the writer grows the index."""
+
+    def __init__(
+        self, path: str | Path, capacity: int = 1 << 20, readonly: bool = False
+    ) -> None:
+        """Constructor.
+
+        Args:
+            path: location of the index file. Created if it does not exist.
+            capacity: initial number of slots, rounded up to a power of two.
+            readonly: if True, the index can only be queried."""
+        self.path = Path(path)
+        self.readonly = readonly
+        self._lock = Lock()
+        if not self.path.exists():
+            if readonly:
+                raise FileNotFoundError(f"Seen URL index {self.path} does not exist.")
+            self._create(self.path, capacity)
+        self._open()
+
+    @staticmethod
+    def _create(path: Path, capacity: int) -> None:
+        capacity = 1 << max(capacity - 1, 1).bit_length()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("wb") as file:
+            file.write(HEADER.pack(MAGIC, capacity, 0))
+            file.truncate(HEADER.size + capacity * SLOT_SIZE)
+
+    def _open(self) -> None:
+        with self.path.open("rb" if self.readonly else "r+b") as file:
+            self._inode = os.fstat(file.fileno()).st_ino
+            self._mmap = mmap.mmap(
+                file.fileno(),
+                0,
+                access=mmap.ACCESS_READ if self.readonly else mmap.ACCESS_WRITE,
+            )
+        magic, self._capacity, _ = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{self.path} is not a seen URL index.")
+        self._slots = memoryview(self._mmap)[HEADER.size :].cast("Q")
+
+    def close(self) -> None:
+        with self._lock:
+            self._close()
+
+    def _close(self) -> None:
+        self._slots.release()
+        if not self.readonly:
+            self._mmap.flush()
+        self._mmap.close()
+
+    def __enter__(self) -> "SeenUrlIndex":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return HEADER.unpack_from(self._mmap)[2]
+
+    def __contains__(self, url_address: str) -> bool:
+        return self.contains_many([url_address])[0]
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def _find(self, value: int) -> tuple[bool, int]:
+        """Returns whether the fingerprint is present and the index of its slot (or
+        of the empty slot, where it should be inserted)."""
+        mask = self._capacity - 1
+        slot = value & mask
+        while True:
+            current = self._slots[slot]
+            if current == value:
+                return True, slot
+            if current == 0:
+                return False, slot
+            slot = (slot + 1) & mask
+
+    def _refresh(self) -> None:
+        """Maps the file again, if the writer has replaced it with a bigger one."""
+        try:
+            replaced = os.stat(self.path).st_ino != self._inode
+        except FileNotFoundError:
+            return
+        if replaced:
+            self._close()
+            self._open()
+
+    def contains_many(self, url_addresses: Iterable[str]) -> list[bool]:
+        """Checks which URL addresses have been seen.
+
+        Args:
+            url_addresses: the URL addresses to check.
+
+        Returns: list of flags, in order of the URL addresses."""
+        with self._lock:
+            if self.readonly:
+                self._refresh()
+            return [self._find(fingerprint(url))[0] for url in url_addresses]
+
+    def add_many(self, url_addresses: Iterable[str]) -> int:
+        """Adds the URL addresses to the index.
+
+        Args:
+            url_addresses: the URL addresses to add.
+
+        Returns: number of the URL addresses that were not present before."""
+        if self.readonly:
+            raise ValueError("The seen URL index is opened read-only.")
+
+        values = {fingerprint(url) for url in url_addresses}
+        with self._lock:
+            count = len(self)
+            if count + len(values) > self._capacity * MAX_LOAD:
+                self._grow(count + len(values))
+
+            added = 0
+            for value in values:
+                found, slot = self._find(value)
+                if not found:
+                    self._slots[slot] = value
+                    added += 1
+            HEADER.pack_into(self._mmap, 0, MAGIC, self._capacity, count + added)
+            self._mmap.flush()
+        return added
+
+    def _grow(self, required: int) -> None:
+        """Rebuilds the index in a new file with enough capacity for required
+        fingerprints, and replaces the current file with it."""
+        capacity = self._capacity
+        while required > capacity * MAX_LOAD:
+            capacity *= 2
+        log.info("Growing seen URL index %s to %s slots.", self.path, capacity)
+
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        self._create(tmp_path, capacity)
+        old_slots, old_mmap, count = self._slots, self._mmap, len(self)
+        self.path, original_path = tmp_path, self.path
+        self._open()
+        for value in old_slots:
+            if value:
+                self._slots[self._find(value)[1]] = value
+        HEADER.pack_into(self._mmap, 0, MAGIC, self._capacity, count)
+
+        # Windows refuses to replace the files which are mapped or open, so both
+        # maps are closed first, and the new file is mapped again at its final path.
+        old_slots.release()
+        old_mmap.close()
+        self._close()
+        os.replace(tmp_path, original_path)
+        self.path = original_path
+        self._open()
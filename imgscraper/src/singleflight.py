@@ -0,0 +1,105 @@
+from collections import OrderedDict
+from logging import getLogger
+from threading import Event, Lock
+from time import monotonic
+from typing import Any, Callable, Hashable
+
+log = getLogger(__name__)
+
+
+class _Call:
+    """The call in flight, awaited by the callers sharing its key."""
+
+    def __init__(self) -> None:
+        self.done = Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """Coalesces the concurrent calls with the same key: the first caller runs the
+    function, and the others wait for its result (or its error). The results can be
+    kept for a short time, so the callers arriving a moment later get them as well.
+
+    Every caller decides how old result it accepts, so the scrapers sharing pages
+    can use different max_age values. The waiting callers give up after
+    wait_timeout and run the function themselves."""
+
+    def __init__(self, max_entries: int = 128, wait_timeout: float = 30) -> None:
+        """Constructor.
+
+        Args:
+            max_entries: the limit of the kept results. The oldest ones are removed
+                first.
+            wait_timeout: how many seconds the caller waits for the call in flight
+                before running the function itself."""
+        self.max_entries = max_entries
+        self.wait_timeout = wait_timeout
+        self.calls = 0
+        self.shared = 0
+        self._lock = Lock()
+        self._in_flight: dict[Hashable, _Call] = {}
+        self._results: OrderedDict[Hashable, tuple[float, float, Any]] = OrderedDict()
+
+    def do(self, key: Hashable, function: Callable[[], Any], max_age: float = 0) -> Any:
+        """Returns the result of the function, sharing it with the concurrent calls.
+
+        Args:
+            key: identifies the calls with the same result, e.g. the URL address.
+            function: the function computing the result.
+            max_age: how old (in seconds) the kept result can be. If 0, only the
+                call in flight is shared, and the result is not kept.
+
+        Returns: the result of the function."""
+        with self._lock:
+            self.calls += 1
+            if max_age > 0 and key in self._results:
+                stored_at, expires_at, result = self._results[key]
+                now = monotonic()
+                if now - stored_at <= max_age and now < expires_at:
+                    self.shared += 1
+                    return result
+            call = self._in_flight.get(key)
+            leader = call is None
+            if call is None:
+                call = self._in_flight[key] = _Call()
+            else:
+                self.shared += 1
+
+        if not leader:
+            if not call.done.wait(self.wait_timeout):
+                log.warning("Call %s in flight for too long. Running it again.", key)
+                return function()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+                if max_age > 0 and call.error is None:
+                    now = monotonic()
+                    self._results.pop(key, None)
+                    self._results[key] = (now, now + max_age, call.result)
+                    self._evict(now)
+            call.done.set()
+        return call.result
+
+    def _evict(self, now: float) -> None:
+        expired = [key for key, entry in self._results.items() if entry[1] <= now]
+        for key in expired:
+            del self._results[key]
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._results.clear()
+
+
+SHARED_PAGES = SingleFlight()
@@ -0,0 +1,240 @@
+import json
+import sqlite3
+from abc import ABC, abstractmethod
+from logging import getLogger
+from pathlib import Path
+from queue import Empty, Full, Queue
+from threading import Event, Lock, Thread
+from time import monotonic, time
+from typing import Callable
+
+from imgscraper.src.models import Image
+
+log = getLogger(__name__)
+
+
+class Sink(ABC):
+    """Destination of the scraped images. start_sync streams the images of every
+    page to the sink, and a background thread writes them in batches.
+
+    The batch is written when it reaches batch_size or when flush_interval has passed
+    since its first image. If the sink falls behind and max_pending_pages pages are
+    waiting, the crawl is blocked until the writer catches up."""
+
+    def __init__(
+        self,
+        batch_size: int = 500,
+        flush_interval: float = 1,
+        max_pending_pages: int = 8,
+    ) -> None:
+        """Constructor.
+
+        Args:
+            batch_size: how many images are written at once.
+            flush_interval: the maximum delay in seconds of the buffered images.
+            max_pending_pages: how many scraped pages can wait for the writer."""
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending_pages = max_pending_pages
+        self.lock = Lock()
+
+    @abstractmethod
+    def write_batch(self, images: list[Image]) -> None:
+        """Writes the images. Called by one writer thread at a time.
+
+        Args:
+            images: the batch of the images."""
+
+    def close(self) -> None:
+        """Releases the resources of the sink."""
+
+
+class SQLiteSink(Sink):
+    """Writes the images to the SQLite table. Every batch is inserted with a single
+    executemany call in one transaction. The images already present in the table
+    are skipped."""
+
+    def __init__(
+        self, path: str | Path, table: str = "images", timeout: float = 30, **kwargs
+    ) -> None:
+        """Constructor.
+
+        Args:
+            path: location of the SQLite file.
+            table: name of the table.
+            timeout: how many seconds to wait for a lock held by another process.
+            kwargs: the Sink arguments."""
+        super().__init__(**kwargs)
+        self.path = Path(path)
+        self.table = table
+        self._connection = sqlite3.connect(
+            self.path, timeout=timeout, isolation_level=None, check_same_thread=False
+        )
+        self._connection.execute(
+            f"""CREATE TABLE IF NOT EXISTS {table} (
+                url_address TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                title TEXT NOT NULL,
+                synced_at REAL NOT NULL
+            )"""
+        )
+
+    def write_batch(self, images: list[Image]) -> None:
+        synced_at = time()
+        self._connection.execute("BEGIN")
+        try:
+            self._connection.executemany(
+                f"""INSERT OR IGNORE INTO {self.table}
+                (url_address, source, title, synced_at) VALUES (?, ?, ?, ?)""",
+                [
+                    (image.url_address, image.source, image.title, synced_at)
+                    for image in images
+                ],
+            )
+            self._connection.execute("COMMIT")
+        except sqlite3.Error:
+            self._connection.execute("ROLLBACK")
+            raise
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+class NdjsonSink(Sink):
+    """Appends the images to the file, one JSON object per line."""
+
+    def __init__(self, path: str | Path, **kwargs) -> None:
+        """Constructor.
+
+        Args:
+            path: location of the NDJSON file.
+            kwargs: the Sink arguments."""
+        super().__init__(**kwargs)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self.path.open("a", encoding="utf-8")
+
+    def write_batch(self, images: list[Image]) -> None:
+        self._file.write(
+            "".join(
+                json.dumps(image.as_dict(), ensure_ascii=False) + "\n"
+                for image in images
+            )
+        )
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class CallbackSink(Sink):
+    """Passes every batch to the callback, e.g. a message queue producer."""
+
+    def __init__(self, callback: Callable[[list[Image]], None], **kwargs) -> None:
+        """Constructor.
+
+        Args:
+            callback: function called with every batch of the images.
+            kwargs: the Sink arguments."""
+        super().__init__(**kwargs)
+        self.callback = callback
+
+    def write_batch(self, images: list[Image]) -> None:
+        self.callback(images)
+
+
+class SinkWriter:
+    """Background thread writing the images of a single sync to the sink."""
+
+    _CLOSE = None
+
+    def __init__(self, sink: Sink, thread_name: str = "imgscraper-sink") -> None:
+        """Constructor.
+
+        Args:
+            sink: the Sink object.
+            thread_name: name of the writer thread."""
+        self.sink = sink
+        self.blocked_time = 0.0
+        self.written = 0
+        self._pages: Queue[list[Image] | Event | None] = Queue(sink.max_pending_pages)
+        self._error: BaseException | None = None
+        self._thread = Thread(target=self._run, name=thread_name, daemon=True)
+        self._thread.start()
+
+    def put(self, images: list[Image]) -> None:
+        """Hands the images of the page to the writer. Blocks while the writer is
+        behind.
+
+        Raises: the error of the sink, if the writing has failed."""
+        self._raise_error()
+        if not images:
+            return
+        try:
+            self._pages.put_nowait(list(images))
+        except Full:
+            start = monotonic()
+            self._pages.put(list(images))
+            self.blocked_time += monotonic() - start
+            log.debug("Crawl blocked by the sink for %.3fs.", monotonic() - start)
+
+    def flush(self) -> None:
+        """Writes the buffered images and waits until they are written.
+
+        Raises: the error of the sink, if the writing has failed."""
+        flushed = Event()
+        self._pages.put(flushed)
+        flushed.wait()
+        self._raise_error()
+
+    def close(self) -> None:
+        """Writes the buffered images and stops the thread.
+
+        Raises: the error of the sink, if the writing has failed."""
+        self._pages.put(self._CLOSE)
+        self._thread.join()
+        self._raise_error()
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    def _run(self) -> None:
+        batch: list[Image] = []
+        deadline = 0.0
+        while True:
+            timeout = max(deadline - monotonic(), 0) if batch else None
+            try:
+                page = self._pages.get(timeout=timeout)
+            except Empty:
+                page = []
+            if isinstance(page, Event):
+                if batch:
+                    self._write(batch)
+                    batch = []
+                page.set()
+                continue
+            if page:
+                if not batch:
+                    deadline = monotonic() + self.sink.flush_interval
+                batch.extend(page)
+            while len(batch) >= self.sink.batch_size:
+                self._write(batch[: self.sink.batch_size])
+                batch = batch[self.sink.batch_size :]
+            if batch and (page is None or monotonic() >= deadline):
+                self._write(batch)
+                batch = []
+            if page is None:
+                return
+
+    def _write(self, batch: list[Image]) -> None:
+        if self._error is not None:
+            return
+        try:
+            with self.sink.lock:
+                self.sink.write_batch(batch)
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            log.exception("Unable to write the images to the sink.")
+            self._error = error
+            return
+        self.written += len(batch)
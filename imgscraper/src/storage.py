@@ -0,0 +1,57 @@
+import json
+from logging import getLogger
+from pathlib import Path
+from threading import Lock
+from typing import Any
+
+log = getLogger(__name__)
+
+
+class JsonStore:
+    """Small key-value store used to persist per-site data between runs.
+
+    The data is kept in memory and, if a path is provided, mirrored into a JSON file
+    after every change."""
+
+    def __init__(self, path: str | Path | None = None) -> None:
+        """Constructor.
+
+        Args:
+            path: location of the JSON file. If None, the data lives only in memory."""
+        self.path = Path(path) if path is not None else None
+        self._lock = Lock()
+        self._data: dict[str, Any] = self._load()
+
+    def _load(self) -> dict[str, Any]:
+        if self.path is None or not self.path.exists():
+            return {}
+        try:
+            with self.path.open(encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            log.exception("Unable to read %s. Starting with empty data.", self.path)
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            return self._data.get(key, default)
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._save()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if self._data.pop(key, None) is not None:
+                self._save()
+
+    def _save(self) -> None:
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as file:
+            json.dump(self._data, file)
+        tmp_path.replace(self.path)
@@ -0,0 +1,405 @@
+import socket
+from abc import ABC, abstractmethod
+from logging import getLogger
+from time import perf_counter, sleep
+from typing import Any, Hashable, Iterator, cast
+from urllib.parse import urlsplit
+
+from bepatient import wait_for_value_in_request
+from requests import HTTPError, Request, Response, Session
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from imgscraper.src.budget import BudgetExhausted, BudgetTracker
+from imgscraper.src.circuit_breaker import BREAKERS, CircuitBreakerRegistry
+from imgscraper.src.dns_cache import DnsCache
+from imgscraper.src.models import PrewarmResult
+
+log = getLogger(__name__)
+
+
+class Transport(ABC):
+    """Downloads the pages for the scrapers. The responses are requests.Response
+    objects, regardless of the HTTP client used."""
+
+    retries = 1
+    delay = 0
+
+    @abstractmethod
+    def get(self, url_address: str, stream: bool = False, **kwargs: Any) -> Response:
+        """Sends a single GET request.
+
+        Args:
+            url_address: the URL address to download.
+            stream: if True, the body is read lazily with Response.iter_content.
+            kwargs: additional options, e.g. headers or timeout.
+
+        Returns: the Response object."""
+
+    def fetch(self, url_address: str, **kwargs: Any) -> Response:
+        """Downloads the page, retrying until the status code is 200. Sends at most
+        retries requests, waiting delay seconds between them.
+
+        Args:
+            url_address: the URL address to download.
+            kwargs: additional options, e.g. headers or timeout.
+
+        Returns: the Response object with status code 200.
+
+        Raises:
+            HTTPError: if none of the responses had status code 200."""
+        for attempt in range(max(self.retries, 1)):
+            response = self.get(url_address, **kwargs)
+            if response.status_code == 200:
+                return response
+            log.info(
+                "Unexpected status code %s. Attempt %s, waiting %s seconds.",
+                response.status_code,
+                attempt + 1,
+                self.delay,
+            )
+            self._wait_before_retry(url_address)
+        raise HTTPError(
+            f"{url_address} returned status code {response.status_code}.",
+            response=response,
+        )
+
+    def _wait_before_retry(self, url_address: str) -> None:
+        sleep(self.delay)
+
+    def prewarm(self, url_address: str) -> PrewarmResult | None:
+        """Resolves the host and opens the keep-alive connection ahead of the first
+        request.
+
+        Args:
+            url_address: URL address of the page, which will be downloaded soon.
+
+        Returns: PrewarmResult object or None, if the transport does not support
+            pre-warming."""
+        return None
+
+    def share_key(self) -> Hashable:
+        """Identifies the transports whose responses are interchangeable. The
+        scrapers share the pages downloaded with the transports of the same key.
+
+        Returns: the transport itself, unless the subclass knows better."""
+        return self
+
+    def close(self) -> None:
+        """Releases the connections."""
+
+
+class RequestsTransport(Transport):
+    """HTTP/1.1 transport based on the requests.Session connection pool."""
+
+    def __init__(self, session: Session, retries: int = 60, delay: int = 1) -> None:
+        """Constructor.
+
+        Args:
+            session: the Session object used to send the requests.
+            retries: how many times fetch sends the request before giving up.
+            delay: the delay in seconds between the retries."""
+        self.session = session
+        self.retries = retries
+        self.delay = delay
+
+    def get(self, url_address: str, stream: bool = False, **kwargs: Any) -> Response:
+        return self.session.get(url=url_address, stream=stream, **kwargs)
+
+    def share_key(self) -> Hashable:
+        return self.session
+
+    def fetch(self, url_address: str, **kwargs: Any) -> Response:
+        return wait_for_value_in_request(
+            request=self.get(url_address, **kwargs),
+            session=self.session,
+            retries=self.retries,
+            delay=self.delay,
+        )
+
+    def prewarm(self, url_address: str) -> PrewarmResult:
+        """Resolves the host and sends a HEAD request through the connection pool of
+        the session, so the connection (after the TLS handshake) is kept in the pool,
+        and the first request of the sync does not pay the setup latency."""
+        parts = urlsplit(url_address)
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        start = perf_counter()
+        socket.getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM)
+        dns_time = perf_counter() - start
+
+        pool = self._connection_pool(url_address)
+        connections = pool.num_connections
+        start = perf_counter()
+        response = pool.urlopen(
+            "HEAD",
+            parts.path or "/",
+            headers=dict(self.session.headers),
+            retries=False,
+            redirect=False,
+            preload_content=False,
+        )
+        response.drain_conn()
+        response.release_conn()
+        result = PrewarmResult(
+            host=parts.netloc,
+            dns_time=dns_time,
+            connect_time=perf_counter() - start,
+            reused=pool.num_connections == connections,
+            dns_cached=isinstance(
+                getattr(socket.getaddrinfo, "__self__", None), DnsCache
+            ),
+        )
+        log.debug("%s pre-warmed: %s.", url_address, result)
+        return result
+
+    def _connection_pool(self, url_address: str) -> Any:
+        """Returns the urllib3 connection pool used by the session for the URL."""
+        adapter = cast(HTTPAdapter, self.session.get_adapter(url_address))
+        # The same settings as in Session.request, so the pool key matches.
+        settings = self.session.merge_environment_settings(
+            url_address, {}, None, None, None
+        )
+        if hasattr(adapter, "get_connection_with_tls_context"):
+            return adapter.get_connection_with_tls_context(
+                Request("GET", url_address).prepare(),
+                verify=settings["verify"],
+                proxies=settings["proxies"],
+                cert=settings["cert"],
+            )
+        return adapter.get_connection(url_address, settings["proxies"])
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class _StreamedBody:
+    """File-like view of the httpx response body, used as Response.raw."""
+
+    def __init__(self, response: Any) -> None:
+        self._response = response
+        self._chunks = response.iter_bytes()
+        self._buffer = b""
+
+    def read(self, size: int = -1, **_: Any) -> bytes:
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if size < 0:
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def close(self) -> None:
+        self._response.close()
+
+
+class Http2Transport(Transport):
+    """HTTP/2 transport based on httpx. All requests to a host are multiplexed over
+    a single connection. Requires the optional httpx[http2] dependency."""
+
+    def __init__(
+        self,
+        session: Session | None = None,
+        retries: int = 60,
+        delay: int = 1,
+        http1: bool = True,
+        max_connections: int = 100,
+        timeout: float = 30,
+    ) -> None:
+        """Constructor.
+
+        Args:
+            session: headers and cookies of the Session are copied to the client.
+            retries: how many times fetch sends the request before giving up.
+            delay: the delay in seconds between the retries.
+            http1: if False, HTTP/2 is used without negotiation (prior knowledge),
+                also for the plain http URLs.
+            max_connections: the limit of the open connections.
+            timeout: the default request timeout in seconds."""
+        try:
+            import httpx  # pylint: disable=import-outside-toplevel
+        except ImportError as error:
+            raise ImportError(
+                "Http2Transport requires httpx. Install imgscraper[http2]."
+            ) from error
+
+        self.retries = retries
+        self.delay = delay
+        self.timeout = timeout
+        self.client = httpx.Client(
+            http1=http1,
+            http2=True,
+            headers=dict(session.headers) if session is not None else None,
+            cookies=session.cookies if session is not None else None,
+            limits=httpx.Limits(max_connections=max_connections),
+            timeout=timeout,
+            follow_redirects=True,
+        )
+
+    def get(self, url_address: str, stream: bool = False, **kwargs: Any) -> Response:
+        request = self.client.build_request(
+            "GET",
+            url_address,
+            headers=kwargs.get("headers"),
+            timeout=kwargs.get("timeout", self.client.timeout),
+        )
+        httpx_response = self.client.send(request, stream=stream)
+        response = Response()
+        response.status_code = httpx_response.status_code
+        response.reason = httpx_response.reason_phrase
+        response.url = str(httpx_response.url)
+        response.headers = CaseInsensitiveDict(httpx_response.headers)
+        response.encoding = httpx_response.charset_encoding
+        if stream:
+            response.raw = _StreamedBody(httpx_response)
+        else:
+            response._content = httpx_response.content
+            response._content_consumed = True
+        return response
+
+    def close(self) -> None:
+        self.client.close()
+
+
+class _CountedBody:
+    """Wraps the raw stream of the response and charges the read bytes."""
+
+    def __init__(self, raw: Any, tracker: BudgetTracker) -> None:
+        self._raw = raw
+        self._tracker = tracker
+
+    def read(self, *args: Any, **kwargs: Any) -> bytes:
+        data = self._raw.read(*args, **kwargs)
+        self._tracker.add_bytes(len(data))
+        self._tracker.check_transfer()
+        return data
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._raw, name)
+
+
+class _CountedStream(_CountedBody):
+    """_CountedBody of the urllib3 responses, which are read with stream()."""
+
+    def stream(self, *args: Any, **kwargs: Any) -> Iterator[bytes]:
+        for chunk in self._raw.stream(*args, **kwargs):
+            self._tracker.add_bytes(len(chunk))
+            self._tracker.check_transfer()
+            yield chunk
+
+
+class BudgetedTransport(Transport):
+    """Sends the requests with the wrapped transport while the budget lasts. The
+    request timeouts are derived from the remaining time. The bytes of the streamed
+    responses are charged while they are read, so the download is interrupted when
+    the budget runs out."""
+
+    def __init__(self, transport: Transport, tracker: BudgetTracker) -> None:
+        """Constructor.
+
+        Args:
+            transport: the Transport object used to download the pages.
+            tracker: the BudgetTracker object of the sync."""
+        self.transport = transport
+        self.tracker = tracker
+        self.retries = getattr(transport, "retries", 1)
+        self.delay = getattr(transport, "delay", 0)
+
+    def get(self, url_address: str, stream: bool = False, **kwargs: Any) -> Response:
+        try:
+            self.tracker.start_request()
+        except BudgetExhausted as error:
+            error.url_address = url_address
+            raise
+        timeout = self.tracker.request_timeout(
+            kwargs.get("timeout", self._default_timeout())
+        )
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        try:
+            response = self.transport.get(url_address, stream=stream, **kwargs)
+        except Exception as error:
+            remaining_time = self.tracker.remaining_time()
+            if remaining_time is not None and remaining_time <= 0:
+                raise BudgetExhausted(
+                    f"Time budget exceeded by {url_address}.", url_address
+                ) from error
+            raise
+        if stream:
+            body = _CountedStream if hasattr(response.raw, "stream") else _CountedBody
+            response.raw = body(response.raw, self.tracker)
+        else:
+            self.tracker.add_bytes(len(response.content))
+        return response
+
+    def _default_timeout(self) -> Any:
+        """Returns the default request timeout of the wrapped transports, if any."""
+        transport: Any = self.transport
+        while transport is not None:
+            if getattr(transport, "timeout", None) is not None:
+                return transport.timeout
+            transport = getattr(transport, "transport", None)
+        return None
+
+    def _wait_before_retry(self, url_address: str) -> None:
+        remaining_time = self.tracker.remaining_time()
+        if remaining_time is not None and remaining_time <= self.delay:
+            raise BudgetExhausted(f"No time left to retry {url_address}.", url_address)
+        sleep(self.delay)
+
+    def share_key(self) -> Hashable:
+        return self.transport.share_key()
+
+    def prewarm(self, url_address: str) -> PrewarmResult | None:
+        return self.transport.prewarm(url_address)
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class CircuitBreakerTransport(Transport):
+    """Sends the requests with the wrapped transport through the circuit breaker of
+    the host. The errors and the server failures (5xx, 429) open the circuit, and
+    then the requests to the host raise CircuitOpenError without touching the
+    network, also during the fetch retries."""
+
+    def __init__(
+        self, transport: Transport, breakers: CircuitBreakerRegistry = BREAKERS
+    ) -> None:
+        """Constructor.
+
+        Args:
+            transport: the Transport object used to download the pages.
+            breakers: the registry of the circuit breakers. By default, the registry
+                shared by the whole process."""
+        self.transport = transport
+        self.breakers = breakers
+        self.retries = getattr(transport, "retries", 1)
+        self.delay = getattr(transport, "delay", 0)
+
+    def get(self, url_address: str, stream: bool = False, **kwargs: Any) -> Response:
+        breaker = self.breakers.get(url_address)
+        breaker.before_call()
+        start = perf_counter()
+        try:
+            response = self.transport.get(url_address, stream=stream, **kwargs)
+        except Exception:
+            breaker.record(success=False, latency=perf_counter() - start)
+            raise
+        breaker.record(
+            success=response.status_code < 500 and response.status_code != 429,
+            latency=perf_counter() - start,
+        )
+        return response
+
+    def share_key(self) -> Hashable:
+        return self.transport.share_key()
+
+    def prewarm(self, url_address: str) -> PrewarmResult | None:
+        return self.transport.prewarm(url_address)
+
+    def close(self) -> None:
+        self.transport.close()
@@ -0,0 +1,419 @@
+import gzip
+import io
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from logging import getLogger
+from pathlib import Path
+from random import Random
+from threading import Lock
+from time import sleep
+from typing import Any, Callable, Iterator
+from urllib.parse import urlsplit
+from uuid import uuid4
+
+from requests import HTTPError, Response
+from requests.structures import CaseInsensitiveDict
+
+from imgscraper.src.encoding import declared_charset
+from imgscraper.src.models import PrewarmResult
+from imgscraper.src.transport import Transport
+
+log = getLogger(__name__)
+
+WARC_VERSION = b"WARC/1.0"
+# Headers describing the encoding of the original bytes. The recorded body is
+# already decoded, so they are not written to the archive.
+ENCODING_HEADERS = ("content-encoding", "transfer-encoding", "content-length")
+
+
+@dataclass
+class WarcRecord:
+    headers: dict[str, str]
+    block: bytes = field(repr=False)
+
+    @property
+    def record_type(self) -> str:
+        return self.headers.get("WARC-Type", "")
+
+    @property
+    def target_uri(self) -> str:
+        return self.headers.get("WARC-Target-URI", "")
+
+
+@dataclass
+class HttpMessage:
+    status_code: int
+    reason: str
+    headers: CaseInsensitiveDict[str]
+    body: bytes = field(repr=False)
+
+
+def read_warc(path: str | Path) -> Iterator[WarcRecord]:
+    """Reads the records of the WARC file. Gzipped archives (.warc.gz, one gzip member
+    per record or per file) are supported.
+
+    Args:
+        path: location of the WARC file."""
+    with Path(path).open("rb") as raw_file:
+        compressed = raw_file.read(2) == b"\x1f\x8b"
+    opener = gzip.open if compressed else open
+    with opener(path, "rb") as file:
+        while True:
+            line = file.readline()
+            if not line:
+                return
+            if not line.strip():
+                continue
+            if not line.startswith(b"WARC/"):
+                raise ValueError(f"Invalid WARC record header in {path}: {line!r}.")
+            headers = _read_headers(file)
+            block = file.read(int(headers.get("Content-Length", 0)))
+            yield WarcRecord(headers=headers, block=block)
+
+
+def _read_headers(file: io.BufferedIOBase) -> dict[str, str]:
+    headers = {}
+    for line in iter(file.readline, b""):
+        if not line.strip():
+            break
+        name, _, value = line.decode("utf-8").partition(":")
+        headers[name.strip()] = value.strip()
+    return headers
+
+
+def parse_http_response(block: bytes) -> HttpMessage:
+    """Parses the HTTP response stored in the WARC response record. The chunked and
+    compressed bodies of the archives made by other tools are decoded.
+
+    Args:
+        block: the content of the record."""
+    head, _, body = block.partition(b"\r\n\r\n")
+    status_line, *header_lines = head.decode("iso-8859-1").split("\r\n")
+    _, status_code, *reason = status_line.split(" ", 2)
+    headers: CaseInsensitiveDict[str] = CaseInsensitiveDict()
+    for line in header_lines:
+        name, _, value = line.partition(":")
+        headers[name.strip()] = value.strip()
+
+    if headers.get("Transfer-Encoding", "").lower() == "chunked":
+        body = _dechunk(body)
+    encoding = headers.get("Content-Encoding", "").lower()
+    if encoding in ("gzip", "x-gzip"):
+        body = gzip.decompress(body)
+    elif encoding == "deflate":
+        body = zlib.decompress(body)
+    for name in ENCODING_HEADERS:
+        headers.pop(name, None)
+    headers["Content-Length"] = str(len(body))
+
+    return HttpMessage(
+        status_code=int(status_code),
+        reason=reason[0] if reason else "",
+        headers=headers,
+        body=body,
+    )
+
+
+def _dechunk(body: bytes) -> bytes:
+    data = io.BytesIO(body)
+    chunks: list[bytes] = []
+    while True:
+        size = int(data.readline().split(b";")[0].strip() or b"0", 16)
+        if size == 0:
+            return b"".join(chunks)
+        chunks.append(data.read(size))
+        data.readline()
+
+
+def build_response(
+    url_address: str, message: HttpMessage, stream: bool = False
+) -> Response:
+    """Builds the requests.Response object from the stored HTTP message."""
+    response = Response()
+    response.status_code = message.status_code
+    response.reason = message.reason
+    response.url = url_address
+    response.headers = CaseInsensitiveDict(message.headers)
+    response.encoding = declared_charset(message.headers)
+    if stream:
+        response.raw = io.BytesIO(message.body)
+    else:
+        response._content = message.body  # pylint: disable=protected-access
+        response._content_consumed = True  # pylint: disable=protected-access
+    return response
+
+
+class WarcWriter:
+    """Appends the request and response records to the WARC file."""
+
+    def __init__(self, path: str | Path, compress: bool | None = None) -> None:
+        """Constructor.
+
+        Args:
+            path: location of the WARC file.
+            compress: if True, every record is a separate gzip member. By default,
+                compression is used for the ".gz" files."""
+        self.path = Path(path)
+        self.compress = self.path.suffix == ".gz" if compress is None else compress
+        self._lock = Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def write_exchange(
+        self, response: Response, body: bytes | None = None, truncated: bool = False
+    ) -> None:
+        """Writes the request and the response records of the downloaded page.
+
+        Args:
+            response: the Response object.
+            body: the downloaded body. By default, the content of the response.
+            truncated: if True, the body is marked as cut short by the client."""
+        body = response.content if body is None else body
+        url_address = response.url
+        date = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        response_id = f"<urn:uuid:{uuid4()}>"
+
+        headers = {
+            name: value
+            for name, value in response.headers.items()
+            if name.lower() not in ENCODING_HEADERS
+        }
+        headers["Content-Length"] = str(len(body))
+        response_block = (
+            f"HTTP/1.1 {response.status_code} {response.reason or ''}\r\n".encode()
+            + _encode_headers(headers)
+            + body
+        )
+
+        parts = urlsplit(url_address)
+        request_headers = dict(getattr(response.request, "headers", None) or {})
+        request_headers.setdefault("Host", parts.netloc)
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        request_block = f"GET {path} HTTP/1.1\r\n".encode() + _encode_headers(
+            request_headers
+        )
+
+        records = self._record(
+            "response",
+            url_address,
+            date,
+            response_id,
+            "application/http; msgtype=response",
+            response_block,
+            truncated=truncated,
+        ) + self._record(
+            "request",
+            url_address,
+            date,
+            f"<urn:uuid:{uuid4()}>",
+            "application/http; msgtype=request",
+            request_block,
+            concurrent_to=response_id,
+        )
+        with self._lock, self.path.open("ab") as file:
+            file.write(records)
+
+    def _record(
+        self,
+        record_type: str,
+        url_address: str,
+        date: str,
+        record_id: str,
+        content_type: str,
+        block: bytes,
+        concurrent_to: str | None = None,
+        truncated: bool = False,
+    ) -> bytes:
+        headers = {
+            "WARC-Type": record_type,
+            "WARC-Record-ID": record_id,
+            "WARC-Date": date,
+            "WARC-Target-URI": url_address,
+        }
+        if concurrent_to:
+            headers["WARC-Concurrent-To"] = concurrent_to
+        if truncated:
+            headers["WARC-Truncated"] = "disconnect"
+        headers["Content-Type"] = content_type
+        headers["Content-Length"] = str(len(block))
+        record = WARC_VERSION + b"\r\n" + _encode_headers(headers) + block + b"\r\n\r\n"
+        return gzip.compress(record) if self.compress else record
+
+
+def _encode_headers(headers: dict[str, Any]) -> bytes:
+    lines = "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+    return (lines + "\r\n").encode("utf-8")
+
+
+class _RecordingBody:
+    """Wraps the raw stream of the response and keeps the read bytes. When the body
+    is read to the end or closed, the bytes are passed to the callback with the
+    completion flag."""
+
+    def __init__(self, raw: Any, callback: Callable[[bytes, bool], None]) -> None:
+        self._raw = raw
+        self._callback: Callable[[bytes, bool], None] | None = callback
+        self._data = bytearray()
+
+    def read(self, *args: Any, **kwargs: Any) -> bytes:
+        data = self._raw.read(*args, **kwargs)
+        self._data += data
+        if not data and (not args or args[0] != 0):
+            self._finish(complete=True)
+        return data
+
+    def close(self) -> None:
+        self._finish(complete=False)
+        self._raw.close()
+
+    def _finish(self, complete: bool) -> None:
+        if self._callback is not None:
+            callback, self._callback = self._callback, None
+            callback(bytes(self._data), complete)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._raw, name)
+
+
+class _RecordingStream(_RecordingBody):
+    """_RecordingBody of the urllib3 responses, which are read with stream()."""
+
+    def stream(self, *args: Any, **kwargs: Any) -> Iterator[bytes]:
+        for chunk in self._raw.stream(*args, **kwargs):
+            self._data += chunk
+            yield chunk
+        self._finish(complete=True)
+
+
+class RecordingTransport(Transport):
+    """Downloads the pages with the wrapped transport and writes every exchange to
+    the WARC file.
+
+    The streamed responses are recorded while they are read, so the scrapers can
+    still stop the download early. The record is written when the body is read to
+    the end or the response is closed. The body closed early is recorded as read so
+    far, with the WARC-Truncated header, and is replayed cut short as well."""
+
+    def __init__(self, transport: Transport, path: str | Path) -> None:
+        """Constructor.
+
+        Args:
+            transport: the Transport object used to download the pages.
+            path: location of the WARC file. The records are appended."""
+        self.transport = transport
+        self.writer = WarcWriter(path)
+
+    def get(self, url_address: str, stream: bool = False, **kwargs: Any) -> Response:
+        response = self.transport.get(url_address, stream=stream, **kwargs)
+        return self._record(response, stream)
+
+    def fetch(self, url_address: str, **kwargs: Any) -> Response:
+        return self._record(self.transport.fetch(url_address, **kwargs))
+
+    def prewarm(self, url_address: str) -> PrewarmResult | None:
+        return self.transport.prewarm(url_address)
+
+    def _record(self, response: Response, stream: bool = False) -> Response:
+        if not stream:
+            self.writer.write_exchange(response)
+            return response
+
+        def write(body: bytes, complete: bool) -> None:
+            self.writer.write_exchange(response, body, truncated=not complete)
+
+        body = _RecordingStream if hasattr(response.raw, "stream") else _RecordingBody
+        response.raw = body(response.raw, write)
+        return response
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class _ThrottledBody(io.BytesIO):
+    """Response body delivered with the limited bandwidth."""
+
+    def __init__(self, data: bytes, bandwidth: float) -> None:
+        super().__init__(data)
+        self.bandwidth = bandwidth
+
+    def read(self, size: int | None = -1, **_: Any) -> bytes:  # type: ignore[override]
+        data = super().read(size)
+        sleep(len(data) / self.bandwidth)
+        return data
+
+
+class ReplayTransport(Transport):
+    """Serves the responses recorded in the WARC files, without the network.
+
+    If a URL has been recorded many times, the responses are served in the recorded
+    order, and the last one is repeated. URLs missing in the archive get the 404
+    response. The latency (time to the first byte) and the bandwidth can be set to
+    simulate the real website."""
+
+    def __init__(
+        self,
+        *paths: str | Path,
+        latency: float = 0,
+        jitter: float = 0,
+        bandwidth: float | None = None,
+        seed: int | None = 0,
+    ) -> None:
+        """Constructor.
+
+        Args:
+            paths: locations of the WARC files.
+            latency: delay in seconds before every response.
+            jitter: maximum random deviation of the latency in seconds.
+            bandwidth: the body transfer speed in bytes per second. Unlimited by
+                default.
+            seed: seed of the jitter, which makes the replays repeatable."""
+        self.latency = latency
+        self.jitter = jitter
+        self.bandwidth = bandwidth
+        self._random = Random(seed)
+        self._lock = Lock()
+        self._responses: dict[str, list[HttpMessage]] = {}
+        self._served: dict[str, int] = {}
+        for path in paths:
+            for record in read_warc(path):
+                if record.record_type == "response":
+                    self._responses.setdefault(record.target_uri, []).append(
+                        parse_http_response(record.block)
+                    )
+        log.info("%s URLs loaded from the WARC archives.", len(self._responses))
+
+    @property
+    def urls(self) -> list[str]:
+        return list(self._responses)
+
+    def get(self, url_address: str, stream: bool = False, **kwargs: Any) -> Response:
+        with self._lock:
+            messages = self._responses.get(url_address)
+            if messages:
+                served = self._served.get(url_address, 0)
+                self._served[url_address] = served + 1
+                message = messages[min(served, len(messages) - 1)]
+            else:
+                log.debug("%s is missing in the archive.", url_address)
+                message = HttpMessage(404, "Not Found", CaseInsensitiveDict(), b"")
+            delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+
+        sleep(max(delay, 0))
+        response = build_response(url_address, message, stream=stream)
+        if self.bandwidth:
+            if stream:
+                response.raw = _ThrottledBody(message.body, self.bandwidth)
+            else:
+                sleep(len(message.body) / self.bandwidth)
+        return response
+
+    def fetch(self, url_address: str, **kwargs: Any) -> Response:
+        response = self.get(url_address, **kwargs)
+        if response.status_code != 200:
+            raise HTTPError(
+                f"{url_address} returned status code {response.status_code}.",
+                response=response,
+            )
+        return response
@@ -0,0 +1,198 @@
+import json
+import sqlite3
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from logging import getLogger
+from pathlib import Path
+from time import time
+from typing import Any
+
+log = getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Job:
+    job_id: int
+    payload: dict[str, Any]
+    attempts: int
+
+
+@dataclass(frozen=True)
+class JobResult:
+    job_id: int
+    payload: dict[str, Any]
+    status: str
+    attempts: int
+    result: Any = None
+    error: str | None = None
+
+
+class WorkQueue(ABC):
+    """Queue of scraping jobs shared by many workers.
+
+    A leased job is invisible to other workers until the lease expires. If the worker
+    does not complete the job before that, the job is handed to another worker. Failed
+    jobs are retried until max_attempts is reached."""
+
+    @abstractmethod
+    def enqueue(self, payload: dict[str, Any], max_attempts: int = 3) -> int:
+        """Adds the job to the queue.
+
+        Args:
+            payload: JSON serializable job description.
+            max_attempts: how many times the job can be leased.
+
+        Returns: ID of the job."""
+
+    @abstractmethod
+    def lease(self, worker_id: str, visibility_timeout: float = 300) -> Job | None:
+        """Leases the oldest available job.
+
+        Args:
+            worker_id: ID of the worker taking the job.
+            visibility_timeout: for how many seconds the job is reserved.
+
+        Returns: Job object or None, if there is no available job."""
+
+    @abstractmethod
+    def complete(self, job_id: int, worker_id: str, result: Any) -> bool:
+        """Saves the result of the job.
+
+        Returns: False if the lease has expired and was taken by another worker."""
+
+    @abstractmethod
+    def fail(self, job_id: int, worker_id: str, error: str) -> bool:
+        """Releases the job, so it can be retried, or marks it as failed if there are
+        no attempts left.
+
+        Returns: False if the lease has expired and was taken by another worker."""
+
+    @abstractmethod
+    def results(self) -> list[JobResult]:
+        """Returns the finished (done or failed) jobs."""
+
+    @abstractmethod
+    def unfinished_jobs(self) -> int:
+        """Returns number of jobs that are pending or leased."""
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """WorkQueue stored in a local SQLite file. Many processes, also on different
+    nodes sharing the volume, can use the same file. For network volumes, use the
+    DELETE journal mode, as WAL requires shared memory."""
+
+    def __init__(
+        self, path: str | Path, journal_mode: str = "WAL", timeout: float = 30
+    ) -> None:
+        """Constructor.
+
+        Args:
+            path: location of the SQLite file.
+            journal_mode: SQLite journal mode.
+            timeout: how many seconds to wait for a lock held by another process."""
+        self.path = Path(path)
+        self._connection = sqlite3.connect(
+            self.path, timeout=timeout, isolation_level=None, check_same_thread=False
+        )
+        self._connection.execute(f"PRAGMA journal_mode={journal_mode}")
+        self._connection.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL,
+                worker_id TEXT,
+                lease_expires REAL,
+                result TEXT,
+                error TEXT
+            )"""
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, lease_expires)"
+        )
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def enqueue(self, payload: dict[str, Any], max_attempts: int = 3) -> int:
+        cursor = self._connection.execute(
+            "INSERT INTO jobs (payload, max_attempts) VALUES (?, ?)",
+            (json.dumps(payload), max_attempts),
+        )
+        return int(cursor.lastrowid)  # type: ignore[arg-type]
+
+    def lease(self, worker_id: str, visibility_timeout: float = 300) -> Job | None:
+        now = time()
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            self._connection.execute(
+                """UPDATE jobs SET status = 'failed', error = 'Lease expired.'
+                WHERE status = 'leased' AND lease_expires < ?
+                AND attempts >= max_attempts""",
+                (now,),
+            )
+            row = self._connection.execute(
+                """SELECT id, payload, attempts FROM jobs
+                WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?)
+                ORDER BY id LIMIT 1""",
+                (now,),
+            ).fetchone()
+            if row is None:
+                self._connection.execute("COMMIT")
+                return None
+
+            job_id, payload, attempts = row
+            self._connection.execute(
+                """UPDATE jobs SET status = 'leased', attempts = ?, worker_id = ?,
+                lease_expires = ? WHERE id = ?""",
+                (attempts + 1, worker_id, now + visibility_timeout, job_id),
+            )
+            self._connection.execute("COMMIT")
+        except sqlite3.Error:
+            self._connection.execute("ROLLBACK")
+            raise
+
+        log.debug("Job %s leased by %s.", job_id, worker_id)
+        return Job(job_id=job_id, payload=json.loads(payload), attempts=attempts + 1)
+
+    def complete(self, job_id: int, worker_id: str, result: Any) -> bool:
+        cursor = self._connection.execute(
+            """UPDATE jobs SET status = 'done', result = ?, lease_expires = NULL
+            WHERE id = ? AND worker_id = ? AND status = 'leased'""",
+            (json.dumps(result), job_id, worker_id),
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, job_id: int, worker_id: str, error: str) -> bool:
+        cursor = self._connection.execute(
+            """UPDATE jobs SET error = ?, lease_expires = NULL,
+            status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'pending'
+            END WHERE id = ? AND worker_id = ? AND status = 'leased'""",
+            (error, job_id, worker_id),
+        )
+        return cursor.rowcount == 1
+
+    def results(self) -> list[JobResult]:
+        rows = self._connection.execute(
+            """SELECT id, payload, status, attempts, result, error FROM jobs
+            WHERE status IN ('done', 'failed') ORDER BY id"""
+        ).fetchall()
+        return [
+            JobResult(
+                job_id=job_id,
+                payload=json.loads(payload),
+                status=status,
+                attempts=attempts,
+                result=json.loads(result) if result is not None else None,
+                error=error,
+            )
+            for job_id, payload, status, attempts, result, error in rows
+        ]
+
+    def unfinished_jobs(self) -> int:
+        return int(
+            self._connection.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN ('pending', 'leased')"
+            ).fetchone()[0]
+        )
@@ -0,0 +1,108 @@
+import os
+import socket
+from logging import getLogger
+from multiprocessing import Process
+from pathlib import Path
+from time import monotonic, sleep
+from typing import Any
+
+from imgscraper.src.work_queue import Job, SQLiteWorkQueue, WorkQueue
+
+log = getLogger(__name__)
+
+
+def run_job(job: Job) -> dict[str, Any]:
+    """Runs the ImageScraper described by the job payload.
+
+    The payload holds the create_scraper arguments in the "config" key and, optionally,
+    the "last_sync_data" list.
+
+    Args:
+        job: the leased Job object.
+
+    Returns: JSON serializable sync result."""
+    # pylint: disable-next=import-outside-toplevel
+    from imgscraper.scraper_constructor import create_scraper
+
+    scraper = create_scraper(**job.payload["config"])
+    last_sync_data = job.payload.get("last_sync_data")
+    result = scraper.start_sync(tuple(last_sync_data) if last_sync_data else None)
+    return {
+        "images": [image.as_dict() for image in result.images],
+        "pages_scanned": result.pages_scanned,
+        "watermark_page": result.watermark_page,
+    }
+
+
+def run_worker(
+    queue: WorkQueue,
+    worker_id: str | None = None,
+    visibility_timeout: float = 300,
+    poll_interval: float = 0.5,
+    idle_timeout: float = 0,
+    max_jobs: int | None = None,
+) -> int:
+    """Leases jobs from the queue and runs them until the queue is drained.
+
+    Args:
+        queue: the WorkQueue object.
+        worker_id: ID of the worker. By default, built from the host name and PID.
+        visibility_timeout: for how many seconds a leased job is reserved.
+        poll_interval: how many seconds to wait when no job is available.
+        idle_timeout: how many seconds to wait for new jobs after the queue is
+            drained.
+        max_jobs: stop after this number of jobs.
+
+    Returns: number of processed jobs."""
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    processed_jobs = 0
+    idle_since = monotonic()
+
+    while max_jobs is None or processed_jobs < max_jobs:
+        job = queue.lease(worker_id, visibility_timeout)
+        if job is None:
+            drained = queue.unfinished_jobs() == 0
+            if drained and monotonic() - idle_since >= idle_timeout:
+                break
+            sleep(poll_interval)
+            continue
+
+        log.info("Worker %s runs job %s.", worker_id, job.job_id)
+        try:
+            result = run_job(job)
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            log.exception("Job %s failed.", job.job_id)
+            queue.fail(job.job_id, worker_id, repr(error))
+        else:
+            if not queue.complete(job.job_id, worker_id, result):
+                log.warning("Lease of job %s expired before completion.", job.job_id)
+        processed_jobs += 1
+        idle_since = monotonic()
+
+    return processed_jobs
+
+
+def _run_sqlite_worker(path: str, options: dict[str, Any]) -> None:
+    queue = SQLiteWorkQueue(path)
+    try:
+        run_worker(queue, **options)
+    finally:
+        queue.close()
+
+
+def start_workers(path: str | Path, processes: int, **options: Any) -> list[Process]:
+    """Starts worker processes consuming the SQLite work queue.
+
+    Args:
+        path: location of the SQLite queue file.
+        processes: number of the worker processes.
+        options: run_worker keyword arguments.
+
+    Returns: list of started Process objects."""
+    workers = [
+        Process(target=_run_sqlite_worker, args=(str(path), options), daemon=True)
+        for _ in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    return workers
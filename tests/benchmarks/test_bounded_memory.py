@@ -0,0 +1,72 @@
+from multiprocessing import get_context
+from time import perf_counter
+from typing import Any
+
+import pytest
+
+from imgscraper.scraper_constructor import create_scraper
+from imgscraper.src.memory import peak_rss_bytes, rss_bytes
+from imgscraper.src.sinks import CallbackSink
+from tests.synthetic_site import CONTAINER_CLASS, PAGINATION_CLASS, SyntheticSite
+
+PAGES = 100
+IMAGES_PER_PAGE = 200
+MEMORY_HEADROOM = 8 * 1024 * 1024
+
+
+def crawl(url_address: str, bounded_memory: bool, results: Any) -> None:
+    """Crawls the site in a fresh process and reports the peak RSS growth over the
+    RSS after a one-page warm-up. In the
+    bounded-memory mode, the images go to a sink, and the memory limit is set a few
+    MB above the RSS before the crawl."""
+    written = []
+    for pages_to_scan in (1, PAGES):
+        image_scraper = create_scraper(
+            url_address,
+            CONTAINER_CLASS,
+            PAGINATION_CLASS,
+            pages_to_scan=pages_to_scan,
+            bounded_memory=bounded_memory,
+        )
+        if pages_to_scan == 1:
+            # Warm-up: the lazy imports and the connection pool of the first page.
+            image_scraper.start_sync(sink=CallbackSink(lambda batch: None))
+    baseline = rss_bytes()
+    start = perf_counter()
+    if bounded_memory:
+        image_scraper.memory_limit = baseline + MEMORY_HEADROOM
+        result = image_scraper.start_sync(
+            sink=CallbackSink(lambda batch: written.append(len(batch)))
+        )
+    else:
+        result = image_scraper.start_sync()
+    elapsed = perf_counter() - start
+    peak = peak_rss_bytes()
+    results.put((peak - baseline, len(result.images) + sum(written), elapsed))
+
+
+@pytest.mark.benchmark
+def test_bounded_memory_should_lower_peak_rss() -> None:
+    """A 100-page crawl of the pages with 200 containers. Each mode runs in its own
+    process, so the peak RSS of one does not hide the other."""
+    context = get_context("spawn")
+    measurements = {}
+    with SyntheticSite(
+        pages=PAGES, images_per_page=IMAGES_PER_PAGE, padding=200
+    ) as site:
+        for bounded_memory in (False, True):
+            results = context.Queue()
+            process = context.Process(
+                target=crawl, args=(site.url, bounded_memory, results)
+            )
+            process.start()
+            measurements[bounded_memory] = results.get(timeout=120)
+            process.join()
+
+    for bounded_memory, (growth, images, elapsed) in measurements.items():
+        print(
+            f"\nBounded memory {bounded_memory}: {images} images in {elapsed:.2f}s,"
+            f" peak RSS growth {growth / 2**20:.1f} MB"
+        )
+    assert measurements[True][1] == measurements[False][1] == PAGES * IMAGES_PER_PAGE
+    assert measurements[True][0] < measurements[False][0] * 0.8
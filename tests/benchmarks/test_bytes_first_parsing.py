@@ -0,0 +1,57 @@
+from time import perf_counter
+
+import pytest
+from bs4 import BeautifulSoup
+from requests import Session
+
+from imgscraper.src.encoding import SiteEncodings
+from imgscraper.src.scrapers.bs4_scraper import Bs4Scraper
+from tests.synthetic_site import CONTAINER_CLASS, SyntheticSite
+
+ROUNDS = 5
+
+
+@pytest.mark.benchmark
+def test_bytes_first_parsing_should_skip_charset_detection(
+    anonymous_session: Session,
+) -> None:
+    """The server omits the Content-Type header, so Response.text runs the charset
+    detection over every page."""
+    with SyntheticSite(
+        images_per_page=50,
+        padding=2000,
+        padding_text="Zażółć gęślą jaźń. ",
+        content_type=None,
+    ) as site:
+        responses = [anonymous_session.get(site.url) for _ in range(ROUNDS * 2)]
+
+    text_times, bytes_first_times = [], []
+    for response in responses[:ROUNDS]:
+        start = perf_counter()
+        text_dom = BeautifulSoup(response.text, "html.parser")
+        text_times.append(perf_counter() - start)
+
+    encodings = SiteEncodings()
+    for response in responses[ROUNDS:]:
+        start = perf_counter()
+        bytes_first_dom = BeautifulSoup(
+            encodings.decode(site.url, response), "html.parser"
+        )
+        bytes_first_times.append(perf_counter() - start)
+
+    print(
+        f"\nPage size: {len(responses[0].content)} bytes"
+        f"\nResponse.text ({responses[0].encoding or responses[0].apparent_encoding}):"
+        f" {min(text_times) * 1000:.2f} ms per page"
+        f"\nBytes first ({encodings.get(site.url)}):"
+        f" {min(bytes_first_times) * 1000:.2f} ms per page"
+    )
+    expected_dom = BeautifulSoup(responses[0].content.decode("utf-8"), "html.parser")
+    assert bytes_first_dom.select(f".{CONTAINER_CLASS}") == expected_dom.select(
+        f".{CONTAINER_CLASS}"
+    )
+    assert len(text_dom.select(f".{CONTAINER_CLASS}")) == 50
+    assert sum(bytes_first_times) < sum(text_times)
+    assert Bs4Scraper._parse_html(responses[0], site.url).get_text() == (
+        expected_dom.get_text()
+    )
@@ -0,0 +1,59 @@
+from statistics import median
+from time import perf_counter
+
+import pytest
+from requests import Session
+
+from imgscraper.src.core import ImageScraper
+from imgscraper.src.scrapers.bs4_scraper import Bs4Scraper
+from tests.synthetic_site import CONTAINER_CLASS, PAGINATION_CLASS, SyntheticSite
+
+ROUNDS = 5
+
+
+@pytest.mark.benchmark
+def test_freshness_probe_should_be_cheaper_than_sync() -> None:
+    """Most of the polls find nothing new. The full sync downloads and parses the
+    whole first page to learn it, while the probe reads the first container once
+    and then gets 304 Not Modified."""
+    with SyntheticSite(images_per_page=100, padding=2000) as site:
+        image_scrapers = [
+            ImageScraper(
+                website_url=site.url,
+                container_class=CONTAINER_CLASS,
+                pagination_class=PAGINATION_CLASS,
+                pages_to_scan=3,
+                scraper=Bs4Scraper(),
+                session=Session(),
+            )
+            for _ in range(2)
+        ]
+        last_sync_data = (site.image_url(site.newest_image),)
+        # Warm-up: the probe modules are imported on the first use.
+        image_scrapers[1].has_new_content(last_sync_data)
+        image_scraper = image_scrapers[0]
+
+        sync_times, probe_times = [], []
+        for _ in range(ROUNDS):
+            start = perf_counter()
+            result = image_scraper.start_sync(last_sync_data)
+            sync_times.append(perf_counter() - start)
+            assert result.images == []
+
+            start = perf_counter()
+            assert image_scraper.has_new_content(last_sync_data) is False
+            probe_times.append(perf_counter() - start)
+
+        site.publish(1)
+        assert image_scraper.has_new_content(last_sync_data) is True
+
+    print(
+        f"\nPage size: {len(site.render(1))} bytes"
+        f"\nFull sync: {median(sync_times) * 1000:.2f} ms"
+        f"\nFreshness probe: {median(probe_times[1:]) * 1000:.2f} ms"
+        f" (first, without the validators: {probe_times[0] * 1000:.2f} ms)"
+        f"\nNot modified: {site.not_modified} of {ROUNDS} probes"
+    )
+    assert site.not_modified == ROUNDS - 1
+    assert probe_times[0] * 2 < median(sync_times)
+    assert median(probe_times[1:]) * 5 < median(sync_times)
@@ -0,0 +1,60 @@
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+import pytest
+from requests import Session
+from requests.adapters import HTTPAdapter
+
+from imgscraper.src.transport import Http2Transport, RequestsTransport, Transport
+from tests.synthetic_site import SyntheticSite
+
+pytest.importorskip("httpx")
+H2SyntheticSite = pytest.importorskip("tests.h2_server").H2SyntheticSite
+
+PAGES = 10
+ROUNDS = 3
+CONNECTION_DELAY = 0.05
+
+
+def fetch_all_pages(transport: Transport, url: str) -> float:
+    """Fetches every page of the site concurrently.
+
+    Returns: the wall-clock time in seconds."""
+    url_addresses = [url] + [f"{url}page/{page}" for page in range(2, PAGES + 1)]
+    start = perf_counter()
+    with ThreadPoolExecutor(max_workers=PAGES) as executor:
+        responses = list(executor.map(transport.fetch, url_addresses))
+    elapsed = perf_counter() - start
+    assert all(response.status_code == 200 for response in responses)
+    return elapsed
+
+
+@pytest.mark.benchmark
+def test_http2_should_multiplex_requests_over_one_connection() -> None:
+    with SyntheticSite(pages=PAGES, connection_delay=CONNECTION_DELAY) as http1_site:
+        session = Session()
+        session.mount("http://", HTTPAdapter(pool_maxsize=PAGES))
+        http1_transport = RequestsTransport(session)
+        http1_times = [
+            fetch_all_pages(http1_transport, http1_site.url) for _ in range(ROUNDS)
+        ]
+        http1_transport.close()
+        http1_connections = http1_site.connections
+
+    with SyntheticSite(pages=PAGES, connection_delay=CONNECTION_DELAY) as site:
+        with H2SyntheticSite(site) as http2_site:
+            http2_transport = Http2Transport(http1=False)
+            http2_times = [
+                fetch_all_pages(http2_transport, http2_site.url) for _ in range(ROUNDS)
+            ]
+            http2_transport.close()
+        http2_connections = site.connections
+
+    print(
+        f"\nHTTP/1.1 pool: {http1_connections} connections, "
+        f"first round {http1_times[0]:.3f}s, next {min(http1_times[1:]):.3f}s"
+        f"\nHTTP/2: {http2_connections} connection(s), "
+        f"first round {http2_times[0]:.3f}s, next {min(http2_times[1:]):.3f}s"
+    )
+    assert http2_connections == 1
+    assert http1_connections > 1
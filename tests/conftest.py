@@ -3,7 +3,7 @@
 from datetime import datetime
 from typing import Generator
 
-from bs4 import BeautifulSoup, ResultSet
+from bs4 import BeautifulSoup, ResultSet, Tag
 from pytest import fixture
 from requests import Session
 from responses import RequestsMock
@@ -11,6 +11,7 @@ from responses import RequestsMock
 from imgscraper.src.core import ImageScraper
 from imgscraper.src.models import Image, ImagesSource
 from imgscraper.src.scrapers.scraper import Scraper
+from tests.synthetic_site import SyntheticSite
 
 WEBSITE_URL: str = "https://webludus.pl/"
 IMAGE_URL: str = "https://webludus.pl/img/image.jpg"
@@ -34,6 +35,13 @@ def mocked_responses() -> Generator[RequestsMock, None, None]:
         yield response
 
 
+@fixture
+def synthetic_site() -> Generator[SyntheticSite, None, None]:
+    """Yields a started local website with 10 pages of 10 images."""
+    with SyntheticSite() as site:
+        yield site
+
+
 @fixture(scope="session")
 def prepare_website_data() -> tuple[str, str, str, int]:
     return WEBSITE_URL, CONTAINER_CLASS, PAGINATION_CLASS, PAGES_TO_SCAN
@@ -80,7 +88,7 @@ def prepare_image_scraper(
         def get_images_data(
             self,
             img_source: ImagesSource,
-            last_sync_data: tuple[str] | None = None,
+            last_sync_data: tuple[str, ...] | None = None,
         ) -> tuple[list[Image], bool]:
             """The method that starts the synchronization process.
 
@@ -199,7 +207,7 @@ def prepare_second_html_doc() -> str:
 
 
 @fixture(scope="session")
-def multiple_nested_images() -> ResultSet:
+def multiple_nested_images() -> ResultSet[Tag]:
     html_doc = f"""<html><head><title>BS4 Mock</title></head>
         <body>
             <div class={CONTAINER_CLASS}>
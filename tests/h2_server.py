@@ -0,0 +1,83 @@
+import asyncio
+from threading import Thread
+
+from h2.config import H2Configuration
+from h2.connection import H2Connection
+from h2.events import ConnectionTerminated, RequestReceived
+
+from tests.synthetic_site import SyntheticSite
+
+
+class H2SyntheticSite:
+    """Cleartext HTTP/2 (prior knowledge) server serving the SyntheticSite pages.
+    The site server is used only to render the pages and to count the requests."""
+
+    def __init__(self, site: SyntheticSite) -> None:
+        self.site = site
+        self.port = 0
+        self._loop = asyncio.new_event_loop()
+        self._server: asyncio.AbstractServer | None = None
+        self._thread = Thread(target=self._loop.run_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/"
+
+    def __enter__(self) -> "H2SyntheticSite":
+        self._thread.start()
+        self._server = asyncio.run_coroutine_threadsafe(
+            asyncio.start_server(self._handle, "127.0.0.1", 0), self._loop
+        ).result()
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        async def close() -> None:
+            self._server.close()  # type: ignore[union-attr]
+
+        asyncio.run_coroutine_threadsafe(close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        await asyncio.to_thread(self.site.new_connection)
+        connection = H2Connection(H2Configuration(client_side=False))
+        connection.initiate_connection()
+        writer.write(connection.data_to_send())
+
+        while data := await reader.read(65535):
+            for event in connection.receive_data(data):
+                if isinstance(event, RequestReceived):
+                    self._respond(connection, event)
+                elif isinstance(event, ConnectionTerminated):
+                    writer.close()
+                    return
+            writer.write(connection.data_to_send())
+            await writer.drain()
+        writer.close()
+
+    def _respond(self, connection: H2Connection, event: RequestReceived) -> None:
+        headers = {
+            name.decode()
+            if isinstance(name, bytes)
+            else name: (value.decode() if isinstance(value, bytes) else value)
+            for name, value in event.headers
+        }
+        path = headers[":path"]
+        self.site.requests[path] += 1
+        page = self.site.page_number(path)
+        body = self.site.render(page).encode() if page else b"Not found"
+        connection.send_headers(
+            event.stream_id,
+            [
+                (":status", "200" if page else "404"),
+                ("content-type", "text/html; charset=utf-8"),
+                ("content-length", str(len(body))),
+            ],
+        )
+        frame_size = connection.max_outbound_frame_size
+        for start in range(0, len(body), frame_size):
+            connection.send_data(event.stream_id, body[start : start + frame_size])
+        connection.end_stream(event.stream_id)
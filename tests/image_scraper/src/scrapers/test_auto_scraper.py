@@ -0,0 +1,194 @@
+import json
+from pathlib import Path
+from time import sleep
+from unittest.mock import Mock
+
+import pytest
+from pytest_mock import MockerFixture
+from requests import Session
+
+from imgscraper.scraper_constructor import create_scraper
+from imgscraper.src.models import Image, ImagesSource
+from imgscraper.src.scrapers.auto_scraper import AutoScraper, BackendChoiceStore
+from imgscraper.src.scrapers.scraper import Scraper
+from tests.synthetic_site import CONTAINER_CLASS, PAGINATION_CLASS, SyntheticSite
+
+SITE = "https://webludus.pl/"
+IMAGES = [
+    Image(source=f"{SITE}{i}", url_address=f"{SITE}{i}.jpg", title="") for i in range(3)
+]
+
+
+class FakeScraper(Scraper):
+    """Returns the given images after the given delay."""
+
+    def __init__(self, images: list[Image], delay: float = 0) -> None:
+        self.images = images
+        self.delay = delay
+        self.calls = 0
+
+    def get_images_data(
+        self, img_source: ImagesSource, last_sync_data: tuple[str, ...] | None = None
+    ) -> tuple[list[Image], bool]:
+        self.calls += 1
+        assert img_source.transport is not None
+        img_source.transport.fetch(img_source.current_url_address)
+        sleep(self.delay)
+        return list(self.images), False
+
+    def find_next_page(
+        self, img_source: ImagesSource, scraped_urls: set[str]
+    ) -> tuple[str, set[str]]:
+        return f"{SITE}page/2", scraped_urls
+
+
+@pytest.fixture
+def transport(mocker: MockerFixture) -> Mock:
+    return mocker.Mock()
+
+
+@pytest.fixture
+def images_source(anonymous_session: Session, transport: Mock) -> ImagesSource:
+    return ImagesSource(
+        session=anonymous_session,
+        current_url_address=SITE,
+        container_class=CONTAINER_CLASS,
+        pagination_class=PAGINATION_CLASS,
+        pages_to_scan=1,
+        transport=transport,
+    )
+
+
+@pytest.mark.unittests
+class TestAutoScraper:
+    def test_fastest_correct_backend_should_be_chosen(
+        self, images_source: ImagesSource, transport: Mock
+    ) -> None:
+        candidates = {
+            "reference": FakeScraper(IMAGES, delay=0.02),
+            "fast": FakeScraper(IMAGES),
+            "wrong": FakeScraper(IMAGES[:2]),
+        }
+        auto_scraper = AutoScraper(candidates, evaluation_pages=2)
+
+        for _ in range(2):
+            assert auto_scraper.backend(SITE) is None
+            assert auto_scraper.get_images_data(images_source) == (IMAGES, False)
+
+        choice = auto_scraper.store.get(SITE)
+        assert auto_scraper.backend(SITE) == "fast"
+        assert choice is not None
+        assert set(choice.timings) == {"reference", "fast"}
+        assert transport.fetch.call_count == 2
+
+        auto_scraper.get_images_data(images_source)
+
+        assert [scraper.calls for scraper in candidates.values()] == [2, 3, 2]
+
+    def test_candidates_order_should_be_rotated_on_every_page(
+        self, images_source: ImagesSource, mocker: MockerFixture
+    ) -> None:
+        candidates = {name: FakeScraper(IMAGES) for name in ("bs4", "stream", "lxml")}
+        order = mocker.Mock()
+        for name, scraper in candidates.items():
+            order.attach_mock(
+                mocker.patch.object(
+                    scraper, "get_images_data", return_value=(IMAGES, False)
+                ),
+                name,
+            )
+        auto_scraper = AutoScraper(candidates, evaluation_pages=3)
+
+        for _ in range(3):
+            auto_scraper.get_images_data(images_source)
+
+        assert [call[0] for call in order.mock_calls] == [
+            "bs4",
+            "stream",
+            "lxml",
+            "stream",
+            "lxml",
+            "bs4",
+            "lxml",
+            "bs4",
+            "stream",
+        ]
+
+    def test_failing_backend_should_be_rejected(
+        self, images_source: ImagesSource, mocker: MockerFixture
+    ) -> None:
+        failing = FakeScraper(IMAGES)
+        mocker.patch.object(failing, "get_images_data", side_effect=ValueError)
+        auto_scraper = AutoScraper(
+            {"reference": FakeScraper(IMAGES, delay=0.01), "failing": failing},
+            evaluation_pages=1,
+        )
+
+        auto_scraper.get_images_data(images_source)
+
+        assert auto_scraper.backend(SITE) == "reference"
+
+    def test_choice_should_be_reevaluated_after_expiry(
+        self, images_source: ImagesSource, mocker: MockerFixture
+    ) -> None:
+        clock = mocker.patch(
+            "imgscraper.src.scrapers.auto_scraper.time", return_value=1000.0
+        )
+        auto_scraper = AutoScraper(
+            {"reference": FakeScraper(IMAGES)},
+            evaluation_pages=1,
+            reevaluate_after=60,
+        )
+        auto_scraper.get_images_data(images_source)
+
+        clock.return_value = 1059.0
+        assert auto_scraper.backend(SITE) == "reference"
+        clock.return_value = 1060.0
+        assert auto_scraper.backend(SITE) is None
+
+    def test_choice_should_be_persisted(
+        self, images_source: ImagesSource, tmp_path: Path
+    ) -> None:
+        path = tmp_path / "backends.json"
+        candidates = {
+            "reference": FakeScraper(IMAGES, 0.01),
+            "fast": FakeScraper(IMAGES),
+        }
+        AutoScraper(candidates, store_path=path, evaluation_pages=1).get_images_data(
+            images_source
+        )
+
+        auto_scraper = AutoScraper(candidates, store=BackendChoiceStore(path))
+
+        assert json.loads(path.read_text())[SITE]["backend"] == "fast"
+        assert auto_scraper.backend(SITE) == "fast"
+        assert auto_scraper.find_next_page(images_source, set())[0] == f"{SITE}page/2"
+
+
+@pytest.mark.integtests
+class TestAutoScraperIntegration:
+    def test_auto_scraper_should_return_images_of_bs4_scraper(
+        self, synthetic_site: SyntheticSite, tmp_path: Path
+    ) -> None:
+        results = {}
+        for scraper in ("bs4", "auto"):
+            results[scraper] = create_scraper(
+                synthetic_site.url,
+                CONTAINER_CLASS,
+                PAGINATION_CLASS,
+                pages_to_scan=4,
+                scraper=scraper,
+                scraper_options=(
+                    {"store_path": tmp_path / "backends.json", "evaluation_pages": 2}
+                    if scraper == "auto"
+                    else {}
+                ),
+            ).start_sync()
+
+        choice = BackendChoiceStore(tmp_path / "backends.json").get(synthetic_site.url)
+
+        assert choice is not None
+        assert results["auto"].images == results["bs4"].images
+        assert len(results["auto"].images) == 40
+        assert choice.backend in ("bs4", "stream", "lxml")
+        assert set(choice.timings) >= {"bs4", "stream"}
@@ -1,11 +1,19 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 import responses
 from bs4 import BeautifulSoup, ResultSet
 from pytest_mock import MockerFixture
-from requests import Session
+from requests import Response, Session
+from requests.structures import CaseInsensitiveDict
 
-from imgscraper.src.models import Image, ImagesSource
-from imgscraper.src.scrapers.bs4_scraper import Bs4Scraper
+from imgscraper.src.core import ImageScraper
+from imgscraper.src.encoding import SITE_ENCODINGS
+from imgscraper.src.models import ExtractionPlan, Image, ImagesSource
+from imgscraper.src.scrapers.bs4_scraper import Bs4Scraper, compile_plan
+from imgscraper.src.seen_index import UrlFingerprints
+from imgscraper.src.transport import RequestsTransport
+from tests.synthetic_site import CONTAINER_CLASS, PAGINATION_CLASS, SyntheticSite
 
 
 @pytest.fixture(scope="session")
@@ -33,8 +41,11 @@ class TestGetImagesData:
         Bs4Scraper().get_images_data(img_source=prepare_images_source)
 
         get_html_dom_mock.assert_called_once_with(
-            session=prepare_images_source.session,
+            transport=prepare_images_source.transport,
             url_address=prepare_images_source.current_url_address,
+            site=prepare_images_source.domain,
+            max_age=0,
+            parser="html.parser",
         )
         prepare_image_objects.assert_called_once_with(
             domain=prepare_images_source.current_url_address,
@@ -42,6 +53,7 @@ class TestGetImagesData:
                 "." + prepare_images_source.container_class
             ),
             last_sync_data=None,
+            plan=compile_plan(prepare_images_source.extraction_plan),
         )
 
 
@@ -58,7 +70,7 @@ class TestGetHtmlDom:
         )
 
         Bs4Scraper._get_html_dom(
-            session=anonymous_session,
+            transport=RequestsTransport(anonymous_session),
             url_address=prepare_images_source.current_url_address,
         )
 
@@ -76,12 +88,28 @@ class TestGetHtmlDom:
         )
 
         beautiful_soup = Bs4Scraper._get_html_dom(
-            session=anonymous_session,
+            transport=RequestsTransport(anonymous_session),
             url_address=prepare_images_source.current_url_address,
         )
 
         assert isinstance(beautiful_soup, BeautifulSoup)
 
+    def test_body_in_known_encoding_should_be_parsed_from_bytes(
+        self, mocker: MockerFixture
+    ) -> None:
+        response = Response()
+        response._content = '<p class="text">Zażółć gęślą jaźń</p>'.encode("cp1250")
+        response.headers = CaseInsensitiveDict(
+            {"Content-Type": "text/html; charset=windows-1250"}
+        )
+        decode = mocker.spy(SITE_ENCODINGS, "decode")
+
+        html_dom = Bs4Scraper._parse_html(response, "https://webludus.pl/")
+
+        assert html_dom.get_text() == "Zażółć gęślą jaźń"
+        assert html_dom.original_encoding == "cp1250"
+        decode.assert_not_called()
+
 
 @pytest.mark.integtests
 class TestPrepareImageObjects:
@@ -235,6 +263,54 @@ class TestFindImageData:
         assert Bs4Scraper()._find_images_data(div, "https://webludus.pl/") is None
 
 
+@pytest.mark.unittests
+class TestCompilePlan:
+    def test_plan_should_be_compiled_once(self) -> None:
+        plan = ExtractionPlan(container_selector="div.image > figure")
+
+        assert compile_plan(plan) is compile_plan(ExtractionPlan(**plan.__dict__))
+
+    @pytest.mark.parametrize(
+        "selector", [".simple-image", "div.simple-image", "body > .simple-image"]
+    )
+    def test_class_and_css_selectors_should_find_the_same_containers(
+        self, prepare_beautiful_soup: BeautifulSoup, selector: str
+    ) -> None:
+        plan = compile_plan(ExtractionPlan(container_selector=selector))
+
+        assert plan.select_containers(prepare_beautiful_soup) == (
+            prepare_beautiful_soup.select(".simple-image")
+        )
+
+    def test_alternate_image_attribute_should_be_used(self) -> None:
+        div = BeautifulSoup(
+            """<div class="lazy"><a href="/05">
+            <img src="data:image/gif;base64,R0lG" data-src="/img/05.jpg" alt="05">
+            <img data-src="/img/06.jpg" alt="06">
+            </a></div>""",
+            "html.parser",
+        ).div
+        plan = compile_plan(
+            ExtractionPlan(
+                container_selector=".lazy", image_attributes=("data-src", "src")
+            )
+        )
+
+        image_data = Bs4Scraper()._find_images_data(div, "https://webludus.pl/", plan)
+
+        assert image_data == [
+            ("https://webludus.pl/05", "https://webludus.pl/img/06.jpg", "06"),
+            ("https://webludus.pl/05", "https://webludus.pl/img/05.jpg", "05"),
+        ]
+
+    def test_raise_key_error_if_image_has_no_attribute(self) -> None:
+        image = BeautifulSoup("<img alt='x'>", "html.parser").img
+        plan = compile_plan(ExtractionPlan(image_attributes=("data-src", "src")))
+
+        with pytest.raises(KeyError):
+            plan.image_url(image)
+
+
 @pytest.mark.integtests
 class TestFindNextPage:
     def test_output_should_have_correct_value(
@@ -286,6 +362,41 @@ class TestFindNextPage:
                 scraped_urls=set(),
             )
 
+    def test_remembered_pagination_should_survive_concurrent_syncs(
+        self, mocker: MockerFixture, anonymous_session: Session
+    ) -> None:
+        get_html_dom = mocker.patch.object(Bs4Scraper, "_get_html_dom")
+        scraper = Bs4Scraper()
+        scraper.max_cached_paginations = 8
+
+        def crawl(worker: int) -> list[str]:
+            next_urls = []
+            for page in range(1, 201):
+                url_address = f"https://webludus.pl/{worker}/page/{page}"
+                scraper._remember_pagination(
+                    url_address, [f"https://webludus.pl/{worker}/page/{page + 1}"]
+                )
+                img_source = ImagesSource(
+                    session=anonymous_session,
+                    current_url_address=url_address,
+                    container_class=CONTAINER_CLASS,
+                    pagination_class=PAGINATION_CLASS,
+                    pages_to_scan=1,
+                    domain="https://webludus.pl/",
+                )
+                next_urls.append(scraper.find_next_page(img_source, set())[0])
+            return next_urls
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(crawl, range(8)))
+
+        assert results == [
+            [f"https://webludus.pl/{worker}/page/{page + 1}" for page in range(1, 201)]
+            for worker in range(8)
+        ]
+        get_html_dom.assert_not_called()
+        assert not scraper._pagination_links
+
 
 @pytest.mark.unittests
 class TestAddDomainIntoURLAddress:
@@ -351,3 +462,34 @@ class TestIsThisReallyTheNextPage:
         assert Bs4Scraper()._is_this_really_the_next_page(
             self.domain, new_url, self.scraped
         )
+
+
+@pytest.mark.integtests
+class TestBoundedMemory:
+    def test_pages_should_be_decomposed_after_extraction(
+        self,
+        synthetic_site: SyntheticSite,
+        anonymous_session: Session,
+        mocker: MockerFixture,
+    ) -> None:
+        results = {}
+        decompose = mocker.spy(BeautifulSoup, "decompose")
+        for bounded_memory in (False, True):
+            scraper = Bs4Scraper(decompose_pages=bounded_memory)
+            find_next_page = mocker.spy(scraper, "find_next_page")
+            results[bounded_memory] = ImageScraper(
+                website_url=synthetic_site.url,
+                container_class=CONTAINER_CLASS,
+                pagination_class=PAGINATION_CLASS,
+                pages_to_scan=3,
+                scraper=scraper,
+                session=anonymous_session,
+                bounded_memory=bounded_memory,
+            ).start_sync()
+
+        assert results[True].images == results[False].images
+        assert decompose.call_count == 3
+        assert isinstance(
+            find_next_page.call_args.kwargs["scraped_urls"], UrlFingerprints
+        )
+        assert synthetic_site.requests["/"] == 3
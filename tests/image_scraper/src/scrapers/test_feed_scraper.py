@@ -0,0 +1,249 @@
+from typing import Any
+from xml.etree.ElementTree import fromstring
+
+import pytest
+import responses
+from pytest_mock import MockerFixture
+from requests import Session
+
+from imgscraper.scraper_constructor import load_scraper
+from imgscraper.src.core import ImageScraper
+from imgscraper.src.models import Image, ImagesSource
+from imgscraper.src.scrapers.bs4_scraper import Bs4Scraper
+from imgscraper.src.scrapers.feed_scraper import FeedLinkParser, FeedScraper
+from tests.image_scraper.src.scrapers.test_stream_scraper import ChunkedResponse
+
+WEBSITE_URL = "https://webludus.pl/"
+HOME_PAGE = (
+    "<html><head><title>Webludus</title>"
+    '<link rel="alternate" type="application/rss+xml" href="/feed.xml">'
+    '</head><body><div class="simple-image"></div></body></html>'
+)
+RSS_ITEM = (
+    "<item><title>Image {0}</title><link>https://webludus.pl/{0}</link>"
+    '<enclosure url="https://webludus.pl/img/{0}.jpg" type="image/jpeg"/></item>'
+)
+ATOM_FEED = (
+    '<?xml version="1.0" encoding="utf-8"?>'
+    '<feed xmlns="http://www.w3.org/2005/Atom"><title>Webludus</title>'
+    '<entry><title>Atom image</title><link href="/atom-image"/>'
+    '<content type="html">&lt;p&gt;&lt;img src="/img/atom.png"&gt;&lt;/p&gt;</content>'
+    "</entry><entry><title>Old image</title>"
+    '<link rel="enclosure" href="/img/old.jpg"/></entry></feed>'
+)
+
+
+def rss_feed(numbers: range) -> str:
+    items = "".join(RSS_ITEM.format(number) for number in numbers)
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>'
+        f"<rss><channel><title>Webludus</title>{items}</channel></rss>"
+    )
+
+
+@pytest.fixture
+def images_source(anonymous_session: Session) -> ImagesSource:
+    return ImagesSource(
+        session=anonymous_session,
+        current_url_address=WEBSITE_URL,
+        container_class="simple-image",
+        pagination_class="pagination",
+        pages_to_scan=5,
+    )
+
+
+@pytest.mark.unittests
+class TestFeedLinkParser:
+    def test_feed_url_should_be_found_in_head(self) -> None:
+        parser = FeedLinkParser()
+
+        parser.feed(HOME_PAGE)
+
+        assert parser.feed_url == "/feed.xml"
+
+    def test_other_alternate_links_should_be_ignored(self) -> None:
+        parser = FeedLinkParser()
+
+        parser.feed(
+            '<head><link rel="alternate" hreflang="en" href="/en">'
+            '<link rel="stylesheet" type="text/css" href="/style.css"></head><body>'
+        )
+
+        assert parser.feed_url is None
+        assert parser.head_complete
+
+
+@pytest.mark.unittests
+class TestEntryToImage:
+    def test_rss_item_with_enclosure(self) -> None:
+        item = fromstring(RSS_ITEM.format(7))
+
+        assert FeedScraper._entry_to_image(item, WEBSITE_URL) == Image(
+            "https://webludus.pl/7", "https://webludus.pl/img/7.jpg", "Image 7"
+        )
+
+    def test_atom_entry_with_image_in_content(self) -> None:
+        entry = fromstring(ATOM_FEED)[1]
+
+        assert FeedScraper._entry_to_image(entry, WEBSITE_URL) == Image(
+            "https://webludus.pl/atom-image",
+            "https://webludus.pl/img/atom.png",
+            "Atom image",
+        )
+
+    def test_entry_without_image_should_be_skipped(self) -> None:
+        item = fromstring("<item><title>Text</title><link>/text</link></item>")
+
+        assert FeedScraper._entry_to_image(item, WEBSITE_URL) is None
+
+
+@pytest.mark.integtests
+class TestGetImagesData:
+    def test_images_should_be_read_from_discovered_feed(
+        self, images_source: ImagesSource, mocked_responses: responses.RequestsMock
+    ) -> None:
+        mocked_responses.get(WEBSITE_URL, body=HOME_PAGE)
+        mocked_responses.get(f"{WEBSITE_URL}feed.xml", body=rss_feed(range(5, 1, -1)))
+
+        images, duplicates = FeedScraper().get_images_data(
+            images_source, (f"{WEBSITE_URL}img/2.jpg",)
+        )
+
+        assert duplicates is True
+        assert [image.url_address for image in images] == [
+            f"{WEBSITE_URL}img/{number}.jpg" for number in (5, 4, 3)
+        ]
+
+    def test_atom_feed(
+        self, images_source: ImagesSource, mocked_responses: responses.RequestsMock
+    ) -> None:
+        mocked_responses.get(
+            WEBSITE_URL,
+            body=HOME_PAGE.replace("rss+xml", "atom+xml").replace("feed", "atom"),
+        )
+        mocked_responses.get(f"{WEBSITE_URL}atom.xml", body=ATOM_FEED)
+
+        images, _ = FeedScraper().get_images_data(
+            images_source, (f"{WEBSITE_URL}img/old.jpg",)
+        )
+
+        assert [image.title for image in images] == ["Atom image"]
+
+    def test_stop_reading_the_feed_when_last_sync_image_is_found(
+        self, mocker: MockerFixture, images_source: ImagesSource
+    ) -> None:
+        home_page = ChunkedResponse(HOME_PAGE, chunk_size=4096)
+        feed = ChunkedResponse(rss_feed(range(500, 0, -1)), chunk_size=4096)
+        mocker.patch.object(images_source.session, "get", side_effect=[home_page, feed])
+
+        images, duplicates = FeedScraper().get_images_data(
+            images_source, (f"{WEBSITE_URL}img/498.jpg",)
+        )
+
+        assert duplicates is True
+        assert [image.title for image in images] == ["Image 500", "Image 499"]
+        assert feed.closed
+        assert feed.chunks_read < len(feed._chunks) / 10
+
+    def test_feed_url_should_be_discovered_once_per_website(
+        self, images_source: ImagesSource, mocked_responses: responses.RequestsMock
+    ) -> None:
+        mocked_responses.get(WEBSITE_URL, body=HOME_PAGE)
+        mocked_responses.get(f"{WEBSITE_URL}feed.xml", body=rss_feed(range(3, 0, -1)))
+        scraper = FeedScraper()
+        calls_before = len(mocked_responses.calls)
+
+        scraper.get_images_data(images_source, (f"{WEBSITE_URL}img/1.jpg",))
+        scraper.get_images_data(images_source, (f"{WEBSITE_URL}img/1.jpg",))
+
+        assert [call.request.url for call in mocked_responses.calls[calls_before:]] == [
+            WEBSITE_URL,
+            f"{WEBSITE_URL}feed.xml",
+            f"{WEBSITE_URL}feed.xml",
+        ]
+
+    def test_fall_back_to_html_scraper_without_feed(
+        self,
+        mocker: MockerFixture,
+        images_source: ImagesSource,
+        mocked_responses: responses.RequestsMock,
+    ) -> None:
+        mocked_responses.get(WEBSITE_URL, body="<html><head></head><body></body>")
+        bs4_get_images_data = mocker.patch.object(
+            Bs4Scraper, "get_images_data", return_value=([], False)
+        )
+
+        FeedScraper().get_images_data(images_source, ("image",))
+
+        bs4_get_images_data.assert_called_once_with(images_source, ("image",))
+
+    @pytest.mark.parametrize(
+        "feed_response",
+        [
+            {"body": rss_feed(range(5, 2, -1))},
+            {"status": 404},
+            {"body": "<rss><channel><item>"},
+        ],
+        ids=["watermark older than feed", "feed not found", "broken feed"],
+    )
+    def test_fall_back_to_html_scraper_if_watermark_is_not_in_feed(
+        self,
+        mocker: MockerFixture,
+        images_source: ImagesSource,
+        mocked_responses: responses.RequestsMock,
+        feed_response: dict[str, Any],
+    ) -> None:
+        mocked_responses.get(WEBSITE_URL, body=HOME_PAGE)
+        mocked_responses.get(f"{WEBSITE_URL}feed.xml", **feed_response)
+        expected = ([Image(WEBSITE_URL, f"{WEBSITE_URL}img/5.jpg", "")], False)
+        bs4_get_images_data = mocker.patch.object(
+            Bs4Scraper, "get_images_data", return_value=expected
+        )
+        last_sync_data = (f"{WEBSITE_URL}img/1.jpg",)
+
+        result = FeedScraper().get_images_data(images_source, last_sync_data)
+
+        assert result == expected
+        bs4_get_images_data.assert_called_once_with(images_source, last_sync_data)
+
+    def test_first_sync_should_crawl_without_feed(
+        self,
+        mocker: MockerFixture,
+        images_source: ImagesSource,
+        mocked_responses: responses.RequestsMock,
+    ) -> None:
+        bs4_get_images_data = mocker.patch.object(
+            Bs4Scraper, "get_images_data", return_value=([], False)
+        )
+        calls_before = len(mocked_responses.calls)
+
+        FeedScraper().get_images_data(images_source)
+
+        bs4_get_images_data.assert_called_once_with(images_source, None)
+        assert len(mocked_responses.calls) == calls_before
+
+
+@pytest.mark.integtests
+class TestFeedScraperSync:
+    def test_sync_should_scan_only_the_feed(
+        self,
+        anonymous_session: Session,
+        mocked_responses: responses.RequestsMock,
+    ) -> None:
+        mocked_responses.get(WEBSITE_URL, body=HOME_PAGE)
+        mocked_responses.get(f"{WEBSITE_URL}feed.xml", body=rss_feed(range(20, 0, -1)))
+        image_scraper = ImageScraper(
+            website_url=WEBSITE_URL,
+            container_class="simple-image",
+            pagination_class="pagination",
+            pages_to_scan=5,
+            scraper=load_scraper("feed")(),
+            session=anonymous_session,
+        )
+
+        result = image_scraper.start_sync((f"{WEBSITE_URL}img/15.jpg",))
+
+        assert result.pages_scanned == 1
+        assert [image.title for image in result.images] == [
+            f"Image {number}" for number in range(20, 15, -1)
+        ]
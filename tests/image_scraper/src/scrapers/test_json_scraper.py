@@ -0,0 +1,230 @@
+import json
+from dataclasses import replace
+from typing import Any
+
+import pytest
+import responses
+from pytest_mock import MockerFixture
+from requests import Session
+
+from imgscraper.scraper_constructor import create_scraper
+from imgscraper.src.models import Image, ImagesSource, JsonFieldSpec
+from imgscraper.src.scrapers.bs4_scraper import Bs4Scraper
+from imgscraper.src.scrapers.json_scraper import (
+    EmbeddedJsonScraper,
+    find_json_blocks,
+    resolve_path,
+)
+
+WEBSITE_URL = "https://webludus.pl/"
+SPEC = JsonFieldSpec(
+    items_path="props.pageProps.memes",
+    image_path="image.url",
+    title_path="title",
+    source_path="permalink",
+    next_page_path="props.pageProps.nextPage",
+)
+
+
+def next_data_page(numbers: range, next_page: str = "/page/2") -> str:
+    data = {
+        "props": {
+            "pageProps": {
+                "memes": [
+                    {
+                        "title": f"Image {number}",
+                        "permalink": f"/{number}",
+                        "image": {"url": f"/img/{number}.jpg"},
+                    }
+                    for number in numbers
+                ],
+                "nextPage": next_page,
+            }
+        }
+    }
+    return (
+        '<html><head><script src="/app.js"></script></head><body>'
+        '<div class="simple-image"><a href="/html"><img src="/img/html.jpg" alt="HTML">'
+        '</a></div><script id="__NEXT_DATA__" type="application/json">'
+        f"{json.dumps(data)}</script></body></html>"
+    )
+
+
+@pytest.fixture
+def images_source(anonymous_session: Session) -> ImagesSource:
+    return ImagesSource(
+        session=anonymous_session,
+        current_url_address=WEBSITE_URL,
+        container_class="simple-image",
+        pagination_class="pagination",
+        pages_to_scan=5,
+    )
+
+
+@pytest.mark.unittests
+class TestFindJsonBlocks:
+    def test_only_json_scripts_should_be_returned(self) -> None:
+        body = (
+            b'<script>var a = "<b>";</script>'
+            b'<script type="application/ld+json">{"a": 1}</script>'
+            b'<script id="__NEXT_DATA__">{"b": 2}</script><script type="applic'
+        )
+
+        assert list(find_json_blocks(body)) == [b'{"a": 1}', b'{"b": 2}']
+
+    def test_script_id_should_limit_the_scan(self) -> None:
+        body = (
+            b'<script type="application/json" id="other">{"a": 1}</script>'
+            b"<script id='state'>{\"b\": 2}</script>"
+        )
+
+        assert list(find_json_blocks(body, script_id="state")) == [b'{"b": 2}']
+
+
+@pytest.mark.unittests
+class TestResolvePath:
+    @pytest.mark.parametrize(
+        "path, expected",
+        [
+            ("", [{"a": [{"b": 1}, {"b": 2}]}]),
+            ("a.0.b", [1]),
+            ("a.-1.b", [2]),
+            ("a.*.b", [1, 2]),
+            ("a.5.b", []),
+            ("missing", []),
+        ],
+    )
+    def test_path_should_be_resolved(self, path: str, expected: list[Any]) -> None:
+        assert resolve_path({"a": [{"b": 1}, {"b": 2}]}, path) == expected
+
+
+@pytest.mark.integtests
+class TestGetImagesData:
+    def test_images_should_be_read_from_next_data(
+        self, images_source: ImagesSource, mocked_responses: responses.RequestsMock
+    ) -> None:
+        mocked_responses.get(WEBSITE_URL, body=next_data_page(range(10, 7, -1)))
+
+        images, duplicates = EmbeddedJsonScraper(SPEC).get_images_data(
+            images_source, (f"{WEBSITE_URL}img/8.jpg",)
+        )
+
+        assert duplicates is True
+        assert images == [
+            Image(f"{WEBSITE_URL}10", f"{WEBSITE_URL}img/10.jpg", "Image 10"),
+            Image(f"{WEBSITE_URL}9", f"{WEBSITE_URL}img/9.jpg", "Image 9"),
+        ]
+
+    def test_no_dom_should_be_built_for_json_pages(
+        self,
+        mocker: MockerFixture,
+        images_source: ImagesSource,
+        mocked_responses: responses.RequestsMock,
+    ) -> None:
+        mocked_responses.get(WEBSITE_URL, body=next_data_page(range(3, 0, -1)))
+        beautiful_soup = mocker.patch(
+            "imgscraper.src.scrapers.bs4_scraper.BeautifulSoup"
+        )
+
+        images, _ = EmbeddedJsonScraper(SPEC).get_images_data(images_source)
+
+        assert len(images) == 3
+        beautiful_soup.assert_not_called()
+
+    def test_fall_back_to_html_when_items_are_missing(
+        self, images_source: ImagesSource, mocked_responses: responses.RequestsMock
+    ) -> None:
+        mocked_responses.get(WEBSITE_URL, body=next_data_page(range(3, 0, -1)))
+        scraper = EmbeddedJsonScraper({"items_path": "missing", "image_path": "url"})
+
+        images, duplicates = scraper.get_images_data(images_source)
+
+        assert duplicates is False
+        assert images == [
+            Image(f"{WEBSITE_URL}html", f"{WEBSITE_URL}img/html.jpg", "HTML")
+        ]
+
+
+@pytest.mark.integtests
+class TestFindNextPage:
+    def test_next_page_should_be_taken_from_json(
+        self,
+        mocker: MockerFixture,
+        images_source: ImagesSource,
+        mocked_responses: responses.RequestsMock,
+    ) -> None:
+        mocked_responses.get(WEBSITE_URL, body=next_data_page(range(3, 0, -1)))
+        bs4_find_next_page = mocker.patch.object(Bs4Scraper, "find_next_page")
+        scraper = EmbeddedJsonScraper(SPEC)
+        scraper.get_images_data(images_source)
+
+        next_page, scraped_urls = scraper.find_next_page(images_source, set())
+
+        assert next_page == f"{WEBSITE_URL}page/2"
+        assert WEBSITE_URL in scraped_urls
+        bs4_find_next_page.assert_not_called()
+
+    def test_next_pages_should_be_bounded_by_pagination_cache(
+        self,
+        mocker: MockerFixture,
+        images_source: ImagesSource,
+        mocked_responses: responses.RequestsMock,
+    ) -> None:
+        second_page = replace(images_source, current_url_address=f"{WEBSITE_URL}2")
+        mocked_responses.get(WEBSITE_URL, body=next_data_page(range(3, 0, -1)))
+        mocked_responses.get(
+            second_page.current_url_address,
+            body=next_data_page(range(6, 3, -1), "/page/3"),
+        )
+        bs4_find_next_page = mocker.patch.object(
+            Bs4Scraper, "find_next_page", return_value=("html", set())
+        )
+        scraper = EmbeddedJsonScraper(SPEC)
+        scraper.max_cached_paginations = 1
+
+        scraper.get_images_data(images_source)
+        scraper.get_images_data(second_page)
+
+        assert scraper.find_next_page(second_page, set())[0] == (f"{WEBSITE_URL}page/3")
+        assert scraper.find_next_page(images_source, set())[0] == "html"
+        bs4_find_next_page.assert_called_once()
+
+    def test_cursor_next_page_should_be_kept_whole(
+        self, images_source: ImagesSource, mocked_responses: responses.RequestsMock
+    ) -> None:
+        mocked_responses.get(
+            WEBSITE_URL, body=next_data_page(range(3, 0, -1), "/feed?cursor=abc")
+        )
+        scraper = EmbeddedJsonScraper(SPEC)
+        scraper.get_images_data(images_source)
+
+        next_page, _ = scraper.find_next_page(images_source, set())
+
+        assert next_page == f"{WEBSITE_URL}feed?cursor=abc"
+
+    def test_raise_index_error_on_scraped_next_page(
+        self, images_source: ImagesSource, mocked_responses: responses.RequestsMock
+    ) -> None:
+        mocked_responses.get(WEBSITE_URL, body=next_data_page(range(3, 0, -1), "/"))
+        scraper = EmbeddedJsonScraper(SPEC)
+        scraper.get_images_data(images_source)
+
+        with pytest.raises(IndexError):
+            scraper.find_next_page(images_source, set())
+
+
+@pytest.mark.unittests
+class TestCreateScraper:
+    def test_scraper_options_should_be_passed_to_the_scraper(self) -> None:
+        scraper = create_scraper(
+            website_url=WEBSITE_URL,
+            container_class="simple-image",
+            pagination_class="pagination",
+            scraper="json",
+            scraper_options={"spec": {"items_path": "items", "image_path": "url"}},
+        )
+
+        assert isinstance(scraper.scraper, EmbeddedJsonScraper)
+        assert scraper.scraper.spec == JsonFieldSpec(
+            items_path="items", image_path="url"
+        )
@@ -0,0 +1,205 @@
+from typing import Iterator
+
+import pytest
+import responses
+from pytest_mock import MockerFixture
+from requests import Session
+
+from imgscraper.src.core import ImageScraper
+from imgscraper.src.models import ExtractionPlan, Image, ImagesSource
+from imgscraper.src.scrapers.bs4_scraper import Bs4Scraper
+from imgscraper.src.scrapers.stream_scraper import ContainerStreamParser, StreamScraper
+from tests.synthetic_site import CONTAINER_CLASS, PAGINATION_CLASS, SyntheticSite
+
+
+class ChunkedResponse:
+    """Minimal streamed response, which records how many chunks have been read."""
+
+    def __init__(self, body: str, chunk_size: int) -> None:
+        self.status_code = 200
+        self.encoding = "utf-8"
+        self.headers = {"Content-Type": "text/html; charset=utf-8"}
+        self.chunks_read = 0
+        self.closed = False
+        data = body.encode()
+        self._chunks = [
+            data[start : start + chunk_size]
+            for start in range(0, len(data), chunk_size)
+        ]
+
+    def iter_content(self, chunk_size: int) -> Iterator[bytes]:
+        for chunk in self._chunks:
+            self.chunks_read += 1
+            yield chunk
+
+    def close(self) -> None:
+        self.closed = True
+
+
+@pytest.mark.unittests
+class TestContainerStreamParser:
+    def test_containers_should_be_emitted_when_closed(self) -> None:
+        parser = ContainerStreamParser("simple-image", "pagination")
+
+        parser.feed('<div class="simple-image"><a href="/1"><img src="/1.jpg" ')
+        first_pop = parser.pop_containers()
+        parser.feed('alt="1"><br></a></div><div class="simple-image">')
+        second_pop = parser.pop_containers()
+
+        assert first_pop == []
+        assert second_pop == [({"href": "/1"}, [{"src": "/1.jpg", "alt": "1"}])]
+
+    def test_pagination_links_should_be_captured(self) -> None:
+        parser = ContainerStreamParser("simple-image", "pagination")
+
+        parser.feed('<div class="pagination"><a href="/page/2">2</a><a>3</a></div>')
+
+        assert parser.pagination_complete
+        assert parser.pagination_links == ["/page/2", "#"]
+
+    def test_unclosed_container_should_be_emitted_on_close(self) -> None:
+        parser = ContainerStreamParser("simple-image")
+
+        parser.feed('<div class="simple-image"><img src="/1.jpg" alt="1"/>')
+        parser.close()
+
+        assert parser.pop_containers() == [(None, [{"src": "/1.jpg", "alt": "1"}])]
+
+    def test_unclosed_elements_inside_container_should_be_ignored(self) -> None:
+        parser = ContainerStreamParser("simple-image", "pagination")
+
+        parser.feed(
+            '<div class="simple-image"><div><a href="/1"><img src="/1.jpg"></a>'
+            "<p>Unclosed paragraph</div></div>"
+            '<div class="simple-image"><ul><li>One<li>Two</ul>'
+            '<a href="/2"><img src="/2.jpg"></a></div>'
+            '<ul class="pagination"><li><a href="/page/2">2</a><li>3</ul>'
+        )
+
+        assert parser.pop_containers() == [
+            ({"href": "/1"}, [{"src": "/1.jpg"}]),
+            ({"href": "/2"}, [{"src": "/2.jpg"}]),
+        ]
+        assert parser.pagination_complete
+        assert parser.pagination_links == ["/page/2"]
+
+
+@pytest.mark.integtests
+class TestGetImagesData:
+    def test_output_should_match_bs4_scraper(
+        self,
+        prepare_images_source: ImagesSource,
+        mocked_responses: responses.RequestsMock,
+        prepare_second_html_doc: str,
+    ) -> None:
+        mocked_responses.get(
+            prepare_images_source.current_url_address, body=prepare_second_html_doc
+        )
+        last_sync_data = ("https://webludus.pl/img/last_seen_image.jpg",)
+
+        expected = Bs4Scraper().get_images_data(prepare_images_source, last_sync_data)
+        images = StreamScraper().get_images_data(prepare_images_source, last_sync_data)
+
+        assert images == expected
+        assert images[1] is True
+
+    def test_stop_reading_the_response_when_last_sync_image_is_found(
+        self, mocker: MockerFixture, anonymous_session: Session
+    ) -> None:
+        body = SyntheticSite(images_per_page=50, padding=1000).render(1)
+        response = ChunkedResponse(body, chunk_size=4096)
+        mocker.patch.object(anonymous_session, "get", return_value=response)
+        img_source = ImagesSource(
+            session=anonymous_session,
+            current_url_address="https://webludus.pl/",
+            container_class=CONTAINER_CLASS,
+            pagination_class=PAGINATION_CLASS,
+            pages_to_scan=1,
+        )
+
+        images, duplicates = StreamScraper().get_images_data(
+            img_source, ("https://webludus.pl/img/499.jpg",)
+        )
+
+        assert duplicates is True
+        assert images == [
+            Image(
+                "https://webludus.pl/500",
+                "https://webludus.pl/img/500.jpg",
+                "Image 500",
+            )
+        ]
+        assert response.closed
+        assert response.chunks_read < len(response._chunks) / 10
+
+    def test_peek_images_should_read_only_first_containers(
+        self, mocker: MockerFixture, anonymous_session: Session
+    ) -> None:
+        body = SyntheticSite(images_per_page=50, padding=1000).render(1)
+        response = ChunkedResponse(body, chunk_size=4096)
+        get = mocker.patch.object(anonymous_session, "get", return_value=response)
+        img_source = ImagesSource(
+            session=anonymous_session,
+            current_url_address="https://webludus.pl/",
+            container_class=CONTAINER_CLASS,
+            pagination_class=PAGINATION_CLASS,
+            pages_to_scan=1,
+        )
+
+        peeked_response, images = StreamScraper().peek_images(
+            img_source, containers=2, headers={"If-None-Match": '"499"'}
+        )
+
+        assert peeked_response is get.return_value
+        assert [image.url_address for image in images] == [
+            "https://webludus.pl/img/500.jpg",
+            "https://webludus.pl/img/499.jpg",
+        ]
+        assert response.closed
+        assert response.chunks_read == 1
+        assert get.call_args.kwargs["headers"] == {"If-None-Match": '"499"'}
+
+    def test_fall_back_to_bs4_for_css_selectors(
+        self, mocker: MockerFixture, prepare_images_source: ImagesSource
+    ) -> None:
+        bs4_get_images_data = mocker.patch.object(Bs4Scraper, "get_images_data")
+        img_source = ImagesSource(
+            session=prepare_images_source.session,
+            current_url_address=prepare_images_source.current_url_address,
+            container_class="",
+            pagination_class="",
+            pages_to_scan=1,
+            extraction_plan=ExtractionPlan(container_selector="main > .image"),
+        )
+
+        StreamScraper().get_images_data(img_source)
+
+        bs4_get_images_data.assert_called_once_with(img_source, None)
+
+
+@pytest.mark.integtests
+class TestStreamScraperSync:
+    def test_sync_should_not_download_pages_twice(
+        self, synthetic_site: SyntheticSite, anonymous_session: Session
+    ) -> None:
+        image_scraper = ImageScraper(
+            website_url=synthetic_site.url,
+            container_class=CONTAINER_CLASS,
+            pagination_class=PAGINATION_CLASS,
+            pages_to_scan=5,
+            scraper=StreamScraper(),
+            session=anonymous_session,
+        )
+
+        result = image_scraper.start_sync((synthetic_site.image_url(65),))
+
+        assert result.pages_scanned == 4
+        assert [image.title for image in result.images] == [
+            f"Image {number}" for number in range(100, 65, -1)
+        ]
+        assert synthetic_site.requests == {
+            "/": 1,
+            "/page/2": 1,
+            "/page/3": 1,
+            "/page/4": 1,
+        }
@@ -0,0 +1,70 @@
+from pathlib import Path
+
+import pytest
+
+from imgscraper.src.adaptive_depth import DepthPredictor
+
+SITE = "https://webludus.pl/"
+
+
+@pytest.mark.unittests
+class TestPredict:
+    def test_use_ceiling_if_there_is_no_history(self) -> None:
+        decision = DepthPredictor(max_pages_to_scan=7).predict(SITE)
+
+        assert decision.pages_to_scan == 7
+        assert decision.ceiling == 7
+        assert decision.reason == "no sync history"
+
+    def test_depth_should_cover_new_images_with_margin(self) -> None:
+        predictor = DepthPredictor(max_pages_to_scan=10)
+        predictor.record(SITE, 3, 3, [10, 10, 4])
+
+        decision = predictor.predict(SITE)
+
+        assert decision.pages_to_scan == 4
+        assert "24 new images" in decision.reason
+
+    def test_one_page_is_enough_if_watermark_was_on_the_first_page(self) -> None:
+        predictor = DepthPredictor(max_pages_to_scan=10, margin=0)
+        predictor.record(SITE, 1, 1, [2])
+
+        assert predictor.predict(SITE).pages_to_scan == 1
+
+    def test_double_depth_if_watermark_was_not_reached(self) -> None:
+        predictor = DepthPredictor(max_pages_to_scan=5)
+        predictor.record(SITE, 3, None, [10, 10, 10])
+
+        decision = predictor.predict(SITE)
+
+        assert decision.pages_to_scan == 5
+        assert decision.reason == "watermark not reached during the last sync"
+
+    def test_raise_value_error_if_ceiling_is_lower_than_one(self) -> None:
+        with pytest.raises(ValueError):
+            DepthPredictor(max_pages_to_scan=0)
+
+
+@pytest.mark.unittests
+class TestRecord:
+    def test_history_should_be_limited(self) -> None:
+        predictor = DepthPredictor(history_size=2)
+        for pages in range(1, 5):
+            predictor.record(SITE, pages, pages, [1] * pages)
+
+        assert [run["pages_scanned"] for run in predictor.history(SITE)] == [3, 4]
+
+    def test_history_should_be_persisted(self, tmp_path: Path) -> None:
+        path = tmp_path / "history.json"
+        DepthPredictor(history_path=path).record(SITE, 2, 2, [5, 1])
+
+        history = DepthPredictor(history_path=path).history(SITE)
+
+        assert history == [
+            {
+                "pages_scanned": 2,
+                "watermark_page": 2,
+                "new_images": 6,
+                "images_per_page": 5.0,
+            }
+        ]
@@ -0,0 +1,247 @@
+from time import monotonic, sleep
+from typing import Any
+
+import pytest
+from pytest_mock import MockerFixture
+from requests import Response, Session
+
+from imgscraper.src.budget import BudgetExhausted, BudgetTracker
+from imgscraper.src.circuit_breaker import CircuitBreakerRegistry
+from imgscraper.src.core import ImageScraper
+from imgscraper.src.models import Image, SyncBudget, SyncResult
+from imgscraper.src.pagination import PaginationTemplateStore
+from imgscraper.src.scrapers.bs4_scraper import Bs4Scraper
+from imgscraper.src.scrapers.scraper import Scraper
+from imgscraper.src.scrapers.stream_scraper import StreamScraper
+from imgscraper.src.transport import (
+    BudgetedTransport,
+    CircuitBreakerTransport,
+    RequestsTransport,
+    Transport,
+)
+from tests.synthetic_site import CONTAINER_CLASS, PAGINATION_CLASS, SyntheticSite
+
+
+class SlowTransport(RequestsTransport):
+    def __init__(self, session: Session, latency: float) -> None:
+        super().__init__(session)
+        self.latency = latency
+
+    def get(self, url_address: str, stream: bool = False, **kwargs: Any) -> Response:
+        sleep(self.latency)
+        return super().get(url_address, stream=stream, **kwargs)
+
+
+def ok_response() -> Response:
+    response = Response()
+    response.status_code = 200
+    response._content = b"OK"
+    return response
+
+
+def prepare_scraper(
+    site: SyntheticSite,
+    session: Session,
+    pages_to_scan: int = 10,
+    scraper: Scraper | None = None,
+    transport: Transport | None = None,
+    pagination_store: PaginationTemplateStore | None = None,
+    max_workers: int = 4,
+) -> ImageScraper:
+    return ImageScraper(
+        website_url=site.url,
+        container_class=CONTAINER_CLASS,
+        pagination_class=PAGINATION_CLASS,
+        pages_to_scan=pages_to_scan,
+        scraper=scraper or StreamScraper(),
+        session=session,
+        transport=transport,
+        pagination_store=pagination_store,
+        max_workers=max_workers,
+    )
+
+
+@pytest.mark.unittests
+class TestBudgetTracker:
+    def test_check_should_raise_when_requests_run_out(self) -> None:
+        tracker = BudgetTracker(SyncBudget(max_requests=2))
+
+        tracker.start_request()
+        tracker.start_request()
+
+        with pytest.raises(BudgetExhausted):
+            tracker.start_request()
+        assert tracker.requests == 2
+
+    def test_check_should_raise_when_bytes_run_out(self) -> None:
+        tracker = BudgetTracker(SyncBudget(max_bytes=100))
+
+        tracker.add_bytes(99)
+        tracker.check()
+        tracker.add_bytes(1)
+
+        with pytest.raises(BudgetExhausted):
+            tracker.check()
+
+    @pytest.mark.parametrize(
+        "timeout, expected",
+        [(None, 10), (3, 3), (30, 10), ((2, 30), (2, 10)), ((None, 5), (10, 5))],
+    )
+    def test_request_timeout_should_not_exceed_the_remaining_time(
+        self, timeout: Any, expected: Any
+    ) -> None:
+        tracker = BudgetTracker(SyncBudget(timeout=10))
+        tracker.started = monotonic()
+
+        assert tracker.request_timeout(timeout) == pytest.approx(expected, abs=0.1)
+
+    def test_request_timeout_should_be_kept_without_time_budget(self) -> None:
+        assert BudgetTracker(SyncBudget(max_requests=1)).request_timeout(5) == 5
+
+    @pytest.mark.parametrize(
+        "budget, timeout",
+        [(SyncBudget(max_requests=5), 30), (SyncBudget(timeout=10), 10)],
+    )
+    def test_transport_default_timeout_should_be_kept(
+        self, mocker: MockerFixture, budget: SyncBudget, timeout: float
+    ) -> None:
+        transport = mocker.Mock(spec=Transport, timeout=30)
+        transport.get.return_value = ok_response()
+        budgeted = BudgetedTransport(
+            CircuitBreakerTransport(transport, CircuitBreakerRegistry()),
+            BudgetTracker(budget),
+        )
+
+        budgeted.get("https://webludus.pl/")
+
+        assert transport.get.call_args.kwargs["timeout"] == pytest.approx(
+            timeout, abs=0.1
+        )
+
+    def test_timeout_should_not_be_set_without_default_or_time_budget(
+        self, mocker: MockerFixture
+    ) -> None:
+        transport = mocker.Mock(spec=Transport)
+        transport.get.return_value = ok_response()
+
+        BudgetedTransport(transport, BudgetTracker(SyncBudget(max_bytes=100))).get(
+            "https://webludus.pl/"
+        )
+
+        assert "timeout" not in transport.get.call_args.kwargs
+
+
+@pytest.mark.integtests
+class TestBudgetedSync:
+    def test_request_budget_should_return_partial_result(
+        self, synthetic_site: SyntheticSite, anonymous_session: Session
+    ) -> None:
+        image_scraper = prepare_scraper(synthetic_site, anonymous_session)
+
+        result = image_scraper.start_sync(budget=SyncBudget(max_requests=3))
+
+        assert result.budget_exhausted
+        assert result.pages_scanned == 3
+        assert result.resume_url == f"{synthetic_site.url}page/4"
+        assert [image.url_address for image in result.images] == [
+            synthetic_site.image_url(number) for number in range(100, 70, -1)
+        ]
+
+    def test_resumed_sync_should_continue_from_resume_url(
+        self, synthetic_site: SyntheticSite, anonymous_session: Session
+    ) -> None:
+        image_scraper = prepare_scraper(synthetic_site, anonymous_session)
+        full_result = prepare_scraper(
+            synthetic_site, anonymous_session, pages_to_scan=6
+        ).start_sync()
+
+        first_part = image_scraper.start_sync(budget=SyncBudget(max_requests=4))
+        second_part = prepare_scraper(
+            synthetic_site, anonymous_session, pages_to_scan=2
+        ).start_sync(resume_url=first_part.resume_url)
+
+        assert first_part.images + second_part.images == full_result.images
+        assert not second_part.budget_exhausted
+        assert second_part.resume_url is None
+
+    @pytest.mark.parametrize("max_requests", [1, 2, 3])
+    def test_resumed_bs4_syncs_should_advance_without_overlap(
+        self,
+        synthetic_site: SyntheticSite,
+        anonymous_session: Session,
+        max_requests: int,
+    ) -> None:
+        full_result = prepare_scraper(
+            synthetic_site, anonymous_session, pages_to_scan=4, scraper=Bs4Scraper()
+        ).start_sync()
+        images: list[Image] = []
+        pages_scanned = 0
+        result = SyncResult(images=[], pages_scanned=0)
+
+        for _ in range(12):
+            result = prepare_scraper(
+                synthetic_site,
+                anonymous_session,
+                pages_to_scan=4 - pages_scanned,
+                scraper=Bs4Scraper(),
+            ).start_sync(
+                budget=SyncBudget(max_requests=max_requests),
+                resume_url=result.resume_url,
+                resume_scanned=result.resume_scanned,
+            )
+            images += result.images
+            pages_scanned += result.pages_scanned
+            if pages_scanned == 4:
+                break
+
+        assert images == full_result.images
+
+    def test_time_budget_should_stop_slow_sync(
+        self, synthetic_site: SyntheticSite, anonymous_session: Session
+    ) -> None:
+        image_scraper = prepare_scraper(
+            synthetic_site,
+            anonymous_session,
+            transport=SlowTransport(anonymous_session, latency=0.2),
+        )
+
+        start = monotonic()
+        result = image_scraper.start_sync(budget=SyncBudget(timeout=0.5))
+
+        assert monotonic() - start < 1
+        assert result.budget_exhausted
+        assert 1 <= result.pages_scanned < 10
+        assert len(result.images) == result.pages_scanned * 10
+
+    def test_byte_budget_should_interrupt_the_download(
+        self, anonymous_session: Session
+    ) -> None:
+        with SyntheticSite(padding=1000) as site:
+            image_scraper = prepare_scraper(site, anonymous_session)
+
+            result = image_scraper.start_sync(budget=SyncBudget(max_bytes=25_000))
+
+        assert result.budget_exhausted
+        assert result.pages_scanned == 2
+        assert result.resume_url == f"{site.url}page/3"
+        assert site.requests["/page/4"] == 0
+
+    def test_fan_out_should_stop_at_the_budget(
+        self, synthetic_site: SyntheticSite, anonymous_session: Session
+    ) -> None:
+        pagination_store = PaginationTemplateStore()
+        image_scraper = prepare_scraper(
+            synthetic_site,
+            anonymous_session,
+            scraper=Bs4Scraper(),
+            pagination_store=pagination_store,
+            max_workers=1,
+        )
+        image_scraper.start_sync()
+
+        result = image_scraper.start_sync(budget=SyncBudget(max_requests=5))
+
+        assert result.budget_exhausted
+        assert result.pages_scanned == 5
+        assert result.resume_url == f"{synthetic_site.url}page/6"
+        assert pagination_store.get(image_scraper.image_source.domain) is not None
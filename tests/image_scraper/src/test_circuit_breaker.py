@@ -0,0 +1,172 @@
+import socket
+
+import pytest
+import responses
+from requests import ConnectionError as RequestsConnectionError
+from requests import Session
+
+from imgscraper.scraper_constructor import create_scraper
+from imgscraper.src.circuit_breaker import (
+    CircuitBreaker,
+    CircuitBreakerRegistry,
+    CircuitOpenError,
+)
+from imgscraper.src.transport import CircuitBreakerTransport, RequestsTransport
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def closed_port_url() -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}/"
+
+
+@pytest.mark.unittests
+class TestCircuitBreaker:
+    def test_circuit_should_open_after_consecutive_failures(self) -> None:
+        breaker = CircuitBreaker("a.pl", failure_threshold=3)
+
+        for _ in range(3):
+            breaker.before_call()
+            breaker.record(success=False, latency=0.1)
+
+        assert breaker.state == "open"
+        with pytest.raises(CircuitOpenError, match="a.pl"):
+            breaker.before_call()
+
+    def test_success_should_reset_consecutive_failures(self) -> None:
+        breaker = CircuitBreaker("a.pl", failure_threshold=3)
+
+        for success in (False, False, True, False, False):
+            breaker.record(success=success, latency=0.1)
+
+        assert breaker.state == "closed"
+
+    def test_circuit_should_open_when_error_rate_is_too_high(self) -> None:
+        breaker = CircuitBreaker(
+            "a.pl", failure_threshold=10, error_rate_threshold=0.5, window=4
+        )
+
+        for success in (True, False, True, False):
+            breaker.record(success=success, latency=0.1)
+
+        assert breaker.state == "open"
+        assert breaker.health().error_rate == 0.5
+
+    def test_slow_calls_should_count_as_failures(self) -> None:
+        breaker = CircuitBreaker("a.pl", failure_threshold=2, slow_call_threshold=1)
+
+        breaker.record(success=True, latency=2)
+        breaker.record(success=True, latency=3)
+
+        assert breaker.state == "open"
+        assert breaker.health().average_latency == pytest.approx(2.5)
+
+    def test_half_open_circuit_should_let_single_probe_through(self) -> None:
+        clock = FakeClock()
+        breaker = CircuitBreaker(
+            "a.pl", failure_threshold=1, recovery_timeout=30, clock=clock
+        )
+        breaker.record(success=False, latency=0.1)
+        clock.now = 29
+
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        assert breaker.health().retry_after == pytest.approx(1)
+
+        clock.now = 30
+        breaker.before_call()
+        assert breaker.state == "half-open"
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+
+        breaker.record(success=True, latency=0.1)
+        assert breaker.state == "closed"
+
+    def test_failed_probe_should_open_circuit_again(self) -> None:
+        clock = FakeClock()
+        breaker = CircuitBreaker(
+            "a.pl", failure_threshold=1, recovery_timeout=30, clock=clock
+        )
+        breaker.record(success=False, latency=0.1)
+        clock.now = 30
+        breaker.before_call()
+
+        breaker.record(success=False, latency=0.1)
+
+        assert breaker.state == "open"
+        assert breaker.health().retry_after == 30
+
+
+@pytest.mark.unittests
+class TestCircuitBreakerRegistry:
+    def test_breakers_should_be_kept_per_host(self) -> None:
+        registry = CircuitBreakerRegistry(failure_threshold=1)
+
+        registry.get("https://a.pl/page/2").record(success=False, latency=0.1)
+
+        assert registry.get("https://a.pl/") is registry.get("https://a.pl/page/3")
+        assert {host: health.state for host, health in registry.health().items()} == {
+            "a.pl": "open"
+        }
+        assert registry.get("https://b.pl/").state == "closed"
+
+
+@pytest.mark.unittests
+class TestCircuitBreakerTransport:
+    def test_fetch_should_stop_retrying_when_circuit_opens(
+        self, mocked_responses: responses.RequestsMock, anonymous_session: Session
+    ) -> None:
+        mocked_responses.get("https://webludus.pl/down", status=503)
+        transport = CircuitBreakerTransport(
+            RequestsTransport(anonymous_session, delay=0),
+            CircuitBreakerRegistry(failure_threshold=3),
+        )
+
+        with pytest.raises(CircuitOpenError):
+            transport.fetch("https://webludus.pl/down")
+        with pytest.raises(CircuitOpenError):
+            transport.get("https://webludus.pl/")
+
+        assert len(mocked_responses.calls) == 3
+        assert transport.breakers.health()["webludus.pl"].failures == 3
+
+    def test_client_errors_should_not_open_circuit(
+        self, mocked_responses: responses.RequestsMock, anonymous_session: Session
+    ) -> None:
+        mocked_responses.get("https://webludus.pl/missing", status=404)
+        transport = CircuitBreakerTransport(
+            RequestsTransport(anonymous_session, retries=5, delay=0),
+            CircuitBreakerRegistry(failure_threshold=3),
+        )
+
+        with pytest.raises(Exception, match="404"):
+            transport.fetch("https://webludus.pl/missing")
+
+        assert transport.breakers.health()["webludus.pl"].state == "closed"
+
+
+@pytest.mark.integtests
+class TestSharedCircuitBreakers:
+    def test_scrapers_of_the_process_should_share_host_state(self) -> None:
+        website_url = closed_port_url()
+        registry = CircuitBreakerRegistry(failure_threshold=2, recovery_timeout=60)
+        scrapers = [
+            create_scraper(website_url, "a", "b", circuit_breaker=registry)
+            for _ in range(2)
+        ]
+
+        for image_scraper in scrapers:
+            with pytest.raises(RequestsConnectionError):
+                image_scraper.start_sync()
+
+        with pytest.raises(CircuitOpenError):
+            create_scraper(website_url, "a", "b", circuit_breaker=registry).start_sync()
+        assert isinstance(scrapers[0].image_source.transport, CircuitBreakerTransport)
@@ -1,10 +1,18 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
 import pytest
 import responses
+from pytest_mock import MockerFixture
 from requests import Session
 
+from imgscraper.src.adaptive_depth import DepthPredictor
 from imgscraper.src.core import ImageScraper
 from imgscraper.src.models import Image, ImagesSource
+from imgscraper.src.pagination import PaginationTemplate, PaginationTemplateStore
 from imgscraper.src.scrapers import bs4_scraper, scraper
+from imgscraper.src.scrapers.stream_scraper import StreamScraper
+from tests.synthetic_site import CONTAINER_CLASS, PAGINATION_CLASS, SyntheticSite
 
 
 @pytest.mark.unittests
@@ -27,6 +35,56 @@ class TestStartSync:
         prepare_image_scraper.start_sync()
         assert prepare_image_scraper.synchronization_data == [prepare_image]
 
+    def test_sync_result_should_describe_the_crawl(
+        self, prepare_image_scraper: ImageScraper, prepare_image: Image
+    ) -> None:
+        result = prepare_image_scraper.start_sync()
+
+        assert result.images == [prepare_image] * 3
+        assert result.pages_scanned == 3
+        assert result.watermark_page == 3
+        assert result.depth_decision is None
+
+    def test_profile_should_be_added_to_sync_result(
+        self, prepare_image_scraper: ImageScraper, tmp_path: Path
+    ) -> None:
+        result = prepare_image_scraper.start_sync(
+            profile="cprofile", profile_dir=tmp_path
+        )
+
+        assert result.pages_scanned == 3
+        assert result.profile is not None
+        assert result.profile.mode == "cprofile"
+        assert result.profile.hotspots
+        assert (
+            "get_images_data" in Path(result.profile.collapsed_stacks_path).read_text()
+        )
+
+    def test_sync_result_should_not_have_profile_by_default(
+        self, prepare_image_scraper: ImageScraper
+    ) -> None:
+        assert prepare_image_scraper.start_sync().profile is None
+
+    def test_depth_predictor_should_choose_pages_to_scan(
+        self, prepare_image_scraper: ImageScraper
+    ) -> None:
+        predictor = DepthPredictor(max_pages_to_scan=2)
+        prepare_image_scraper.depth_predictor = predictor
+
+        first_result = prepare_image_scraper.start_sync(("last_seen",))
+        second_result = prepare_image_scraper.start_sync(("last_seen",))
+
+        assert first_result.depth_decision is not None
+        assert first_result.depth_decision.pages_to_scan == 2
+        assert first_result.pages_scanned == 2
+        assert first_result.watermark_page is None
+        assert second_result.depth_decision is not None
+        assert second_result.depth_decision.reason == (
+            "watermark not reached during the last sync"
+        )
+        assert second_result.pages_scanned == 2
+        assert len(predictor.history("https://webludus.pl/")) == 2
+
 
 @pytest.mark.integtests
 class TestSynchronizationDataSetter:
@@ -41,6 +99,20 @@ class TestSynchronizationDataSetter:
         assert isinstance(prepare_image_scraper.synchronization_data[0], Image)
         assert prepare_image_scraper.synchronization_data[0] == prepare_image
 
+    def test_synchronization_data_should_keep_newest_images_up_to_limit(
+        self, prepare_image_scraper: ImageScraper
+    ) -> None:
+        prepare_image_scraper.synchronization_data_limit = 3
+
+        for numbers in ((3, 2, 1), (5, 4, 3), (1,)):
+            prepare_image_scraper.synchronization_data = [
+                Image("", f"https://a.pl/{number}.jpg", "") for number in numbers
+            ]
+
+        assert [
+            image.url_address for image in prepare_image_scraper.synchronization_data
+        ] == ["https://a.pl/4.jpg", "https://a.pl/5.jpg", "https://a.pl/1.jpg"]
+
     def test_raise_attribute_error_if_user_does_not_use_list(
         self, prepare_image: Image, prepare_image_scraper: ImageScraper
     ):
@@ -114,3 +186,170 @@ class TestImageScraper:
         assert images_source_website_page_2.call_count == 2
         assert images_source_website_page_3.call_count == 1
         assert image_scraper.synchronization_data == expected_sync_data
+
+
+def build_page(image_names: list[str], next_page: int | None) -> str:
+    """Returns a HTML document with images and a link to the next page."""
+    containers = "".join(
+        f'<div class="simple-image"><a href="/{name}">'
+        f'<img src="/img/{name}.jpg" alt="{name}"></a></div>'
+        for name in image_names
+    )
+    pagination = f'<a href="/page/{next_page}">Next</a>' if next_page else ""
+    return (
+        f'<html><body>{containers}<div class="pagination">{pagination}</div>'
+        "</body></html>"
+    )
+
+
+@pytest.mark.integtests
+class TestPaginationFanOut:
+    @staticmethod
+    def create_image_scraper(
+        session: Session, pagination_store: PaginationTemplateStore
+    ) -> ImageScraper:
+        return ImageScraper(
+            website_url="https://webludus.pl/",
+            container_class="simple-image",
+            pagination_class="pagination",
+            pages_to_scan=4,
+            scraper=bs4_scraper.Bs4Scraper(),
+            session=session,
+            pagination_store=pagination_store,
+        )
+
+    def test_template_should_be_learned_and_used_for_concurrent_fetch(
+        self, mocked_responses: responses.RequestsMock, anonymous_session: Session
+    ) -> None:
+        first_page = mocked_responses.get(
+            "https://webludus.pl/", body=build_page(["a"], 2)
+        )
+        second_page = mocked_responses.get(
+            "https://webludus.pl/page/2", body=build_page(["b"], 3)
+        )
+        third_page = mocked_responses.get(
+            "https://webludus.pl/page/3", body=build_page(["c", "last"], 4)
+        )
+        store = PaginationTemplateStore()
+        last_sync_data = ("https://webludus.pl/img/last.jpg",)
+
+        first_result = self.create_image_scraper(anonymous_session, store).start_sync(
+            last_sync_data
+        )
+        calls_after_first_sync = (first_page.call_count, second_page.call_count)
+        second_result = self.create_image_scraper(anonymous_session, store).start_sync(
+            last_sync_data
+        )
+
+        assert store.get("https://webludus.pl/") is not None
+        assert [image.title for image in first_result.images] == ["a", "b", "c"]
+        assert [image.title for image in second_result.images] == ["a", "b", "c"]
+        assert second_result.watermark_page == 3
+        assert calls_after_first_sync == (2, 2)
+        assert first_page.call_count == 3
+        assert second_page.call_count == 3
+        assert third_page.call_count == 2
+
+    def test_fall_back_to_dom_walk_if_template_yields_unexpected_page(
+        self, mocked_responses: responses.RequestsMock, anonymous_session: Session
+    ) -> None:
+        mocked_responses.get("https://webludus.pl/", body=build_page(["a"], 2))
+        mocked_responses.get("https://webludus.pl/page/2", body=build_page(["b"], 3))
+        broken_page = mocked_responses.get(
+            "https://webludus.pl/wrong/2", body=build_page(["a"], 2)
+        )
+        mocked_responses.get(
+            "https://webludus.pl/page/3", body=build_page(["last"], None)
+        )
+        store = PaginationTemplateStore()
+        store.learn("https://webludus.pl/", "https://webludus.pl/wrong/2")
+
+        result = self.create_image_scraper(anonymous_session, store).start_sync(
+            ("https://webludus.pl/img/last.jpg",)
+        )
+
+        assert broken_page.call_count == 1
+        assert [image.title for image in result.images] == ["a", "b"]
+        template = store.get("https://webludus.pl/")
+        assert template is not None
+        assert "wrong" not in template.template
+
+    def test_template_should_be_kept_if_page_is_past_the_end(
+        self,
+        mocker: MockerFixture,
+        mocked_responses: responses.RequestsMock,
+        anonymous_session: Session,
+    ) -> None:
+        mocked_responses.get("https://webludus.pl/", body=build_page(["a"], 2))
+        mocked_responses.get("https://webludus.pl/page/2", body=build_page(["b"], 3))
+        mocked_responses.get("https://webludus.pl/page/3", body=build_page(["c"], 4))
+        mocked_responses.get("https://webludus.pl/page/4", body=build_page([], 5))
+        store = PaginationTemplateStore()
+        store.learn("https://webludus.pl/", "https://webludus.pl/page/2")
+        forget = mocker.spy(store, "forget")
+
+        result = self.create_image_scraper(anonymous_session, store).start_sync()
+
+        assert [image.title for image in result.images] == ["a", "b", "c"]
+        forget.assert_not_called()
+        assert store.get("https://webludus.pl/") == PaginationTemplate(
+            "https://webludus.pl/page/{page}"
+        )
+
+
+@pytest.mark.integtests
+class TestConcurrentSyncs:
+    def test_one_instance_should_serve_many_syncs(
+        self, synthetic_site: SyntheticSite, anonymous_session: Session
+    ) -> None:
+        image_scraper = ImageScraper(
+            website_url=synthetic_site.url,
+            container_class=CONTAINER_CLASS,
+            pagination_class=PAGINATION_CLASS,
+            pages_to_scan=3,
+            scraper=bs4_scraper.Bs4Scraper(),
+            session=anonymous_session,
+        )
+
+        first_result = image_scraper.start_sync()
+        second_result = image_scraper.start_sync()
+
+        assert first_result.pages_scanned == second_result.pages_scanned == 3
+        assert second_result.images == first_result.images
+        assert image_scraper.image_source.pages_to_scan == 3
+        assert image_scraper.image_source.current_url_address == synthetic_site.url
+
+    @pytest.mark.parametrize("scraper_class", [bs4_scraper.Bs4Scraper, StreamScraper])
+    def test_concurrent_syncs_should_not_share_crawl_state(
+        self, anonymous_session: Session, scraper_class: type[scraper.Scraper]
+    ) -> None:
+        watermarks = [100 - number * 7 for number in range(12)] * 3
+        with SyntheticSite(pages=10) as site:
+            image_scraper = ImageScraper(
+                website_url=site.url,
+                container_class=CONTAINER_CLASS,
+                pagination_class=PAGINATION_CLASS,
+                pages_to_scan=10,
+                scraper=scraper_class(),
+                session=anonymous_session,
+                pagination_store=PaginationTemplateStore(),
+            )
+
+            with ThreadPoolExecutor(max_workers=12) as executor:
+                results = list(
+                    executor.map(
+                        lambda watermark: image_scraper.start_sync(
+                            (site.image_url(watermark),)
+                        ),
+                        watermarks,
+                    )
+                )
+
+        for watermark, result in zip(watermarks, results):
+            assert [image.title for image in result.images] == [
+                f"Image {number}" for number in range(100, watermark, -1)
+            ]
+            assert result.watermark_page == (100 - watermark) // 10 + 1
+        assert sorted(
+            image.url_address for image in image_scraper.synchronization_data
+        ) == sorted(site.image_url(number) for number in range(24, 101))
@@ -0,0 +1,119 @@
+from pathlib import Path
+from typing import Generator
+
+import pytest
+from pytest_mock import MockerFixture
+
+from imgscraper.src.derivatives import DerivativePool, DerivativeSink
+from imgscraper.src.models import DerivativeResult, DerivativeSpec, Image
+from imgscraper.src.sinks import SinkWriter
+from tests.synthetic_site import SyntheticSite
+
+EXAMPLE_IMAGE = Path(__file__).parents[2] / "example_data" / "image.jpeg"
+SPECS = (
+    DerivativeSpec("thumbnail", size=(32, 32)),
+    DerivativeSpec("webp", size=None, format="WEBP", quality=80),
+)
+
+
+@pytest.fixture
+def image_site() -> Generator[SyntheticSite, None, None]:
+    with SyntheticSite(image_body=EXAMPLE_IMAGE.read_bytes()) as site:
+        yield site
+
+
+def prepare_images(site: SyntheticSite, count: int) -> list[Image]:
+    return [
+        Image(source=site.url, url_address=site.image_url(number), title="")
+        for number in range(count)
+    ]
+
+
+@pytest.mark.unittests
+class TestDerivativePool:
+    def test_missing_pillow_should_raise_import_error(
+        self, mocker: MockerFixture, tmp_path: Path
+    ) -> None:
+        mocker.patch("imgscraper.src.derivatives.find_spec", return_value=None)
+
+        with pytest.raises(ImportError, match="imgscraper\\[thumbnails\\]"):
+            DerivativePool(tmp_path)
+
+    def test_paths_should_depend_on_url_and_spec(self, tmp_path: Path) -> None:
+        pytest.importorskip("PIL")
+        pool = DerivativePool(tmp_path, SPECS)
+        image = Image(source="", url_address="https://webludus.pl/img/1.jpg", title="")
+
+        paths = pool.paths(image)
+
+        assert paths["thumbnail"].parent == tmp_path / "thumbnail"
+        assert paths["thumbnail"].suffix == ".jpg"
+        assert paths["webp"].suffix == ".webp"
+        assert paths["webp"].stem == paths["thumbnail"].stem
+        assert pool.paths(image) == paths
+
+
+@pytest.mark.integtests
+class TestDerivativePoolIntegration:
+    def test_derivatives_should_be_generated_once(
+        self, image_site: SyntheticSite, tmp_path: Path
+    ) -> None:
+        pil_image = pytest.importorskip("PIL.Image")
+        images = prepare_images(image_site, 6)
+
+        with DerivativePool(tmp_path, SPECS, processes=2) as pool:
+            results = list(pool.process(images))
+            cached_results = list(pool.process(images))
+
+        assert {result.image for result in results} == set(images)
+        assert not any(result.cached or result.error for result in results)
+        assert all(result.decode_time > 0 for result in results)
+        assert all(result.cached for result in cached_results)
+        assert sum(image_site.requests.values()) == 6
+        with pil_image.open(results[0].paths["thumbnail"]) as thumbnail:
+            assert max(thumbnail.size) <= 32
+        with pil_image.open(results[0].paths["webp"]) as webp:
+            assert (webp.format, webp.size) == ("WEBP", (100, 72))
+
+    def test_failed_image_should_be_reported(
+        self, image_site: SyntheticSite, tmp_path: Path
+    ) -> None:
+        pytest.importorskip("PIL")
+        image = Image(source="", url_address=f"{image_site.url}missing", title="")
+
+        with DerivativePool(tmp_path, SPECS, processes=1) as pool:
+            (result,) = pool.process([image])
+
+        assert result.error is not None
+        assert "404" in result.error
+        assert not Path(result.paths["thumbnail"]).exists()
+
+    def test_image_over_max_pixels_should_be_rejected(
+        self, image_site: SyntheticSite, tmp_path: Path
+    ) -> None:
+        pytest.importorskip("PIL")
+        (image,) = prepare_images(image_site, 1)
+
+        with DerivativePool(tmp_path, SPECS, processes=1, max_pixels=5000) as pool:
+            (result,) = pool.process([image])
+
+        assert result.error is not None
+        assert "DecompressionBombError" in result.error
+        assert not Path(result.paths["thumbnail"]).exists()
+
+    def test_sink_should_generate_derivatives_during_sync(
+        self, image_site: SyntheticSite, tmp_path: Path
+    ) -> None:
+        pytest.importorskip("PIL")
+        results: list[DerivativeResult] = []
+        sink = DerivativeSink(
+            DerivativePool(tmp_path, SPECS, processes=2), results.append, batch_size=3
+        )
+
+        writer = SinkWriter(sink, "derivatives-sink")
+        writer.put(prepare_images(image_site, 5))
+        writer.close()
+        sink.close()
+
+        assert (sink.generated, sink.cached, sink.failed) == (5, 0, 0)
+        assert len(results) == 5
@@ -0,0 +1,80 @@
+import socket
+from typing import Any
+
+import pytest
+from pytest_mock import MockerFixture
+
+from imgscraper.src.dns_cache import DnsCache
+
+ADDRESSES = [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("192.0.2.1", 443))]
+
+
+@pytest.fixture
+def lookups(mocker: MockerFixture) -> Any:
+    return mocker.Mock(return_value=ADDRESSES)
+
+
+@pytest.fixture
+def clock(mocker: MockerFixture) -> Any:
+    return mocker.patch("imgscraper.src.dns_cache.monotonic", return_value=100.0)
+
+
+@pytest.mark.unittests
+class TestDnsCache:
+    def test_lookup_should_be_cached_until_ttl_expires(
+        self, lookups: Any, clock: Any
+    ) -> None:
+        cache = DnsCache(ttl=60)
+        cache._getaddrinfo = lookups
+
+        first = cache.getaddrinfo("webludus.pl", 443)
+        clock.return_value = 159.0
+        second = cache.getaddrinfo("WEBLUDUS.pl", 443)
+        clock.return_value = 161.0
+        cache.getaddrinfo("webludus.pl", 443)
+
+        assert first is second is ADDRESSES
+        assert lookups.call_count == 2
+        stats = cache.stats()
+        assert (stats.hits, stats.misses) == (1, 2)
+        assert stats.saved_time == pytest.approx(stats.lookup_time / 2)
+
+    def test_default_entries_should_expire_after_short_fixed_time(
+        self, lookups: Any, clock: Any
+    ) -> None:
+        cache = DnsCache()
+        cache._getaddrinfo = lookups
+
+        cache.getaddrinfo("webludus.pl", 443)
+        clock.return_value = 131.0
+        cache.getaddrinfo("webludus.pl", 443)
+
+        assert lookups.call_count == 2
+
+    @pytest.mark.parametrize("host", ["127.0.0.1", "::1", "localhost", None])
+    def test_addresses_should_not_be_cached(self, lookups: Any, host: Any) -> None:
+        cache = DnsCache()
+        cache._getaddrinfo = lookups
+
+        cache.getaddrinfo(host, 80)
+        cache.getaddrinfo(host, 80)
+
+        assert lookups.call_count == 2
+        assert cache.stats().misses == 0
+
+    def test_oldest_entries_should_be_evicted(self, lookups: Any, clock: Any) -> None:
+        cache = DnsCache(max_entries=2)
+        cache._getaddrinfo = lookups
+
+        for host in ("a.pl", "b.pl", "c.pl", "a.pl"):
+            cache.getaddrinfo(host, 80)
+
+        assert lookups.call_count == 4
+
+    def test_install_should_replace_getaddrinfo(self) -> None:
+        original = socket.getaddrinfo
+
+        with DnsCache() as cache:
+            assert socket.getaddrinfo == cache.getaddrinfo
+
+        assert socket.getaddrinfo is original
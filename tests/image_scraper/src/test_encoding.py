@@ -0,0 +1,116 @@
+import pytest
+from pytest_mock import MockerFixture
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+
+from imgscraper.src.encoding import (
+    SiteEncodings,
+    declared_charset,
+    meta_charset,
+    normalize_encoding,
+)
+
+POLISH_TEXT = "Zażółć gęślą jaźń"
+
+
+def build_response(body: bytes, content_type: str | None = None) -> Response:
+    response = Response()
+    response._content = body
+    response.headers = CaseInsensitiveDict(
+        {"Content-Type": content_type} if content_type else {}
+    )
+    return response
+
+
+@pytest.mark.unittests
+class TestCharsetDeclarations:
+    @pytest.mark.parametrize(
+        "content_type, expected",
+        [
+            ("text/html; charset=UTF-8", "utf-8"),
+            ('text/html; charset="windows-1250"', "cp1250"),
+            ("text/html", None),
+            ("text/html; charset=unknown-codec", None),
+        ],
+    )
+    def test_declared_charset(self, content_type: str, expected: str | None) -> None:
+        assert declared_charset({"Content-Type": content_type}) == expected
+
+    @pytest.mark.parametrize(
+        "head, expected",
+        [
+            (b'<html><head><meta charset="iso-8859-2">', "iso8859-2"),
+            (
+                b'<meta http-equiv="Content-Type" content="text/html; charset=cp1250">',
+                "cp1250",
+            ),
+            (b"<html><head><title>Meta charset</title>", None),
+        ],
+    )
+    def test_meta_charset(self, head: bytes, expected: str | None) -> None:
+        assert meta_charset(head) == expected
+
+    def test_normalize_encoding(self) -> None:
+        assert normalize_encoding("Latin-1") == "iso8859-1"
+        assert normalize_encoding("") is None
+
+
+@pytest.mark.unittests
+class TestSiteEncodings:
+    def test_declared_charset_should_be_used(self) -> None:
+        response = build_response(
+            POLISH_TEXT.encode("cp1250"), "text/html; charset=windows-1250"
+        )
+
+        assert SiteEncodings().decode("https://a.pl/", response) == POLISH_TEXT
+
+    def test_meta_charset_should_be_learned_for_the_site(self) -> None:
+        encodings = SiteEncodings()
+        first_page = build_response(
+            f'<meta charset="windows-1250">{POLISH_TEXT}'.encode("cp1250"), "text/html"
+        )
+        next_page = build_response(POLISH_TEXT.encode("cp1250"), "text/html")
+
+        encodings.decode("https://a.pl/", first_page)
+
+        assert encodings.get("https://a.pl/") == "cp1250"
+        assert encodings.decode("https://a.pl/", next_page) == POLISH_TEXT
+
+    def test_charset_detection_should_not_run_for_utf8_pages(
+        self, mocker: MockerFixture
+    ) -> None:
+        apparent_encoding = mocker.patch.object(
+            Response, "apparent_encoding", new_callable=mocker.PropertyMock
+        )
+        response = build_response(POLISH_TEXT.encode())
+
+        assert SiteEncodings().decode("https://a.pl/", response) == POLISH_TEXT
+        apparent_encoding.assert_not_called()
+
+    def test_charset_detection_should_run_once_per_site(
+        self, mocker: MockerFixture
+    ) -> None:
+        apparent_encoding = mocker.patch.object(
+            Response,
+            "apparent_encoding",
+            new_callable=mocker.PropertyMock,
+            return_value="cp1250",
+        )
+        encodings = SiteEncodings()
+        body = POLISH_TEXT.encode("cp1250")
+
+        decoded = [
+            encodings.decode("https://a.pl/", build_response(body)) for _ in range(3)
+        ]
+
+        assert decoded == [POLISH_TEXT] * 3
+        apparent_encoding.assert_called_once()
+
+    def test_stream_encoding_should_be_chosen_from_the_first_chunk(self) -> None:
+        encodings = SiteEncodings()
+
+        first = encodings.for_head("https://a.pl/", {}, b'<meta charset="cp1250">')
+        second = encodings.for_head("https://a.pl/", {"Content-Type": "text/html"})
+        other_site = encodings.for_head("https://b.pl/", {})
+
+        assert (first, second, other_site) == ("cp1250", "cp1250", "utf-8")
@@ -0,0 +1,110 @@
+from typing import Any
+
+import pytest
+from pytest_mock import MockerFixture
+from requests import Session
+
+from imgscraper.src.core import ImageScraper
+from imgscraper.src.models import ExtractionPlan
+from imgscraper.src.scrapers.bs4_scraper import Bs4Scraper
+from imgscraper.src.scrapers.feed_scraper import FeedScraper
+from imgscraper.src.scrapers.stream_scraper import StreamScraper
+from tests.synthetic_site import CONTAINER_CLASS, PAGINATION_CLASS, SyntheticSite
+
+
+def prepare_scraper(site: SyntheticSite, **kwargs: Any) -> ImageScraper:
+    return ImageScraper(
+        website_url=site.url,
+        container_class=CONTAINER_CLASS,
+        pagination_class=PAGINATION_CLASS,
+        pages_to_scan=5,
+        scraper=kwargs.pop("scraper", Bs4Scraper()),
+        session=Session(),
+        **kwargs,
+    )
+
+
+@pytest.mark.integtests
+class TestHasNewContent:
+    def test_sync_should_be_needed_without_last_sync_data(
+        self, synthetic_site: SyntheticSite
+    ) -> None:
+        assert prepare_scraper(synthetic_site).has_new_content() is True
+        assert synthetic_site.requests["/"] == 0
+
+    def test_unchanged_page_should_be_requested_conditionally(
+        self, synthetic_site: SyntheticSite
+    ) -> None:
+        image_scraper = prepare_scraper(synthetic_site)
+        last_sync_data = (synthetic_site.image_url(100),)
+
+        assert image_scraper.has_new_content(last_sync_data) is False
+        assert image_scraper.has_new_content(last_sync_data) is False
+        assert synthetic_site.not_modified == 1
+        synthetic_site.publish(1)
+        assert image_scraper.has_new_content(last_sync_data) is True
+        assert image_scraper.has_new_content(last_sync_data) is True
+        assert synthetic_site.not_modified == 1
+        assert synthetic_site.requests["/"] == 4
+        assert synthetic_site.requests["/page/2"] == 0
+
+    def test_not_modified_page_should_be_checked_against_last_sync_data(
+        self, synthetic_site: SyntheticSite
+    ) -> None:
+        image_scraper = prepare_scraper(synthetic_site)
+
+        image_scraper.has_new_content((synthetic_site.image_url(100),))
+
+        assert image_scraper.has_new_content((synthetic_site.image_url(99),)) is True
+        assert synthetic_site.not_modified == 1
+
+    def test_first_containers_should_be_checked(
+        self, synthetic_site: SyntheticSite
+    ) -> None:
+        image_scraper = prepare_scraper(synthetic_site, scraper=StreamScraper())
+        newest = (synthetic_site.image_url(100),)
+        two_newest = (*newest, synthetic_site.image_url(99))
+
+        assert image_scraper.has_new_content(newest, containers=2) is True
+        assert image_scraper.has_new_content(two_newest, containers=2) is False
+
+    @pytest.mark.parametrize(
+        "scraper, extraction_plan",
+        [
+            (Bs4Scraper(), ExtractionPlan(container_selector=f"div.{CONTAINER_CLASS}")),
+            (FeedScraper(), None),
+        ],
+    )
+    def test_first_page_should_be_scanned_if_it_cannot_be_streamed(
+        self,
+        mocker: MockerFixture,
+        synthetic_site: SyntheticSite,
+        scraper: Any,
+        extraction_plan: ExtractionPlan | None,
+    ) -> None:
+        get_images_data = mocker.patch.object(
+            type(scraper), "get_images_data", return_value=([], True)
+        )
+        image_scraper = prepare_scraper(
+            synthetic_site, scraper=scraper, extraction_plan=extraction_plan
+        )
+
+        assert image_scraper.has_new_content(("image",)) is False
+        get_images_data.return_value = ([], False)
+        assert image_scraper.has_new_content(("image",)) is True
+        assert get_images_data.call_count == 2
+        assert synthetic_site.requests["/"] == 0
+
+    def test_scanned_first_page_should_detect_new_images(
+        self, synthetic_site: SyntheticSite
+    ) -> None:
+        image_scraper = prepare_scraper(
+            synthetic_site,
+            extraction_plan=ExtractionPlan(container_selector=f"div.{CONTAINER_CLASS}"),
+        )
+        last_sync_data = (synthetic_site.image_url(100),)
+
+        assert image_scraper.has_new_content(last_sync_data) is False
+        synthetic_site.publish(2)
+        assert image_scraper.has_new_content(last_sync_data) is True
+        assert synthetic_site.requests["/page/2"] == 0
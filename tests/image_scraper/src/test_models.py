@@ -1,7 +1,7 @@
 from pytest import mark
 from requests import Session
 
-from imgscraper.src.models import Image, ImagesSource
+from imgscraper.src.models import ExtractionPlan, Image, ImagesSource
 
 
 @mark.unittests
@@ -17,6 +17,18 @@ class TestImageSource:
         assert image_source.pages_to_scan == 4
         assert image_source.session == anonymous_session
 
+    def test_default_extraction_plan_should_use_classes(
+        self, prepare_images_source: ImagesSource
+    ) -> None:
+        assert prepare_images_source.extraction_plan == ExtractionPlan(
+            container_selector=".simple-image",
+            pagination_selector=".pagination",
+            image_selector="img",
+            link_selector="a",
+            image_attributes=("src",),
+            title_attribute="alt",
+        )
+
 
 @mark.unittests
 class TestImage:
@@ -0,0 +1,59 @@
+from pathlib import Path
+
+import pytest
+
+from imgscraper.src.pagination import PaginationTemplate, PaginationTemplateStore
+
+SITE = "https://webludus.pl/"
+
+
+@pytest.mark.unittests
+class TestPaginationTemplate:
+    @pytest.mark.parametrize(
+        "url_address, template",
+        [
+            ("https://webludus.pl/page/2", "https://webludus.pl/page/{page}"),
+            ("https://webludus.pl/2/", "https://webludus.pl/{page}/"),
+        ],
+    )
+    def test_infer_supported_patterns(self, url_address: str, template: str) -> None:
+        inferred = PaginationTemplate.infer(url_address)
+
+        assert inferred == PaginationTemplate(template)
+        assert inferred.url_address(2) == url_address
+
+    @pytest.mark.parametrize(
+        "url_address",
+        ["https://webludus.pl/page/3", "https://webludus.pl/random", SITE],
+    )
+    def test_return_none_if_pattern_is_not_supported(self, url_address: str) -> None:
+        assert PaginationTemplate.infer(url_address) is None
+
+    def test_url_address_should_contain_page_number(self) -> None:
+        template = PaginationTemplate("https://webludus.pl/page/{page}")
+
+        assert template.url_address(15) == "https://webludus.pl/page/15"
+
+
+@pytest.mark.unittests
+class TestPaginationTemplateStore:
+    def test_learned_template_should_be_persisted(self, tmp_path: Path) -> None:
+        path = tmp_path / "templates.json"
+        PaginationTemplateStore(path).learn(SITE, "https://webludus.pl/page/2")
+
+        assert PaginationTemplateStore(path).get(SITE) == PaginationTemplate(
+            "https://webludus.pl/page/{page}"
+        )
+
+    def test_unsupported_url_should_not_be_learned(self) -> None:
+        store = PaginationTemplateStore()
+
+        assert store.learn(SITE, "https://webludus.pl/random") is None
+        assert store.get(SITE) is None
+
+    def test_forgotten_template_should_be_removed(self) -> None:
+        store = PaginationTemplateStore()
+        store.learn(SITE, "https://webludus.pl/page/2")
+        store.forget(SITE)
+
+        assert store.get(SITE) is None
@@ -0,0 +1,65 @@
+import re
+import threading
+from pathlib import Path
+from time import perf_counter
+
+import pytest
+
+from imgscraper.src.profiling import SyncProfiler
+
+COLLAPSED_LINE = re.compile(r"^\S+(;\S+)* \d+$")
+
+
+def busy_function(seconds: float) -> int:
+    counter = 0
+    deadline = perf_counter() + seconds
+    while perf_counter() < deadline:
+        counter += 1
+    return counter
+
+
+@pytest.mark.unittests
+class TestSyncProfiler:
+    @pytest.mark.parametrize("mode", ["cprofile", "sampling"])
+    def test_report_should_contain_hotspots_and_collapsed_stacks(
+        self, tmp_path: Path, mode: str
+    ) -> None:
+        profiler = SyncProfiler(
+            mode, "https://webludus.pl/", tmp_path, top=3  # type: ignore[arg-type]
+        )
+
+        with profiler:
+            busy_function(0.05)
+        report = profiler.report()
+
+        lines = Path(report.collapsed_stacks_path).read_text().splitlines()
+        assert report.mode == mode
+        assert Path(report.collapsed_stacks_path).parent == tmp_path
+        assert "https_webludus_pl" in Path(report.collapsed_stacks_path).name
+        assert 0 < len(report.hotspots) <= 3
+        assert lines
+        assert all(COLLAPSED_LINE.match(line) for line in lines)
+        assert any("busy_function" in line for line in lines)
+
+    def test_sampling_should_include_prefixed_threads(self, tmp_path: Path) -> None:
+        profiler = SyncProfiler(
+            "sampling", "site", tmp_path, thread_name_prefix="imgscraper-test"
+        )
+
+        with profiler:
+            worker = threading.Thread(
+                target=busy_function, args=(0.05,), name="imgscraper-test-0"
+            )
+            worker.start()
+            worker.join()
+        report = profiler.report()
+
+        assert any(
+            "busy_function" in hotspot.function or "run" in hotspot.function
+            for hotspot in report.hotspots
+        )
+        assert "_bootstrap" in Path(report.collapsed_stacks_path).read_text()
+
+    def test_raise_value_error_for_unsupported_mode(self) -> None:
+        with pytest.raises(ValueError, match="Unsupported profile mode: perf."):
+            SyncProfiler("perf", "site")  # type: ignore
@@ -0,0 +1,143 @@
+import sys
+from multiprocessing import get_context
+from pathlib import Path
+from typing import cast
+
+import pytest
+from requests import Session
+
+from imgscraper.src.core import ImageScraper
+from imgscraper.src.scrapers.bs4_scraper import Bs4Scraper
+from imgscraper.src.seen_index import SeenUrlIndex, UrlFingerprints, fingerprint
+from tests.synthetic_site import CONTAINER_CLASS, PAGINATION_CLASS, SyntheticSite
+
+
+def count_seen(path: Path, url_addresses: list[str]) -> int:
+    with SeenUrlIndex(path, readonly=True) as index:
+        return sum(index.contains_many(url_addresses))
+
+
+@pytest.mark.unittests
+class TestSeenUrlIndex:
+    def test_added_urls_should_be_found(self, tmp_path: Path) -> None:
+        with SeenUrlIndex(tmp_path / "seen.idx", capacity=16) as index:
+            added = index.add_many(["https://a.pl/1.jpg", "https://a.pl/2.jpg"])
+            added_again = index.add_many(["https://a.pl/2.jpg", "https://a.pl/3.jpg"])
+
+            assert (added, added_again) == (2, 1)
+            assert len(index) == 3
+            assert index.contains_many(
+                ["https://a.pl/1.jpg", "https://b.pl/1.jpg", "https://a.pl/3.jpg"]
+            ) == [True, False, True]
+            assert "https://a.pl/2.jpg" in index
+
+    def test_index_should_persist_between_runs(self, tmp_path: Path) -> None:
+        path = tmp_path / "seen.idx"
+        with SeenUrlIndex(path) as index:
+            index.add_many(["https://a.pl/1.jpg"])
+
+        with SeenUrlIndex(path, readonly=True) as index:
+            assert len(index) == 1
+            assert "https://a.pl/1.jpg" in index
+
+    def test_index_should_grow_when_it_is_full(self, tmp_path: Path) -> None:
+        urls = [f"https://a.pl/{number}.jpg" for number in range(1000)]
+        with SeenUrlIndex(tmp_path / "seen.idx", capacity=16) as index:
+            index.add_many(urls[:10])
+            index.add_many(urls[10:])
+
+            assert index.capacity == 2048
+            assert len(index) == 1000
+            assert all(index.contains_many(urls))
+
+    @pytest.mark.skipif(
+        sys.platform == "win32", reason="Windows cannot replace the mapped index."
+    )
+    def test_reader_should_see_grown_index(self, tmp_path: Path) -> None:
+        path = tmp_path / "seen.idx"
+        urls = [f"https://a.pl/{number}.jpg" for number in range(100)]
+        with SeenUrlIndex(path, capacity=16) as writer, SeenUrlIndex(
+            path, readonly=True
+        ) as reader:
+            writer.add_many(urls[:5])
+            seen_before_growth = sum(reader.contains_many(urls))
+            writer.add_many(urls)
+
+            assert seen_before_growth == 5
+            assert all(reader.contains_many(urls))
+
+    def test_index_should_be_shared_with_other_processes(self, tmp_path: Path) -> None:
+        path = tmp_path / "seen.idx"
+        urls = [f"https://a.pl/{number}.jpg" for number in range(10)]
+        with SeenUrlIndex(path) as index:
+            index.add_many(urls[:7])
+
+        with get_context("spawn").Pool(2) as pool:
+            assert pool.starmap(count_seen, [(path, urls)] * 2) == [7, 7]
+
+    def test_raise_value_error_on_add_to_read_only_index(self, tmp_path: Path) -> None:
+        path = tmp_path / "seen.idx"
+        SeenUrlIndex(path).close()
+
+        with SeenUrlIndex(path, readonly=True) as index:
+            with pytest.raises(ValueError):
+                index.add_many(["https://a.pl/1.jpg"])
+
+    def test_raise_value_error_if_file_is_not_an_index(self, tmp_path: Path) -> None:
+        path = tmp_path / "seen.idx"
+        path.write_bytes(b"x" * 64)
+
+        with pytest.raises(ValueError):
+            SeenUrlIndex(path)
+
+    def test_fingerprint_should_never_be_zero(self) -> None:
+        assert fingerprint("") != 0
+        assert fingerprint("https://a.pl/1.jpg") == fingerprint("https://a.pl/1.jpg")
+
+    def test_url_fingerprints_should_keep_urls_as_integers(self) -> None:
+        urls = UrlFingerprints(["https://a.pl/"])
+
+        urls.add("https://a.pl/page/2")
+        urls.update(("https://a.pl/#", "#"))
+        urls.discard("#")
+        # The core passes the fingerprints around as the set of scraped URLs.
+        scraped_urls = cast(set[str], urls)
+
+        assert "https://a.pl/page/2" in scraped_urls
+        assert "https://a.pl/page/3" not in scraped_urls
+        assert "#" not in scraped_urls
+        assert sorted(urls) == sorted(
+            fingerprint(url)
+            for url in ("https://a.pl/", "https://a.pl/page/2", "https://a.pl/#")
+        )
+
+
+@pytest.mark.integtests
+class TestSeenIndexSync:
+    def test_seen_images_should_be_dropped_from_sync_result(
+        self,
+        synthetic_site: SyntheticSite,
+        anonymous_session: Session,
+        tmp_path: Path,
+    ) -> None:
+        index = SeenUrlIndex(tmp_path / "seen.idx")
+        index.add_many([synthetic_site.image_url(number) for number in (100, 98)])
+        image_scraper = ImageScraper(
+            website_url=synthetic_site.url,
+            container_class=CONTAINER_CLASS,
+            pagination_class=PAGINATION_CLASS,
+            pages_to_scan=1,
+            scraper=Bs4Scraper(),
+            session=anonymous_session,
+            seen_index=index,
+        )
+
+        first_result = image_scraper.start_sync()
+        second_result = image_scraper.start_sync()
+
+        assert [image.title for image in first_result.images] == [
+            f"Image {number}" for number in (99, 97, 96, 95, 94, 93, 92, 91)
+        ]
+        assert second_result.images == []
+        assert len(index) == 10
+        index.close()
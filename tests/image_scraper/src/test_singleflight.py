@@ -0,0 +1,208 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from threading import Event
+from typing import Any
+
+import pytest
+from pytest_mock import MockerFixture
+from requests import Session
+
+from imgscraper.scraper_constructor import create_scraper
+from imgscraper.src.core import ImageScraper
+from imgscraper.src.models import ExtractionPlan, SyncBudget
+from imgscraper.src.scrapers.bs4_scraper import Bs4Scraper
+from imgscraper.src.singleflight import SingleFlight
+from imgscraper.src.transport import RequestsTransport, Transport
+from tests.synthetic_site import CONTAINER_CLASS, PAGINATION_CLASS, SyntheticSite
+
+
+@pytest.fixture
+def clock(mocker: MockerFixture) -> Any:
+    return mocker.patch("imgscraper.src.singleflight.monotonic", return_value=10.0)
+
+
+@pytest.mark.unittests
+class TestSingleFlight:
+    def test_concurrent_calls_should_share_one_result(self) -> None:
+        flight = SingleFlight()
+        release = Event()
+        calls = []
+
+        def download() -> object:
+            calls.append(1)
+            release.wait(1)
+            return object()
+
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            futures = [executor.submit(flight.do, "page", download) for _ in range(5)]
+            while flight.calls < 5:
+                pass
+            release.set()
+            results = {id(future.result()) for future in futures}
+
+        assert len(calls) == 1
+        assert len(results) == 1
+        assert flight.shared == 4
+
+    def test_error_should_be_raised_by_all_callers(self) -> None:
+        flight = SingleFlight()
+        release = Event()
+
+        def download() -> None:
+            release.wait(1)
+            raise ConnectionError("Site is down.")
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = [executor.submit(flight.do, "page", download) for _ in range(3)]
+            while flight.calls < 3:
+                pass
+            release.set()
+
+        for future in futures:
+            with pytest.raises(ConnectionError):
+                future.result()
+
+    def test_waiting_caller_should_give_up_after_timeout(self) -> None:
+        flight = SingleFlight(wait_timeout=0.05)
+        release = Event()
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            leader = executor.submit(flight.do, "page", lambda: release.wait(5))
+            while flight.calls < 1:
+                pass
+            follower_result = flight.do("page", lambda: "own result")
+            release.set()
+
+        assert follower_result == "own result"
+        assert leader.result() is True
+
+    def test_result_should_be_kept_for_max_age(self, clock: Any) -> None:
+        flight = SingleFlight()
+        results = iter(range(10))
+
+        first = flight.do("page", lambda: next(results), max_age=5)
+        clock.return_value = 14.0
+        cached = flight.do("page", lambda: next(results), max_age=5)
+        too_old_for_caller = flight.do("page", lambda: next(results), max_age=3)
+        not_cached = flight.do("page", lambda: next(results))
+
+        assert (first, cached, too_old_for_caller, not_cached) == (0, 0, 1, 2)
+
+    def test_oldest_results_should_be_evicted(self, clock: Any) -> None:
+        flight = SingleFlight(max_entries=2)
+
+        for key in ("a", "b", "c"):
+            flight.do(key, partial(str, key), max_age=60)
+
+        assert flight.do("a", lambda: "new a", max_age=60) == "new a"
+        assert flight.do("c", lambda: "new c", max_age=60) == "c"
+
+
+@pytest.mark.integtests
+class TestSharedPages:
+    @staticmethod
+    def prepare_scraper(
+        site: SyntheticSite,
+        container_selector: str,
+        transport: Transport | None = None,
+        **kwargs: Any,
+    ) -> ImageScraper:
+        return ImageScraper(
+            website_url=site.url,
+            container_class=CONTAINER_CLASS,
+            pagination_class=PAGINATION_CLASS,
+            pages_to_scan=kwargs.pop("pages_to_scan", 1),
+            scraper=Bs4Scraper(**kwargs),
+            session=Session(),
+            transport=transport,
+            extraction_plan=ExtractionPlan(
+                container_selector=container_selector,
+                pagination_selector=f".{PAGINATION_CLASS}",
+            ),
+        )
+
+    def test_concurrent_scrapers_should_share_one_fetch(self) -> None:
+        transport = RequestsTransport(Session())
+        with SyntheticSite(connection_delay=0.2) as site:
+            scrapers = [
+                self.prepare_scraper(site, selector, transport, page_cache_ttl=5)
+                for selector in (f".{CONTAINER_CLASS}", f"div.{CONTAINER_CLASS}")
+            ]
+
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                results = list(executor.map(ImageScraper.start_sync, scrapers))
+
+        assert results[0].images == results[1].images
+        assert len(results[0].images) == 10
+        assert site.requests["/"] == 1
+
+    def test_scrapers_created_with_one_session_should_share_one_fetch(
+        self, anonymous_session: Session
+    ) -> None:
+        with SyntheticSite(connection_delay=0.2) as site:
+            scrapers = [
+                create_scraper(
+                    site.url,
+                    CONTAINER_CLASS,
+                    PAGINATION_CLASS,
+                    container_selector=selector,
+                    session=anonymous_session,
+                )
+                for selector in (f".{CONTAINER_CLASS}", f"div.{CONTAINER_CLASS}")
+            ]
+
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                results = list(
+                    executor.map(
+                        lambda scraper: scraper.start_sync(
+                            budget=SyncBudget(max_requests=5)
+                        ),
+                        scrapers,
+                    )
+                )
+
+        assert scrapers[0].image_source.transport is scrapers[1].image_source.transport
+        assert results[0].images == results[1].images
+        assert len(results[0].images) == 10
+        assert site.requests["/"] == 1
+
+    def test_page_should_be_reused_within_ttl(
+        self, synthetic_site: SyntheticSite
+    ) -> None:
+        transport = RequestsTransport(Session())
+        scrapers = [
+            self.prepare_scraper(
+                synthetic_site, selector, transport, page_cache_ttl=5, pages_to_scan=2
+            )
+            for selector in (f".{CONTAINER_CLASS}", f"div.{CONTAINER_CLASS}")
+        ]
+
+        results = [image_scraper.start_sync() for image_scraper in scrapers]
+
+        assert results[0].images == results[1].images
+        assert synthetic_site.requests["/"] == 1
+        assert synthetic_site.requests["/page/2"] == 1
+
+    @pytest.mark.parametrize(
+        "page_cache_ttl, shared_transport",
+        [(0, True), (5, False)],
+        ids=["sequential syncs without ttl", "different sessions"],
+    )
+    def test_pages_should_not_be_shared(
+        self,
+        synthetic_site: SyntheticSite,
+        page_cache_ttl: float,
+        shared_transport: bool,
+    ) -> None:
+        transport = RequestsTransport(Session()) if shared_transport else None
+        scrapers = [
+            self.prepare_scraper(
+                synthetic_site, selector, transport, page_cache_ttl=page_cache_ttl
+            )
+            for selector in (f".{CONTAINER_CLASS}", f"div.{CONTAINER_CLASS}")
+        ]
+
+        results = [image_scraper.start_sync() for image_scraper in scrapers]
+
+        assert results[0].images == results[1].images
+        assert synthetic_site.requests["/"] == 2
@@ -0,0 +1,194 @@
+import json
+import sqlite3
+from pathlib import Path
+from threading import Event
+from time import monotonic, sleep
+
+import pytest
+from requests import Session
+
+from imgscraper.src.core import ImageScraper
+from imgscraper.src.models import Image
+from imgscraper.src.scrapers.bs4_scraper import Bs4Scraper
+from imgscraper.src.scrapers.stream_scraper import StreamScraper
+from imgscraper.src.seen_index import SeenUrlIndex
+from imgscraper.src.sinks import CallbackSink, NdjsonSink, SinkWriter, SQLiteSink
+from tests.synthetic_site import CONTAINER_CLASS, PAGINATION_CLASS, SyntheticSite
+
+
+def images(*numbers: int) -> list[Image]:
+    return [
+        Image(f"https://a.pl/{number}", f"https://a.pl/{number}.jpg", f"Image {number}")
+        for number in numbers
+    ]
+
+
+@pytest.mark.unittests
+class TestSinks:
+    def test_sqlite_sink_should_skip_duplicates(self, tmp_path: Path) -> None:
+        sink = SQLiteSink(tmp_path / "images.sqlite")
+
+        sink.write_batch(images(1, 2))
+        sink.write_batch(images(2, 3))
+        sink.close()
+
+        with sqlite3.connect(tmp_path / "images.sqlite") as connection:
+            rows = connection.execute(
+                "SELECT url_address, title FROM images ORDER BY url_address"
+            ).fetchall()
+        assert rows == [(f"https://a.pl/{n}.jpg", f"Image {n}") for n in (1, 2, 3)]
+
+    def test_ndjson_sink_should_append_one_image_per_line(self, tmp_path: Path) -> None:
+        path = tmp_path / "images.ndjson"
+        for batch in (images(1), images(2, 3)):
+            sink = NdjsonSink(path)
+            sink.write_batch(batch)
+            sink.close()
+
+        lines = path.read_text(encoding="utf-8").splitlines()
+        assert [json.loads(line)["title"] for line in lines] == [
+            "Image 1",
+            "Image 2",
+            "Image 3",
+        ]
+
+
+@pytest.mark.unittests
+class TestSinkWriter:
+    def test_images_should_be_written_in_batches(self) -> None:
+        batches: list[list[Image]] = []
+        writer = SinkWriter(CallbackSink(batches.append, batch_size=4))
+
+        for page in range(5):
+            writer.put(images(*range(page * 3, page * 3 + 3)))
+        writer.close()
+
+        assert [len(batch) for batch in batches] == [4, 4, 4, 3]
+        assert sum(batches, []) == images(*range(15))
+        assert writer.written == 15
+
+    def test_buffered_images_should_be_flushed_after_interval(self) -> None:
+        written = Event()
+        writer = SinkWriter(
+            CallbackSink(lambda batch: written.set(), flush_interval=0.05)
+        )
+
+        writer.put(images(1))
+
+        assert written.wait(1)
+        writer.close()
+
+    def test_flush_should_write_buffered_images_at_once(self) -> None:
+        batches: list[list[Image]] = []
+        writer = SinkWriter(CallbackSink(batches.append, flush_interval=60))
+
+        writer.put(images(1, 2))
+        writer.flush()
+
+        assert batches == [images(1, 2)]
+        writer.close()
+
+    def test_slow_sink_should_block_the_crawl(self) -> None:
+        writer = SinkWriter(
+            CallbackSink(
+                lambda batch: sleep(0.05),
+                batch_size=1,
+                flush_interval=0,
+                max_pending_pages=1,
+            )
+        )
+
+        start = monotonic()
+        for number in range(6):
+            writer.put(images(number))
+        elapsed = monotonic() - start
+        writer.close()
+
+        assert elapsed >= 0.15
+        assert writer.blocked_time > 0
+
+    def test_sink_error_should_be_raised(self) -> None:
+        def fail(batch: list[Image]) -> None:
+            raise ValueError("Sink is down.")
+
+        writer = SinkWriter(CallbackSink(fail, batch_size=1))
+        writer.put(images(1))
+
+        with pytest.raises(ValueError, match="Sink is down."):
+            writer.close()
+
+
+@pytest.mark.integtests
+class TestSyncWithSink:
+    @pytest.mark.parametrize("scraper_class", [Bs4Scraper, StreamScraper])
+    def test_sync_should_stream_images_to_sink(
+        self,
+        synthetic_site: SyntheticSite,
+        anonymous_session: Session,
+        tmp_path: Path,
+        scraper_class: type,
+    ) -> None:
+        sink = SQLiteSink(tmp_path / "images.sqlite", batch_size=15)
+        image_scraper = ImageScraper(
+            website_url=synthetic_site.url,
+            container_class=CONTAINER_CLASS,
+            pagination_class=PAGINATION_CLASS,
+            pages_to_scan=3,
+            scraper=scraper_class(),
+            session=anonymous_session,
+        )
+
+        result = image_scraper.start_sync(sink=sink)
+        sink.close()
+
+        with sqlite3.connect(tmp_path / "images.sqlite") as connection:
+            urls = {
+                row[0] for row in connection.execute("SELECT url_address FROM images")
+            }
+        assert urls == {image.url_address for image in result.images}
+        assert len(urls) == 30
+
+    def test_seen_images_should_not_reach_sink(
+        self, synthetic_site: SyntheticSite, anonymous_session: Session, tmp_path: Path
+    ) -> None:
+        batches: list[list[Image]] = []
+        index = SeenUrlIndex(tmp_path / "seen.idx")
+        index.add_many([synthetic_site.image_url(number) for number in (100, 85)])
+        image_scraper = ImageScraper(
+            website_url=synthetic_site.url,
+            container_class=CONTAINER_CLASS,
+            pagination_class=PAGINATION_CLASS,
+            pages_to_scan=2,
+            scraper=Bs4Scraper(),
+            session=anonymous_session,
+            seen_index=index,
+        )
+
+        result = image_scraper.start_sync(sink=CallbackSink(batches.append))
+
+        assert sum(batches, []) == result.images
+        assert len(result.images) == 18
+        assert len(index) == 20
+        index.close()
+
+    def test_images_should_be_flushed_over_memory_limit(
+        self, synthetic_site: SyntheticSite, anonymous_session: Session
+    ) -> None:
+        batches: list[list[Image]] = []
+        image_scraper = ImageScraper(
+            website_url=synthetic_site.url,
+            container_class=CONTAINER_CLASS,
+            pagination_class=PAGINATION_CLASS,
+            pages_to_scan=3,
+            scraper=Bs4Scraper(),
+            session=anonymous_session,
+            memory_limit=1,
+        )
+
+        result = image_scraper.start_sync(
+            sink=CallbackSink(batches.append, flush_interval=60)
+        )
+
+        assert result.images == []
+        assert result.images_flushed == 30
+        assert [len(batch) for batch in batches] == [10, 10, 10]
@@ -0,0 +1,35 @@
+from pathlib import Path
+
+import pytest
+
+from imgscraper.src.storage import JsonStore
+
+
+@pytest.mark.unittests
+class TestJsonStore:
+    def test_data_should_be_kept_in_memory_without_path(self) -> None:
+        store = JsonStore()
+        store.set("site", [1, 2])
+
+        assert store.get("site") == [1, 2]
+        assert store.get("missing", "default") == "default"
+
+    def test_data_should_be_available_after_reload(self, tmp_path: Path) -> None:
+        path = tmp_path / "nested" / "store.json"
+        JsonStore(path).set("site", {"key": "value"})
+
+        assert JsonStore(path).get("site") == {"key": "value"}
+
+    def test_deleted_key_should_not_be_persisted(self, tmp_path: Path) -> None:
+        path = tmp_path / "store.json"
+        store = JsonStore(path)
+        store.set("site", 1)
+        store.delete("site")
+
+        assert JsonStore(path).get("site") is None
+
+    def test_broken_file_should_be_ignored(self, tmp_path: Path) -> None:
+        path = tmp_path / "store.json"
+        path.write_text("{broken", encoding="utf-8")
+
+        assert JsonStore(path).get("site") is None
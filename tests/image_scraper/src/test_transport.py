@@ -0,0 +1,145 @@
+from dataclasses import replace
+from time import perf_counter, sleep
+from typing import Any, Generator
+
+import pytest
+import responses
+from requests import HTTPError, Response, Session
+
+from imgscraper.src.core import ImageScraper
+from imgscraper.src.models import PrewarmResult
+from imgscraper.src.scrapers.bs4_scraper import Bs4Scraper
+from imgscraper.src.transport import Http2Transport, RequestsTransport, Transport
+from tests.synthetic_site import CONTAINER_CLASS, PAGINATION_CLASS, SyntheticSite
+
+
+@pytest.fixture
+def h2_site(synthetic_site: SyntheticSite) -> Generator[Any, None, None]:
+    """Yields the HTTP/2 server. Skips the test if httpx or h2 is not installed."""
+    pytest.importorskip("httpx")
+    h2_server = pytest.importorskip("tests.h2_server")
+    with h2_server.H2SyntheticSite(synthetic_site) as site:
+        yield site
+
+
+@pytest.mark.unittests
+class TestRequestsTransport:
+    def test_fetch_should_retry_until_status_code_is_200(
+        self, mocked_responses: responses.RequestsMock, anonymous_session: Session
+    ) -> None:
+        mocked_responses.get("https://webludus.pl/retry", status=503)
+        mocked_responses.get("https://webludus.pl/retry", body="OK")
+
+        response = RequestsTransport(anonymous_session, delay=0).fetch(
+            "https://webludus.pl/retry"
+        )
+
+        assert response.text == "OK"
+
+    def test_get_should_not_retry(
+        self, mocked_responses: responses.RequestsMock, anonymous_session: Session
+    ) -> None:
+        mocked_responses.get("https://webludus.pl/error", status=500)
+
+        response = RequestsTransport(anonymous_session).get("https://webludus.pl/error")
+
+        assert response.status_code == 500
+
+
+class StatusTransport(Transport):
+    """Returns the responses with the given status codes."""
+
+    delay = 0
+
+    def __init__(self, *status_codes: int) -> None:
+        self.status_codes = list(status_codes)
+        self.retries = len(status_codes)
+
+    def get(self, url_address: str, stream: bool = False, **kwargs: Any) -> Response:
+        response = Response()
+        response.status_code = self.status_codes.pop(0)
+        return response
+
+
+@pytest.mark.unittests
+class TestTransportFetch:
+    def test_fetch_should_retry_until_status_code_is_200(self) -> None:
+        assert StatusTransport(503, 429, 200).fetch("https://webludus.pl/").ok
+
+    def test_raise_http_error_if_retries_run_out(self) -> None:
+        with pytest.raises(HTTPError, match="returned status code 404"):
+            StatusTransport(503, 404).fetch("https://webludus.pl/")
+
+
+@pytest.mark.integtests
+class TestPrewarm:
+    def test_first_fetch_should_skip_connection_setup(self) -> None:
+        with SyntheticSite(connection_delay=0.3) as site:
+            image_scraper = ImageScraper(
+                website_url=site.url,
+                container_class=CONTAINER_CLASS,
+                pagination_class=PAGINATION_CLASS,
+                pages_to_scan=1,
+                scraper=Bs4Scraper(),
+                session=Session(),
+            )
+
+            prewarm_result = image_scraper.prewarm()
+            sleep(0.4)
+            start = perf_counter()
+            sync_result = image_scraper.start_sync()
+            sync_time = perf_counter() - start
+
+            assert len(sync_result.images) == 10
+            assert sync_time < 0.3
+            assert site.connections == 1
+            assert prewarm_result is not None and not prewarm_result.reused
+            assert image_scraper.prewarm().reused  # type: ignore[union-attr]
+            assert not prewarm_result.dns_cached
+            assert prewarm_result.saved_time == prewarm_result.connect_time
+
+    def test_dns_time_should_be_saved_only_with_dns_cache(self) -> None:
+        result = PrewarmResult("webludus.pl", dns_time=0.1, connect_time=0.2)
+
+        assert result.saved_time == 0.2
+        assert replace(result, dns_cached=True).saved_time == pytest.approx(0.3)
+        assert replace(result, dns_cached=True, reused=True).saved_time == 0
+
+    def test_prewarm_should_not_be_supported_by_default(self, h2_site: Any) -> None:
+        transport = Http2Transport(http1=False)
+
+        assert transport.prewarm(h2_site.url) is None
+        transport.close()
+
+
+@pytest.mark.integtests
+class TestHttp2Transport:
+    def test_response_should_be_requests_response(
+        self, h2_site: Any, anonymous_session: Session
+    ) -> None:
+        transport = Http2Transport(anonymous_session, http1=False)
+
+        response = transport.fetch(h2_site.url)
+
+        assert response.status_code == 200
+        assert response.encoding == "utf-8"
+        assert response.text == h2_site.site.render(1)
+        transport.close()
+
+    def test_streamed_response_should_be_read_in_chunks(self, h2_site: Any) -> None:
+        transport = Http2Transport(http1=False)
+
+        response = transport.get(h2_site.url, stream=True)
+        body = b"".join(response.iter_content(chunk_size=100))
+        response.close()
+
+        assert body.decode() == h2_site.site.render(1)
+        transport.close()
+
+    def test_raise_http_error_if_status_code_is_not_200(self, h2_site: Any) -> None:
+        transport = Http2Transport(http1=False, retries=2, delay=0)
+
+        with pytest.raises(HTTPError, match="returned status code 404"):
+            transport.fetch(h2_site.url + "missing")
+        assert h2_site.site.requests["/missing"] == 2
+        transport.close()
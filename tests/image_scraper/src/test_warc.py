@@ -0,0 +1,177 @@
+import gzip
+from pathlib import Path
+from time import perf_counter
+
+import pytest
+from requests import HTTPError, Session
+
+from imgscraper.scraper_constructor import create_scraper
+from imgscraper.src.transport import RequestsTransport
+from imgscraper.src.warc import (
+    RecordingTransport,
+    ReplayTransport,
+    parse_http_response,
+    read_warc,
+)
+from tests.synthetic_site import CONTAINER_CLASS, PAGINATION_CLASS, SyntheticSite
+
+
+def record_site(site: SyntheticSite, session: Session, path: Path) -> list[str]:
+    transport = RecordingTransport(RequestsTransport(session), path)
+    transport.fetch(site.url)
+    with transport.get(f"{site.url}page/2", stream=True) as response:
+        body = b"".join(response.iter_content(chunk_size=64))
+    transport.get(f"{site.url}missing")
+    return [site.render(1), body.decode()]
+
+
+@pytest.mark.integtests
+class TestRecordingTransport:
+    def test_every_exchange_should_be_written(
+        self, synthetic_site: SyntheticSite, anonymous_session: Session, tmp_path: Path
+    ) -> None:
+        path = tmp_path / "site.warc"
+
+        pages = record_site(synthetic_site, anonymous_session, path)
+        records = list(read_warc(path))
+
+        assert pages[1] == synthetic_site.render(2)
+        assert [record.record_type for record in records] == ["response", "request"] * 3
+        assert records[0].target_uri == synthetic_site.url
+        assert records[1].headers["WARC-Concurrent-To"] == (
+            records[0].headers["WARC-Record-ID"]
+        )
+        assert records[1].block.startswith(b"GET / HTTP/1.1\r\n")
+        assert parse_http_response(records[0].block).body.decode() == pages[0]
+        assert parse_http_response(records[4].block).status_code == 404
+
+    def test_stream_closed_early_should_be_recorded_as_truncated(
+        self, synthetic_site: SyntheticSite, anonymous_session: Session, tmp_path: Path
+    ) -> None:
+        path = tmp_path / "site.warc"
+        transport = RecordingTransport(RequestsTransport(anonymous_session), path)
+
+        response = transport.get(synthetic_site.url, stream=True)
+        assert not path.exists()
+        first_chunk = next(response.iter_content(chunk_size=64))
+        response.close()
+        record = next(read_warc(path))
+
+        assert record.headers["WARC-Truncated"] == "disconnect"
+        assert parse_http_response(record.block).body == first_chunk
+
+    def test_gzip_archive(
+        self, synthetic_site: SyntheticSite, anonymous_session: Session, tmp_path: Path
+    ) -> None:
+        path = tmp_path / "site.warc.gz"
+
+        record_site(synthetic_site, anonymous_session, path)
+
+        assert path.read_bytes()[:2] == b"\x1f\x8b"
+        assert len(list(read_warc(path))) == 6
+
+
+@pytest.mark.unittests
+class TestParseHttpResponse:
+    def test_chunked_and_compressed_body_should_be_decoded(self) -> None:
+        body = gzip.compress(b"<html></html>")
+        block = (
+            b"HTTP/1.1 200 OK\r\nContent-Encoding: gzip\r\n"
+            b"Transfer-Encoding: chunked\r\nContent-Type: text/html; charset=utf-8\r\n"
+            b"\r\n" + f"{len(body):x}\r\n".encode() + body + b"\r\n0\r\n\r\n"
+        )
+
+        message = parse_http_response(block)
+
+        assert message.body == b"<html></html>"
+        assert "Content-Encoding" not in message.headers
+        assert message.headers["Content-Length"] == "13"
+
+
+@pytest.mark.integtests
+class TestReplayTransport:
+    def test_recorded_sync_should_be_replayed_without_network(
+        self, anonymous_session: Session, tmp_path: Path
+    ) -> None:
+        path = tmp_path / "site.warc"
+        with SyntheticSite() as site:
+            website_url = site.url
+            recorded = create_scraper(
+                website_url,
+                CONTAINER_CLASS,
+                PAGINATION_CLASS,
+                pages_to_scan=3,
+                session=anonymous_session,
+                record_warc=path,
+            ).start_sync()
+
+        replayed = create_scraper(
+            website_url,
+            CONTAINER_CLASS,
+            PAGINATION_CLASS,
+            pages_to_scan=3,
+            session=anonymous_session,
+            replay_warc=path,
+        ).start_sync()
+        streamed = create_scraper(
+            website_url,
+            CONTAINER_CLASS,
+            PAGINATION_CLASS,
+            pages_to_scan=3,
+            session=anonymous_session,
+            replay_warc=[path],
+            scraper="stream",
+        ).start_sync()
+
+        assert len(recorded.images) == 30
+        assert replayed.images == recorded.images
+        assert streamed.images == recorded.images
+
+    def test_repeated_url_should_be_served_in_recorded_order(
+        self, synthetic_site: SyntheticSite, anonymous_session: Session, tmp_path: Path
+    ) -> None:
+        path = tmp_path / "site.warc"
+        transport = RecordingTransport(RequestsTransport(anonymous_session), path)
+        transport.fetch(synthetic_site.url)
+        synthetic_site.publish(1)
+        transport.fetch(synthetic_site.url)
+
+        replay = ReplayTransport(path)
+        bodies = [replay.fetch(synthetic_site.url).text for _ in range(3)]
+
+        assert "Image 101" not in bodies[0]
+        assert "Image 101" in bodies[1]
+        assert bodies[2] == bodies[1]
+
+    def test_latency_should_delay_responses(
+        self, synthetic_site: SyntheticSite, anonymous_session: Session, tmp_path: Path
+    ) -> None:
+        path = tmp_path / "site.warc"
+        record_site(synthetic_site, anonymous_session, path)
+        replay = ReplayTransport(path, latency=0.05, jitter=0.01)
+
+        start = perf_counter()
+        for _ in range(4):
+            replay.fetch(synthetic_site.url)
+
+        assert perf_counter() - start >= 0.15
+
+    def test_raise_http_error_on_missing_url(self, tmp_path: Path) -> None:
+        path = tmp_path / "empty.warc"
+        path.touch()
+
+        with pytest.raises(HTTPError, match="returned status code 404"):
+            ReplayTransport(path).fetch("https://webludus.pl/")
+
+    def test_throttled_body_should_be_streamed(
+        self, synthetic_site: SyntheticSite, anonymous_session: Session, tmp_path: Path
+    ) -> None:
+        path = tmp_path / "site.warc"
+        record_site(synthetic_site, anonymous_session, path)
+        replay = ReplayTransport(path, bandwidth=1_000_000)
+
+        response = replay.get(f"{synthetic_site.url}page/2", stream=True)
+
+        assert b"".join(response.iter_content(chunk_size=100)).decode() == (
+            synthetic_site.render(2)
+        )
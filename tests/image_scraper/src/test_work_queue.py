@@ -0,0 +1,79 @@
+from pathlib import Path
+from typing import Generator
+
+import pytest
+
+from imgscraper.src.work_queue import SQLiteWorkQueue
+
+
+@pytest.fixture
+def work_queue(tmp_path: Path) -> Generator[SQLiteWorkQueue, None, None]:
+    queue = SQLiteWorkQueue(tmp_path / "queue.sqlite")
+    yield queue
+    queue.close()
+
+
+@pytest.mark.unittests
+class TestSQLiteWorkQueue:
+    def test_leased_job_should_not_be_visible_for_other_workers(
+        self, work_queue: SQLiteWorkQueue
+    ) -> None:
+        job_id = work_queue.enqueue({"site": "a"})
+
+        job = work_queue.lease("worker-1")
+
+        assert job is not None
+        assert job.job_id == job_id
+        assert job.payload == {"site": "a"}
+        assert job.attempts == 1
+        assert work_queue.lease("worker-2") is None
+
+    def test_expired_lease_should_be_taken_by_another_worker(
+        self, work_queue: SQLiteWorkQueue
+    ) -> None:
+        job_id = work_queue.enqueue({"site": "a"})
+        work_queue.lease("worker-1", visibility_timeout=-1)
+
+        job = work_queue.lease("worker-2")
+
+        assert job is not None
+        assert job.attempts == 2
+        assert not work_queue.complete(job_id, "worker-1", "late")
+        assert work_queue.complete(job_id, "worker-2", {"images": []})
+        assert work_queue.results()[0].result == {"images": []}
+
+    def test_failed_job_should_be_retried_until_max_attempts(
+        self, work_queue: SQLiteWorkQueue
+    ) -> None:
+        job_id = work_queue.enqueue({"site": "a"}, max_attempts=2)
+
+        for _ in range(2):
+            job = work_queue.lease("worker")
+            assert job is not None
+            work_queue.fail(job_id, "worker", "ConnectionError()")
+
+        assert work_queue.lease("worker") is None
+        assert work_queue.unfinished_jobs() == 0
+        result = work_queue.results()[0]
+        assert result.status == "failed"
+        assert result.attempts == 2
+        assert result.error == "ConnectionError()"
+
+    def test_expired_lease_without_attempts_left_should_fail(
+        self, work_queue: SQLiteWorkQueue
+    ) -> None:
+        work_queue.enqueue({"site": "a"}, max_attempts=1)
+        work_queue.lease("worker", visibility_timeout=-1)
+
+        assert work_queue.lease("worker") is None
+        assert work_queue.results()[0].error == "Lease expired."
+
+    def test_jobs_should_be_leased_in_order(self, work_queue: SQLiteWorkQueue) -> None:
+        first_job = work_queue.enqueue({"site": "a"})
+        second_job = work_queue.enqueue({"site": "b"})
+
+        assert [work_queue.lease("w").job_id for _ in range(2)] == [  # type: ignore
+            first_job,
+            second_job,
+        ]
+        assert work_queue.unfinished_jobs() == 2
@@ -0,0 +1,84 @@
+from pathlib import Path
+
+import pytest
+
+from imgscraper.src.work_queue import SQLiteWorkQueue
+from imgscraper.src.worker import run_worker, start_workers
+from tests.synthetic_site import CONTAINER_CLASS, PAGINATION_CLASS, SyntheticSite
+
+
+def site_config(url_address: str, pages_to_scan: int = 1) -> dict[str, object]:
+    return {
+        "website_url": url_address,
+        "container_class": CONTAINER_CLASS,
+        "pagination_class": PAGINATION_CLASS,
+        "pages_to_scan": pages_to_scan,
+    }
+
+
+@pytest.mark.integtests
+class TestRunWorker:
+    def test_jobs_should_be_completed(
+        self, tmp_path: Path, synthetic_site: SyntheticSite
+    ) -> None:
+        queue = SQLiteWorkQueue(tmp_path / "queue.sqlite")
+        queue.enqueue(
+            {
+                "config": site_config(synthetic_site.url, pages_to_scan=3),
+                "last_sync_data": [synthetic_site.image_url(95)],
+            }
+        )
+
+        processed_jobs = run_worker(queue, worker_id="worker", poll_interval=0)
+
+        result = queue.results()[0]
+        assert processed_jobs == 1
+        assert result.status == "done"
+        assert result.result["pages_scanned"] == 1
+        assert [image["title"] for image in result.result["images"]] == [
+            "Image 100",
+            "Image 99",
+            "Image 98",
+            "Image 97",
+            "Image 96",
+        ]
+
+    def test_failed_job_should_be_retried(
+        self, tmp_path: Path, synthetic_site: SyntheticSite
+    ) -> None:
+        queue = SQLiteWorkQueue(tmp_path / "queue.sqlite")
+        queue.enqueue({"config": {"website_url": synthetic_site.url}}, max_attempts=2)
+
+        processed_jobs = run_worker(queue, worker_id="worker", poll_interval=0)
+
+        assert processed_jobs == 2
+        assert queue.results()[0].status == "failed"
+        assert "TypeError" in queue.results()[0].error  # type: ignore
+
+
+@pytest.mark.integtests
+class TestStartWorkers:
+    def test_many_processes_should_not_scrape_the_same_page_twice(
+        self, tmp_path: Path, synthetic_site: SyntheticSite
+    ) -> None:
+        path = tmp_path / "queue.sqlite"
+        queue = SQLiteWorkQueue(path)
+        pages = [synthetic_site.url] + [
+            f"{synthetic_site.url}page/{page}" for page in range(2, 11)
+        ]
+        for url_address in pages:
+            queue.enqueue({"config": site_config(url_address)})
+
+        workers = start_workers(path, processes=4, poll_interval=0.05)
+        for worker in workers:
+            worker.join(timeout=60)
+
+        results = queue.results()
+        titles = [
+            image["title"] for result in results for image in result.result["images"]
+        ]
+        assert all(worker.exitcode == 0 for worker in workers)
+        assert len(results) == 10
+        assert {result.status for result in results} == {"done"}
+        assert len(titles) == len(set(titles)) == 100
+        assert synthetic_site.requests["/page/2"] == 1
@@ -0,0 +1,198 @@
+import json
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockerFixture
+
+from imgscraper.cli import HostQueues, WatermarkStore, load_config, main
+from tests.image_scraper.src.test_circuit_breaker import closed_port_url
+from tests.synthetic_site import CONTAINER_CLASS, PAGINATION_CLASS, SyntheticSite
+
+SITE = {
+    "website_url": "https://webludus.pl/",
+    "container_class": "image-holder",
+    "pagination_class": "pagination",
+}
+
+
+@pytest.mark.unittests
+class TestLoadConfig:
+    def test_defaults_should_be_applied_to_every_site(self, tmp_path: Path) -> None:
+        path = tmp_path / "sites.json"
+        path.write_text(
+            json.dumps(
+                {
+                    "defaults": {"pages_to_scan": 3, "scraper": "stream"},
+                    "sites": [SITE, {**SITE, "name": "second", "pages_to_scan": 1}],
+                }
+            )
+        )
+
+        sites = load_config(path)
+
+        assert sites == [
+            {
+                **SITE,
+                "pages_to_scan": 3,
+                "scraper": "stream",
+                "name": SITE["website_url"],
+            },
+            {**SITE, "pages_to_scan": 1, "scraper": "stream", "name": "second"},
+        ]
+
+    def test_toml_config_should_be_read(self, tmp_path: Path) -> None:
+        pytest.importorskip("tomllib")
+        path = tmp_path / "sites.toml"
+        path.write_text(
+            "[[sites]]\n"
+            'name = "webludus"\n'
+            'website_url = "https://webludus.pl/"\n'
+            'container_class = "image-holder"\n'
+            'pagination_class = "pagination"\n'
+        )
+
+        assert load_config(path) == [{**SITE, "name": "webludus"}]
+
+    def test_yaml_config_should_be_read(self, tmp_path: Path) -> None:
+        pytest.importorskip("yaml")
+        path = tmp_path / "sites.yaml"
+        path.write_text(
+            "- website_url: https://webludus.pl/\n"
+            "  container_class: image-holder\n"
+            "  pagination_class: pagination\n"
+        )
+
+        assert load_config(path) == [{**SITE, "name": SITE["website_url"]}]
+
+    @pytest.mark.parametrize(
+        "data, message",
+        [
+            ({"sites": {}}, "should hold a list of sites"),
+            ([{"website_url": "https://webludus.pl/"}], "missing container_class"),
+            ([SITE, SITE], "Site names should be unique."),
+        ],
+    )
+    def test_raise_value_error_if_config_is_invalid(
+        self, tmp_path: Path, data: object, message: str
+    ) -> None:
+        path = tmp_path / "sites.json"
+        path.write_text(json.dumps(data))
+
+        with pytest.raises(ValueError, match=message):
+            load_config(path)
+
+
+@pytest.mark.unittests
+class TestWatermarkStore:
+    def test_newest_urls_should_be_kept_on_top(self, tmp_path: Path) -> None:
+        store = WatermarkStore(tmp_path / "state.json", size=3)
+
+        store.update("site", ["b", "a"])
+        store.update("site", ["d", "c", "b"])
+        store.update("site", [])
+
+        assert WatermarkStore(tmp_path / "state.json").get("site") == ("d", "c", "b")
+        assert store.get("other") is None
+
+    def test_sites_of_busy_host_should_wait_in_queue(self) -> None:
+        sites = [
+            {"website_url": url}
+            for url in (
+                "https://a.pl/1",
+                "https://A.pl/2",
+                "https://a.pl/3",
+                "https://b.pl/",
+            )
+        ]
+        hosts = HostQueues(sites, per_host=2)
+
+        assert hosts.ready() == [sites[0], sites[3], sites[1]]
+        assert hosts.ready() == []
+        hosts.done(sites[3])
+        assert hosts.ready() == []
+        hosts.done(sites[0])
+        assert hosts.ready() == [sites[2]]
+
+
+@pytest.mark.integtests
+class TestMain:
+    def test_sites_should_be_synced_from_watermarks(
+        self, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        config, output = tmp_path / "sites.json", tmp_path / "images.ndjson"
+        state = tmp_path / "state.json"
+        arguments = [str(config), "-o", str(output), "-s", str(state), "--stats"]
+        with SyntheticSite() as first, SyntheticSite() as second:
+            config.write_text(
+                json.dumps(
+                    {
+                        "defaults": {
+                            "container_class": CONTAINER_CLASS,
+                            "pagination_class": PAGINATION_CLASS,
+                            "pages_to_scan": 2,
+                        },
+                        "sites": [
+                            {"name": "first", "website_url": first.url},
+                            {"name": "second", "website_url": second.url},
+                        ],
+                    }
+                )
+            )
+
+            assert main(arguments) == 0
+            first.publish(3)
+            second.publish(5)
+            assert main([*arguments, "--workers", "1"]) == 0
+
+        lines = [json.loads(line) for line in output.read_text().splitlines()]
+        stats = capsys.readouterr().err
+        assert len(lines) == 48
+        assert sum(line["site"] == "first" for line in lines[40:]) == 3
+        assert lines[-1]["url_address"] in (first.image_url(101), second.image_url(101))
+        assert json.loads(state.read_text())["second"][0] == second.image_url(105)
+        assert "Pages: 4 (" in stats and "pages/s" in stats and "images/s" in stats
+        assert "  first: " in stats
+
+    def test_watermark_should_be_kept_if_images_are_not_written(
+        self, tmp_path: Path, mocker: MockerFixture
+    ) -> None:
+        config, state = tmp_path / "sites.json", tmp_path / "state.json"
+        mocker.patch("imgscraper.cli.write_images", side_effect=OSError)
+        with SyntheticSite() as site:
+            config.write_text(
+                json.dumps(
+                    [
+                        {
+                            "website_url": site.url,
+                            "container_class": CONTAINER_CLASS,
+                            "pagination_class": PAGINATION_CLASS,
+                        }
+                    ]
+                )
+            )
+
+            with pytest.raises(OSError):
+                main([str(config), "-s", str(state)])
+
+        assert not state.exists()
+
+    def test_failed_site_should_set_exit_code(
+        self, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        config = tmp_path / "sites.json"
+        config.write_text(json.dumps([{**SITE, "website_url": closed_port_url()}]))
+
+        exit_code = main(
+            [
+                str(config),
+                "-s",
+                str(tmp_path / "state.json"),
+                "--stats",
+                "--log-level",
+                "CRITICAL",
+            ]
+        )
+
+        assert exit_code == 1
+        assert capsys.readouterr().out == ""
+        assert not (tmp_path / "state.json").exists()
@@ -0,0 +1,71 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import imgscraper
+from imgscraper.scraper_constructor import create_scraper
+
+HEAVY_MODULES = ("bs4", "requests", "bepatient")
+IMPORT_TIME_LIMIT_US = int(os.environ.get("IMGSCRAPER_IMPORT_TIME_LIMIT_US", 200_000))
+
+
+def measure_import(statement: str) -> dict[str, int]:
+    """Runs the statement with python -X importtime in a clean interpreter.
+
+    Returns: dict with the cumulative import time (us) of every imported module."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    modules = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line.removeprefix("import time:").split("|")
+        modules[module.strip()] = int(cumulative)
+    return modules
+
+
+@pytest.mark.integtests
+class TestImportTime:
+    @pytest.mark.parametrize(
+        "statement",
+        [
+            "import imgscraper",
+            "from imgscraper import Image",
+            "import imgscraper.scraper_constructor",
+        ],
+    )
+    def test_backends_should_not_be_imported(self, statement: str) -> None:
+        modules = measure_import(statement)
+
+        assert not [
+            module for module in modules if module.split(".")[0] in HEAVY_MODULES
+        ]
+
+    def test_import_time_should_be_below_the_limit(self) -> None:
+        modules = measure_import("import imgscraper")
+
+        assert modules["imgscraper"] < IMPORT_TIME_LIMIT_US
+
+    def test_backends_should_be_imported_on_create_scraper(self) -> None:
+        modules = measure_import(
+            "import imgscraper; imgscraper.create_scraper('https://x.pl/', 'a', 'b')"
+        )
+
+        assert "bs4" in modules
+        assert "requests" in modules
+
+
+@pytest.mark.unittests
+class TestGetAttr:
+    def test_create_scraper_should_be_available(self) -> None:
+        assert imgscraper.create_scraper is create_scraper
+
+    def test_raise_attribute_error_for_unknown_name(self) -> None:
+        with pytest.raises(AttributeError, match="has no attribute 'unknown'"):
+            getattr(imgscraper, "unknown")
@@ -1,7 +1,15 @@
+from importlib.metadata import EntryPoint
+
 import pytest
+from pytest_mock import MockerFixture
 
-from imgscraper.scraper_constructor import create_scraper
+from imgscraper import scraper_constructor
+from imgscraper.scraper_constructor import create_scraper, load_scraper
+from imgscraper.src.adaptive_depth import DepthPredictor
+from imgscraper.src.models import ExtractionPlan
 from imgscraper.src.scrapers.bs4_scraper import Bs4Scraper
+from imgscraper.src.scrapers.scraper import Scraper
+from imgscraper.src.transport import Http2Transport, RequestsTransport
 
 
 @pytest.mark.integtests
@@ -22,6 +30,7 @@ class TestCreateImageScraper:
         assert scraper.image_source.container_class == container_class
         assert scraper.image_source.pagination_class == pagination_class
         assert scraper.image_source.pages_to_scan == 1
+        assert isinstance(scraper.image_source.transport, RequestsTransport)
 
     def test_happy_path_with_kwargs(
         self, prepare_website_data: tuple[str, str, str, int]
@@ -43,6 +52,88 @@ class TestCreateImageScraper:
         assert scraper.image_source.pagination_class == pagination_class
         assert scraper.image_source.pages_to_scan == pages
 
+    def test_selectors_should_be_added_to_extraction_plan(
+        self, prepare_website_data: tuple[str, str, str, int]
+    ) -> None:
+        website_url, container_class, pagination_class = prepare_website_data[:3]
+
+        scraper = create_scraper(
+            website_url,
+            container_class,
+            pagination_class,
+            container_selector="article > .image",
+            image_attributes=["data-src", "src"],
+        )
+
+        assert scraper.image_source.extraction_plan == ExtractionPlan(
+            container_selector="article > .image",
+            pagination_selector="." + pagination_class,
+            image_attributes=("data-src", "src"),
+        )
+
+    def test_auto_pages_to_scan_should_add_depth_predictor(
+        self, prepare_website_data: tuple[str, str, str, int]
+    ) -> None:
+        website_url, container_class, pagination_class = prepare_website_data[:3]
+
+        scraper = create_scraper(
+            website_url,
+            container_class,
+            pagination_class,
+            pages_to_scan="auto",
+            max_pages_to_scan=3,
+        )
+
+        assert isinstance(scraper.depth_predictor, DepthPredictor)
+        assert scraper.depth_predictor.max_pages_to_scan == 3
+        assert scraper.image_source.pages_to_scan == 3
+
+    @pytest.mark.parametrize(
+        "scraper_name, decompose_pages", [("bs4", True), ("feed", None)]
+    )
+    def test_bounded_memory_should_enable_dom_teardown(
+        self,
+        prepare_website_data: tuple[str, str, str, int],
+        scraper_name: str,
+        decompose_pages: bool | None,
+    ) -> None:
+        website_url, container_class, pagination_class = prepare_website_data[:3]
+
+        scraper = create_scraper(
+            website_url,
+            container_class,
+            pagination_class,
+            scraper=scraper_name,
+            bounded_memory=True,
+            memory_limit=512 * 1024 * 1024,
+        )
+
+        assert getattr(scraper.scraper, "decompose_pages", None) is decompose_pages
+        assert scraper.bounded_memory
+        assert scraper.memory_limit == 512 * 1024 * 1024
+
+    def test_http2_transport_should_be_created(
+        self, prepare_website_data: tuple[str, str, str, int]
+    ) -> None:
+        pytest.importorskip("httpx")
+        website_url, container_class, pagination_class = prepare_website_data[:3]
+
+        scraper = create_scraper(
+            website_url, container_class, pagination_class, transport="http2"
+        )
+
+        assert isinstance(scraper.image_source.transport, Http2Transport)
+
+    def test_raise_value_error_transport_is_not_supported(
+        self, prepare_website_data: tuple[str, str, str, int]
+    ) -> None:
+        website_url, container_class, pagination_class = prepare_website_data[:3]
+
+        with pytest.raises(ValueError, match="This transport is not supported."):
+            create_scraper(
+                website_url, container_class, pagination_class, transport="TEST"
+            )
+
     def test_raise_value_error_scraper_is_not_supported(
         self, prepare_website_data: tuple[str, str, str, int]
     ):
@@ -69,3 +160,45 @@ class TestCreateImageScraper:
                 pagination_class,
                 pages_to_scan="TEST",
             )
+
+
+@pytest.mark.unittests
+class TestLoadScraper:
+    def test_string_path_should_be_imported_on_first_use(
+        self, mocker: MockerFixture
+    ) -> None:
+        scrapers: dict[str, str | type[Scraper]] = {
+            "bs4": "imgscraper.src.scrapers.bs4_scraper:Bs4Scraper"
+        }
+        mocker.patch.object(scraper_constructor, "SCRAPERS", scrapers)
+
+        assert load_scraper("bs4") is Bs4Scraper
+        assert scrapers["bs4"] is Bs4Scraper
+
+    def test_scraper_should_be_found_in_entry_points(
+        self, mocker: MockerFixture
+    ) -> None:
+        mocker.patch.object(scraper_constructor, "SCRAPERS", {})
+        mocker.patch.object(
+            scraper_constructor,
+            "entry_points",
+            return_value=[
+                EntryPoint(
+                    name="plugin",
+                    value="imgscraper.src.scrapers.bs4_scraper:Bs4Scraper",
+                    group=scraper_constructor.ENTRY_POINTS_GROUP,
+                )
+            ],
+        )
+
+        assert load_scraper("plugin") is Bs4Scraper
+
+    def test_raise_value_error_if_object_is_not_a_scraper(
+        self, mocker: MockerFixture
+    ) -> None:
+        mocker.patch.object(
+            scraper_constructor, "SCRAPERS", {"session": "requests:Session"}
+        )
+
+        with pytest.raises(ValueError, match="session is not a Scraper subclass."):
+            load_scraper("session")
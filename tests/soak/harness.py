@@ -0,0 +1,174 @@
+"""Soak harness driving many sync cycles of one scraper against a churning site.
+
+The harness samples the resident memory, the memory traced by tracemalloc, the
+number of live objects and the throughput, and compares the end of the run with
+the baseline taken after the warm-up."""
+import gc
+import tracemalloc
+from collections import Counter
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Callable
+
+from imgscraper.src.core import ImageScraper
+from imgscraper.src.memory import rss_bytes
+from imgscraper.src.models import SyncResult
+from tests.synthetic_site import SyntheticSite
+
+MB = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class SoakThresholds:
+    max_rss_growth_mb: float = 20
+    max_traced_growth_mb: float = 5
+    max_object_growth: int = 20_000
+    max_throughput_drop: float = 0.5
+
+
+@dataclass(frozen=True)
+class SoakSample:
+    cycle: int
+    rss: int
+    traced: int
+    objects: int
+    pages_per_second: float
+
+
+@dataclass
+class SoakReport:
+    thresholds: SoakThresholds
+    samples: list[SoakSample] = field(default_factory=list)
+    top_allocators: list[str] = field(default_factory=list)
+    growing_types: list[tuple[str, int]] = field(default_factory=list)
+
+    @property
+    def baseline(self) -> SoakSample:
+        return self.samples[0]
+
+    @property
+    def final(self) -> SoakSample:
+        return self.samples[-1]
+
+    def failures(self) -> list[str]:
+        """Returns the descriptions of the exceeded thresholds."""
+        failures = []
+        rss_growth = (self.final.rss - self.baseline.rss) / MB
+        if rss_growth > self.thresholds.max_rss_growth_mb:
+            failures.append(f"RSS grew by {rss_growth:.1f} MB.")
+        traced_growth = (self.final.traced - self.baseline.traced) / MB
+        if traced_growth > self.thresholds.max_traced_growth_mb:
+            failures.append(f"Traced memory grew by {traced_growth:.1f} MB.")
+        object_growth = self.final.objects - self.baseline.objects
+        if object_growth > self.thresholds.max_object_growth:
+            failures.append(f"{object_growth} more live objects.")
+        throughput_drop = 1 - self.final.pages_per_second / max(
+            self.baseline.pages_per_second, 1e-9
+        )
+        if throughput_drop > self.thresholds.max_throughput_drop:
+            failures.append(f"Throughput dropped by {throughput_drop:.0%}.")
+        return failures
+
+    def summary(self) -> str:
+        header = ("cycle", "RSS MB", "traced MB", "objects", "pages/s")
+        lines = [" ".join(f"{name:>9}" for name in header)]
+        lines.extend(
+            f"{sample.cycle:>9} {sample.rss / MB:>9.1f} {sample.traced / MB:>9.2f}"
+            f" {sample.objects:>9} {sample.pages_per_second:>9.1f}"
+            for sample in self.samples
+        )
+        lines.append("Top allocators:")
+        lines.extend(f"  {allocator}" for allocator in self.top_allocators)
+        lines.append("Growing types:")
+        lines.extend(f"  {name}: +{growth}" for name, growth in self.growing_types)
+        return "\n".join(lines)
+
+
+class SoakHarness:
+    """Runs start_sync in a loop, like a scheduler running a scraper for weeks. The
+    site publishes new images before every cycle, and the scraper gets the newest
+    images of the previous sync as last_sync_data."""
+
+    def __init__(
+        self,
+        site: SyntheticSite,
+        scraper_factory: Callable[[str], ImageScraper],
+        cycles: int = 1000,
+        samples: int = 10,
+        warmup_cycles: int = 50,
+        images_per_cycle: int = 25,
+        thresholds: SoakThresholds = SoakThresholds(),
+    ) -> None:
+        """Constructor.
+
+        Args:
+            site: the started SyntheticSite.
+            scraper_factory: builds the ImageScraper for the website URL.
+            cycles: the number of the measured sync cycles.
+            samples: how many times the metrics are sampled during the run.
+            warmup_cycles: cycles run before the baseline sample, which fill the
+                caches and the pools.
+            images_per_cycle: how many images are published before every cycle.
+            thresholds: the allowed growth of the metrics."""
+        self.site = site
+        self.image_scraper = scraper_factory(site.url)
+        self.cycles = cycles
+        self.sample_every = max(cycles // samples, 1)
+        self.warmup_cycles = warmup_cycles
+        self.images_per_cycle = images_per_cycle
+        self.thresholds = thresholds
+        self._last_sync_data: tuple[str, ...] | None = None
+
+    def _cycle(self) -> SyncResult:
+        self.site.publish(self.images_per_cycle)
+        result = self.image_scraper.start_sync(self._last_sync_data)
+        if result.images:
+            self._last_sync_data = tuple(
+                image.url_address for image in result.images[:3]
+            )
+        return result
+
+    @staticmethod
+    def _object_counts() -> Counter[str]:
+        gc.collect()
+        return Counter(type(obj).__name__ for obj in gc.get_objects())
+
+    def run(self) -> SoakReport:
+        """Runs the cycles and returns the report of the collected metrics."""
+        for _ in range(self.warmup_cycles):
+            self._cycle()
+
+        report = SoakReport(thresholds=self.thresholds)
+        tracemalloc.start()
+        try:
+            baseline_objects = self._object_counts()
+            baseline_snapshot = tracemalloc.take_snapshot()
+            pages, start = 0, perf_counter()
+            for cycle in range(1, self.cycles + 1):
+                pages += self._cycle().pages_scanned
+                if cycle % self.sample_every and cycle != self.cycles:
+                    continue
+                elapsed = perf_counter() - start
+                objects = self._object_counts()
+                report.samples.append(
+                    SoakSample(
+                        cycle=cycle,
+                        rss=rss_bytes(),
+                        traced=tracemalloc.get_traced_memory()[0],
+                        objects=sum(objects.values()),
+                        pages_per_second=pages / elapsed,
+                    )
+                )
+                pages, start = 0, perf_counter()
+
+            statistics = tracemalloc.take_snapshot().compare_to(
+                baseline_snapshot, "lineno"
+            )
+            report.top_allocators = [str(statistic) for statistic in statistics[:10]]
+            objects.subtract(baseline_objects)
+            report.growing_types = [
+                (name, growth) for name, growth in objects.most_common(10) if growth > 0
+            ]
+        finally:
+            tracemalloc.stop()
+        return report
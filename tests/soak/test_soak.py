@@ -0,0 +1,65 @@
+import os
+from typing import Callable
+
+import pytest
+from requests import Session
+
+from imgscraper.src.core import ImageScraper
+from imgscraper.src.scrapers.bs4_scraper import Bs4Scraper
+from imgscraper.src.scrapers.stream_scraper import StreamScraper
+from imgscraper.src.scrapers.scraper import Scraper
+from tests.soak.harness import SoakHarness, SoakThresholds
+from tests.synthetic_site import CONTAINER_CLASS, PAGINATION_CLASS, SyntheticSite
+
+# Set IMGSCRAPER_SOAK_CYCLES (e.g. to 5000) to run the long soak.
+CYCLES = int(os.environ.get("IMGSCRAPER_SOAK_CYCLES", 100))
+
+
+def scraper_factory(
+    session: Session, scraper: Scraper, synchronization_data_limit: int | None
+) -> Callable[[str], ImageScraper]:
+    def factory(website_url: str) -> ImageScraper:
+        return ImageScraper(
+            website_url=website_url,
+            container_class=CONTAINER_CLASS,
+            pagination_class=PAGINATION_CLASS,
+            pages_to_scan=5,
+            scraper=scraper,
+            session=session,
+            synchronization_data_limit=synchronization_data_limit,
+        )
+
+    return factory
+
+
+@pytest.mark.soak
+class TestSoak:
+    @pytest.mark.parametrize("scraper_class", [Bs4Scraper, StreamScraper])
+    def test_scraper_should_not_leak_over_many_cycles(
+        self, anonymous_session: Session, scraper_class: type[Scraper]
+    ) -> None:
+        with SyntheticSite(pages=10) as site:
+            report = SoakHarness(
+                site,
+                scraper_factory(anonymous_session, scraper_class(), 1000),
+                cycles=CYCLES,
+                warmup_cycles=50,
+            ).run()
+
+        assert report.failures() == []
+        assert report.final.cycle == CYCLES
+
+    def test_harness_should_detect_unbounded_growth(
+        self, anonymous_session: Session
+    ) -> None:
+        with SyntheticSite(pages=10) as site:
+            report = SoakHarness(
+                site,
+                scraper_factory(anonymous_session, StreamScraper(), None),
+                cycles=100,
+                warmup_cycles=10,
+                thresholds=SoakThresholds(max_object_growth=1000),
+            ).run()
+
+        assert report.failures()[0].endswith("more live objects.")
+        assert "Image" in dict(report.growing_types)
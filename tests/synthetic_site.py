@@ -0,0 +1,174 @@
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socket import IPPROTO_TCP, TCP_NODELAY
+from threading import Lock, Thread
+from time import sleep
+
+CONTAINER_CLASS = "simple-image"
+PAGINATION_CLASS = "pagination"
+
+
+class SyntheticSite:
+    """Local meme site used by the tests that need a real HTTP server.
+
+    The home page and the /page/N pages list the images from the newest one.
+    publish() adds new images on top, so the content churns like on a real site.
+    The pages carry the ETag of the newest image and answer the conditional
+    requests with 304 Not Modified."""
+
+    def __init__(
+        self,
+        pages: int = 10,
+        images_per_page: int = 10,
+        padding: int = 0,
+        connection_delay: float = 0,
+        padding_text: str = "x",
+        content_type: str | None = "text/html; charset=utf-8",
+        image_body: bytes | None = None,
+    ) -> None:
+        """Constructor.
+
+        Args:
+            pages: number of the available pages.
+            images_per_page: number of images on every page.
+            padding: number of characters of extra markup added to every image
+                container.
+            connection_delay: seconds of delay on every new connection, simulating
+                the TCP and TLS handshakes.
+            padding_text: text repeated in the extra markup.
+            content_type: the Content-Type header. If None, the header is omitted.
+            image_body: if provided, served as every image of the site."""
+        self.pages = pages
+        self.images_per_page = images_per_page
+        self.padding = padding
+        self.connection_delay = connection_delay
+        self.padding_text = padding_text
+        self.content_type = content_type
+        self.image_body = image_body
+        self.newest_image = pages * images_per_page
+        self.connections = 0
+        self.not_modified = 0
+        self.requests: Counter[str] = Counter()
+        self._lock = Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/"
+
+    def image_url(self, number: int) -> str:
+        return f"{self.url}img/{number}.jpg"
+
+    def publish(self, count: int) -> None:
+        with self._lock:
+            self.newest_image += count
+
+    def start(self) -> "SyntheticSite":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "SyntheticSite":
+        return self.start()
+
+    def __exit__(self, *args: object) -> None:
+        self.stop()
+
+    def render(self, page: int) -> str:
+        with self._lock:
+            first_image = self.newest_image - (page - 1) * self.images_per_page
+        padding = (self.padding_text * self.padding)[: self.padding]
+        extra_markup = f"<p>{padding}</p>" if self.padding else ""
+        containers = "".join(
+            f'<div class="{CONTAINER_CLASS}"><a href="/{number}">'
+            f'<img src="/img/{number}.jpg" alt="Image {number}"></a>'
+            f"{extra_markup}</div>"
+            for number in range(first_image, first_image - self.images_per_page, -1)
+            if number > 0
+        )
+        next_page = f'<a href="/page/{page + 1}">Next</a>' if page < self.pages else ""
+        return (
+            "<html><head><title>Synthetic site</title></head><body>"
+            f'{containers}<div class="{PAGINATION_CLASS}">{next_page}</div>'
+            "</body></html>"
+        )
+
+    def etag(self) -> str:
+        with self._lock:
+            return f'"{self.newest_image}"'
+
+    def page_number(self, path: str) -> int | None:
+        """Returns the number of the page under the path or None, if there is none."""
+        if path == "/":
+            return 1
+        prefix = "/page/"
+        if path.startswith(prefix) and path[len(prefix) :].isdigit():
+            page = int(path[len(prefix) :])
+            return page if 1 <= page <= self.pages else None
+        return None
+
+    def new_connection(self) -> None:
+        with self._lock:
+            self.connections += 1
+        sleep(self.connection_delay)
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self) -> None:
+                site.new_connection()
+                # The headers and the body are sent separately, and Nagle's
+                # algorithm would delay the body until the client ACKs the headers.
+                self.request.setsockopt(IPPROTO_TCP, TCP_NODELAY, 1)
+                super().setup()
+
+            def do_GET(self) -> None:  # pylint: disable=invalid-name
+                with site._lock:  # pylint: disable=protected-access
+                    site.requests[self.path] += 1
+                if site.image_body is not None and self.path.startswith("/img/"):
+                    self._send(site.image_body, "image/jpeg")
+                    return
+                page = site.page_number(self.path)
+                if page is None:
+                    self.send_error(404)
+                    return
+                etag = site.etag()
+                if self.headers.get("If-None-Match") == etag:
+                    with site._lock:  # pylint: disable=protected-access
+                        site.not_modified += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self._send(site.render(page).encode(), site.content_type, etag)
+
+            def do_HEAD(self) -> None:  # pylint: disable=invalid-name
+                self.send_response(200 if site.page_number(self.path) else 404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def _send(
+                self, body: bytes, content_type: str | None, etag: str | None = None
+            ) -> None:
+                self.send_response(200)
+                if content_type:
+                    self.send_header("Content-Type", content_type)
+                if etag:
+                    self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args: object) -> None:
+                """Keeps the test output clean."""
+
+        return Handler